@@ -1,15 +1,37 @@
 import os
+import hmac
 import json
 import time
-import base64
-import hmac
-import hashlib
+import queue
+import atexit
 import sqlite3
+import tempfile
+import threading
+from concurrent.futures import Future
 from datetime import datetime
-from dataclasses import dataclass
-from typing import Optional, Tuple
-
-from flask import Flask, request, make_response, redirect, render_template_string, send_from_directory
+from typing import List, Optional, Tuple
+
+from flask import Flask, g, request, make_response, redirect, send_from_directory
+
+from core.assets import Asset, AssetTable
+from core.db import DEFAULT_DB_PATH, ConnectionPool
+from core import license_core, metrics
+from core.license_cache import LicenseCache
+from core.kvcache import KVCache, MISSING
+from core import kvstore
+from core.money import BRL
+from core.pricing import (
+    RESOLVIVEIS, CalcInput, CalcResult, calcular, calcular_lote, calcular_precos, fmt_centavos, resolver,
+)
+from core.quote_pdf import gerar_pdf_bytes, gerar_pdf_simulacao_stream, gerar_pdf_stream
+from core.sweep import SweepErro, varrer
+from core.catalog import Catalogo, CatalogoErro
+from core.export import exportar_zip_stream, pool_compartilhado
+from core.line_items import Item, ItensErro, ItensOrcamento
+from core import audit, quotes, schema
+from core.pricing_batch import LoteErro, calcular_colunas, colunas_de_csv, colunas_de_json, resolver_colunas
+from core.tenants import TenantProfiles
+from core.writer import WriteBehind
 
 # ============================================================
 # APP CONFIG
@@ -21,929 +43,1208 @@ app = Flask(__name__, static_folder=None)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STATIC_DIR = os.path.join(BASE_DIR, 'static')
 
-APP_SECRET = os.environ.get("APP_SECRET", "ARTEPRECO_SUPER_SEGREDO_2026")
+# Segredo das chaves: ver core/license_core.py (APP_SECRET / ARTEPRECO_LICENSE_KEYS).
+# Sem segredo configurado nenhuma chave é aceita (não há segredo padrão).
+APP_SECRET = os.environ.get("APP_SECRET", "")
+if not license_core.KEYS:
+    app.logger.warning("Nenhum segredo de licença configurado (APP_SECRET / ARTEPRECO_LICENSE_KEYS): "
+                       "nenhuma chave será aceita.")
 
 # ============================================================
-# ✅ 0) Rotas de PWA (manifest, service worker, ícones)
-#    (Vercel + Flask às vezes não serve /static sozinho)
+# MÉTRICAS, SERVER-TIMING E PERFIL (core/metrics.py)
 # ============================================================
 
-@app.get("/manifest.webmanifest")
-def manifest_webmanifest():
-    # Preferimos entregar o manifest que está em /static/manifest.json
-    path = os.path.join(STATIC_DIR, "manifest.json")
-    if os.path.exists(path):
-        resp = make_response(send_from_directory(STATIC_DIR, "manifest.json"))
-        resp.headers["Content-Type"] = "application/manifest+json; charset=utf-8"
-        resp.headers["Cache-Control"] = "no-store"
+# Cada request mede as etapas caras (kv, licenca, render, pdf) e devolve os tempos no
+# header Server-Timing (aparece no DevTools). Latência por rota e por etapa vai para
+# /metrics (Prometheus). ARTEPRECO_METRICS_TOKEN, se definido, protege /metrics e o
+# perfil: Authorization: Bearer <token> ou X-ArtePreco-Token: <token>.
+SERVER_TIMING = os.environ.get("ARTEPRECO_SERVER_TIMING", "1") != "0"
+METRICS_TOKEN = os.environ.get("ARTEPRECO_METRICS_TOKEN", "")
+METRICAS = metrics.Metricas()
+
+# Perfil por request (opt-in): com ARTEPRECO_PERFIL=1, um request com ?_perfil=1 ou
+# X-ArtePreco-Perfil: 1 roda com o amostrador de pilhas ligado; a saída colapsada
+# (flamegraph.pl / speedscope) vai para ARTEPRECO_PERFIL_DIR e o nome do arquivo
+# volta no header X-ArtePreco-Perfil.
+PERFIL_ATIVO = os.environ.get("ARTEPRECO_PERFIL", "0") == "1"
+PERFIL_DIR = os.environ.get("ARTEPRECO_PERFIL_DIR") or os.path.join(tempfile.gettempdir(), "artepreco-perfis")
+PERFIL_INTERVALO = float(os.environ.get("ARTEPRECO_PERFIL_INTERVALO_MS", "2")) / 1000
+
+def _token_metricas_ok() -> bool:
+    if not METRICS_TOKEN:
+        return True
+    token = request.headers.get("X-ArtePreco-Token", "")
+    auth = request.headers.get("Authorization", "")
+    if not token and auth[:7].lower() == "bearer ":
+        token = auth[7:].strip()
+    return hmac.compare_digest(token.encode(), METRICS_TOKEN.encode())
+
+def _quer_perfil() -> bool:
+    pedido = request.args.get("_perfil") == "1" or request.headers.get("X-ArtePreco-Perfil") == "1"
+    return pedido and _token_metricas_ok()
+
+def _salvar_perfil(nome: str, amostrador: metrics.Amostrador) -> None:
+    try:
+        os.makedirs(PERFIL_DIR, exist_ok=True)
+        with open(os.path.join(PERFIL_DIR, nome), "w", encoding="utf-8") as f:
+            f.write(amostrador.colapsado())
+    except OSError:
+        pass  # perfil é diagnóstico: nunca derruba o request
+
+@app.before_request
+def _metricas_inicio():
+    g.metricas_t0 = time.perf_counter()
+    g.etapas = metrics.iniciar_request()
+    if PERFIL_ATIVO and _quer_perfil():
+        g.amostrador = metrics.Amostrador(intervalo=PERFIL_INTERVALO).iniciar()
+
+@app.after_request
+def _metricas_fim(resp):
+    t0 = g.get("metricas_t0")
+    if t0 is None:
         return resp
-    # fallback mínimo (caso alguém apague o arquivo)
-    data = {
-        "name": "Arte Preço Pro",
-        "short_name": "ArtePreço",
-        "start_url": "/",
-        "scope": "/",
-        "display": "standalone",
-        "background_color": "#DCE6D5",
-        "theme_color": "#4E683E",
-        "icons": [
-            {"src": "/static/icon-192.png", "sizes": "192x192", "type": "image/png"},
-            {"src": "/static/icon-512.png", "sizes": "512x512", "type": "image/png"},
-        ],
-    }
-    resp = make_response(json.dumps(data, ensure_ascii=False))
-    resp.headers["Content-Type"] = "application/manifest+json; charset=utf-8"
+    etapas = g.etapas
+    if SERVER_TIMING:
+        resp.headers["Server-Timing"] = metrics.server_timing(etapas, time.perf_counter() - t0)
+    rota = request.url_rule.rule if request.url_rule is not None else "(sem rota)"
+    metodo, status = request.method, resp.status_code
+    amostrador = g.pop("amostrador", None)
+    nome_perfil = None
+    if amostrador is not None:
+        nome_perfil = f"{int(time.time() * 1000)}-{metodo}-{rota.strip('/').replace('/', '_') or 'raiz'}.folded"
+        nome_perfil = "".join(c if c.isalnum() or c in "-_." else "_" for c in nome_perfil)
+        resp.headers["X-ArtePreco-Perfil"] = nome_perfil
+
+    def fechar():
+        # Depois de enviar o corpo: a latência inclui respostas em streaming (PDF, CSV)
+        METRICAS.observar_request(rota, metodo, status, time.perf_counter() - t0, etapas)
+        if amostrador is not None:
+            _salvar_perfil(nome_perfil, amostrador.parar())
+
+    resp.call_on_close(fechar)
+    return resp
+
+@app.get("/metrics")
+def metrics_route():
+    if not _token_metricas_ok():
+        return ("", 401, {"WWW-Authenticate": "Bearer"})
+    resp = make_response(METRICAS.prometheus())
+    resp.headers["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8"
     resp.headers["Cache-Control"] = "no-store"
     return resp
 
-@app.get("/sw.js")
-def service_worker():
-    # Entrega o SW que está em /static/sw.js
-    path = os.path.join(STATIC_DIR, "sw.js")
-    if os.path.exists(path):
-        resp = make_response(send_from_directory(STATIC_DIR, "sw.js"))
-        resp.headers["Content-Type"] = "application/javascript; charset=utf-8"
-        resp.headers["Cache-Control"] = "no-store"
-        return resp
+# ============================================================
+# ✅ 0) Rotas de PWA (manifest, service worker, ícones)
+#    (Vercel + Flask às vezes não serve /static sozinho)
+# ============================================================
+
+# Tudo que está em /static é lido UMA vez na subida (core/assets.py): bytes, ETag,
+# gzip/brotli. URLs com ?v=<hash> são imutáveis (cache de 1 ano); sem versão, o
+# navegador revalida com If-None-Match e recebe 304.
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "no-cache"
+
+ASSETS = AssetTable.from_dir(STATIC_DIR)
+
+def _manifest_asset() -> Asset:
+    # Preferimos o manifest que está em /static/manifest.json
+    raw = ASSETS.get("manifest.json")
+    if raw is not None:
+        data = json.loads(raw.data.decode("utf-8"))
+    else:
+        # fallback mínimo (caso alguém apague o arquivo)
+        data = {
+            "name": "Arte Preço Pro",
+            "short_name": "ArtePreço",
+            "start_url": "/",
+            "scope": "/",
+            "display": "standalone",
+            "background_color": "#DCE6D5",
+            "theme_color": "#4E683E",
+            "icons": [
+                {"src": "/static/icon-192.png", "sizes": "192x192", "type": "image/png"},
+                {"src": "/static/icon-512.png", "sizes": "512x512", "type": "image/png"},
+            ],
+        }
+    # ícones com URL versionada (cache longo)
+    for icon in data.get("icons", []):
+        src = icon.get("src", "")
+        if src.startswith("/static/"):
+            icon["src"] = ASSETS.url(src[len("/static/"):])
+    body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    return Asset("manifest.webmanifest", body, "application/manifest+json; charset=utf-8")
+
+# Arquivos que o SW guarda já na instalação (URLs versionadas = cache-first no SW)
+SW_PRECACHE = ("app.css", "app.js", "pricing.js", "icon-192.png", "icon-512.png")
+
+def _sw_asset() -> Asset:
+    # Entrega o SW que está em /static/sw.js, com a versão dos assets "assada" no
+    # nome do cache e a lista de precache — muda qualquer arquivo, muda o SW.
+    sw = ASSETS.get("sw.js")
+    if sw is not None:
+        precache = ["/", manifest_url()] + [ASSETS.url(n) for n in SW_PRECACHE if n in ASSETS]
+        js = sw.data.decode("utf-8")
+        js = js.replace("__ASSET_VERSION__", ASSETS.manifest_hash())
+        js = js.replace("[/*__PRECACHE__*/]", json.dumps(precache))
+        return Asset("sw.js", js.encode("utf-8"))
     # fallback (offline bem simples)
     js = """const CACHE_NAME='artepreco-v1';
 self.addEventListener('install', e => { e.waitUntil(caches.open(CACHE_NAME)); });
 self.addEventListener('fetch', e => { e.respondWith(fetch(e.request).catch(()=>caches.match(e.request))); });
 """
-    resp = make_response(js)
-    resp.headers["Content-Type"] = "application/javascript; charset=utf-8"
-    resp.headers["Cache-Control"] = "no-store"
+    return Asset("sw.js", js.encode("utf-8"))
+
+def asset_url(filename: str) -> str:
+    return ASSETS.url(filename)
+
+def manifest_url() -> str:
+    return f"/manifest.webmanifest?v={MANIFEST_ASSET.hash}"
+
+MANIFEST_ASSET = _manifest_asset()
+SW_ASSET = _sw_asset()
+
+def _send_asset(asset: Asset, cache_control: str):
+    if asset.casa_etag(request.headers.get("If-None-Match", "")):
+        resp = make_response("", 304)
+        _, etag, _ = asset.negociar(request.headers.get("Accept-Encoding", ""))
+    else:
+        body, etag, encoding = asset.negociar(request.headers.get("Accept-Encoding", ""))
+        resp = make_response(body)
+        resp.headers["Content-Type"] = asset.mimetype
+        if encoding:
+            resp.headers["Content-Encoding"] = encoding
+    resp.headers["ETag"] = etag
+    resp.headers["Cache-Control"] = cache_control
+    if asset.variants:
+        resp.headers["Vary"] = "Accept-Encoding"
     return resp
 
+def _cache_por_versao(asset: Asset) -> str:
+    return CACHE_IMUTAVEL if request.args.get("v") == asset.hash else CACHE_REVALIDAR
+
+@app.get("/manifest.webmanifest")
+def manifest_webmanifest():
+    return _send_asset(MANIFEST_ASSET, _cache_por_versao(MANIFEST_ASSET))
+
+@app.get("/sw.js")
+def service_worker():
+    # O SW nunca é imutável: o navegador precisa achar a versão nova (via ETag/304)
+    return _send_asset(SW_ASSET, CACHE_REVALIDAR)
+
 @app.get("/static/<path:filename>")
 def static_files(filename):
     # Serve qualquer arquivo dentro da pasta /static
-    return send_from_directory(STATIC_DIR, filename)
+    asset = ASSETS.get(filename)
+    if asset is None:
+        # arquivo criado depois da subida: disco mesmo
+        return send_from_directory(STATIC_DIR, filename)
+    return _send_asset(asset, _cache_por_versao(asset))
 
 @app.get("/favicon.ico")
 def favicon():
     # Evita erro 404 no console
-    fav = os.path.join(STATIC_DIR, "icon-192.png")
-    if os.path.exists(fav):
-        return send_from_directory(STATIC_DIR, "icon-192.png")
+    fav = ASSETS.get("icon-192.png")
+    if fav is not None:
+        return _send_asset(fav, "public, max-age=86400")
     return ("", 204)
 
+@app.get("/healthz")
+def healthz():
+    status = db_health()
+    status["kv_cache"] = kv_cache_stats()
+    status["license_cache"] = LICENSE_CACHE.stats()
+    status["writer"] = WRITER.stats()
+    status["tenants"] = TENANTS.stats()
+    status["catalogo"] = CATALOGO.stats()
+    resp = make_response(json.dumps(status, ensure_ascii=False), 200 if status.get("ok") else 503)
+    resp.headers["Content-Type"] = "application/json; charset=utf-8"
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
 # ============================================================
 # LICENÇA (CHAVE AP-...)
 # ============================================================
 
-def _b64url(data: bytes) -> str:
-    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("utf-8")
-
-def _b64url_decode(s: str) -> bytes:
-    pad = "=" * ((4 - len(s) % 4) % 4)
-    return base64.urlsafe_b64decode((s + pad).encode("utf-8"))
+# Formato e assinatura ficam em core/license_core.py (v2 binário com kid + chaves antigas)
 
 def gerar_chave(payload: dict) -> str:
-    body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
-    body_b64 = _b64url(body)
-    sig = hmac.new(APP_SECRET.encode("utf-8"), body_b64.encode("utf-8"), hashlib.sha256).digest()
-    sig_b64 = _b64url(sig)
-    return f"AP-{body_b64}.{sig_b64}"
+    return license_core.assinar(payload.get("c", ""), int(payload.get("exp", 0) or 0))
 
-def validar_chave(chave: str) -> Tuple[bool, str, Optional[dict]]:
-    if not chave or not chave.startswith("AP-"):
-        return False, "Formato inválido.", None
+def _validar_chave(chave: str) -> Tuple[bool, str, Optional[dict]]:
+    return license_core.validar_chave(chave)
 
-    try:
-        token = chave[3:]
-        body_b64, sig_b64 = token.split(".", 1)
-        expected_sig = hmac.new(APP_SECRET.encode("utf-8"), body_b64.encode("utf-8"), hashlib.sha256).digest()
-        if _b64url(expected_sig) != sig_b64:
-            return False, "Assinatura inválida.", None
+# Chaves já verificadas ficam em memória (a ativada é lida em quase todo request)
+LICENSE_CACHE = LicenseCache(
+    maxsize=int(os.environ.get("ARTEPRECO_LICENSE_CACHE_SIZE", "1024")),
+    neg_ttl=float(os.environ.get("ARTEPRECO_LICENSE_NEG_TTL", "300")),
+)
 
-        payload = json.loads(_b64url_decode(body_b64).decode("utf-8"))
-        exp = int(payload.get("exp", 0))
-        if exp and time.time() > exp:
-            return False, "Chave expirada.", payload
+@metrics.cronometrado("licenca")
+def validar_chave(chave: str) -> Tuple[bool, str, Optional[dict]]:
+    return LICENSE_CACHE.validar(chave, _validar_chave)
 
-        return True, "OK", payload
-    except Exception as e:
-        return False, f"Erro ao validar chave: {e}", None
+def validar_chaves(chaves: List[str]) -> List[Tuple[bool, str, Optional[dict]]]:
+    # Lote (revenda): sem passar pelo cache, que é para a chave ativada
+    return license_core.validar_chaves(chaves)
 
 # ============================================================
 # PERSISTÊNCIA (DB simples) + CONFIG DA EMPRESA
 # ============================================================
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "artepreco.db")
-
-def db_conn():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+DB_PATH = DEFAULT_DB_PATH  # artepreco.db ao lado deste arquivo (ARTEPRECO_DB troca)
+
+# Pool: uma conexão por thread/worker (WAL + pragmas), reaproveitada entre requests.
+DB_POOL = ConnectionPool(DB_PATH)
+
+# Escritas (kv, orçamentos, auditoria) vão para uma thread em segundo plano que grava
+# em lotes numa transação só (core/writer.py): o request não espera o commit.
+# ARTEPRECO_WRITE_BEHIND=0 grava na hora (ex.: serverless, onde a thread pode congelar).
+WRITER = WriteBehind(
+    DB_POOL,
+    max_lote=int(os.environ.get("ARTEPRECO_WRITE_LOTE", "500")),
+    max_atraso_ms=float(os.environ.get("ARTEPRECO_WRITE_ATRASO_MS", "20")),
+    max_fila=int(os.environ.get("ARTEPRECO_WRITE_FILA", "10000")),
+    sincrono=os.environ.get("ARTEPRECO_WRITE_BEHIND", "1") == "0",
+    espera=float(os.environ.get("ARTEPRECO_WRITE_ESPERA_S", "30")),
+)
+atexit.register(WRITER.close)
+
+@app.errorhandler(queue.Full)
+@app.errorhandler(TimeoutError)
+def _erro_writer(e):
+    # Fila de escrita cheia ou commit demorando mais que WRITER.espera: o request não
+    # fica preso; quem chamou tenta de novo
+    app.logger.warning("writer: %s", type(e).__name__)
+    return _json_resp({"erro": "Banco ocupado. Tente de novo em instantes."}, 503)
+
+# Tabela kv (chave ativada, dados da empresa): backend escolhido por ARTEPRECO_KV_URL
+# (core/kvstore.py) — sqlite:// (padrão), memory:// ou redis://host:porta/db para
+# vários workers/instâncias compartilharem os mesmos dados. Com redis://, a gravação
+# de outro worker aparece aqui em até ?sync_ms= (padrão 1000 ms).
+KV_URL = os.environ.get("ARTEPRECO_KV_URL", "sqlite://")
+KV_STORE = kvstore.abrir(KV_URL, pool=DB_POOL, writer=WRITER)
+atexit.register(KV_STORE.close)
+
+def db_conn() -> sqlite3.Connection:
+    # Conexão do pool — NÃO feche; ela é reaproveitada pela thread.
+    return DB_POOL.get()
 
 def db_init():
+    KV_STORE.init()
     conn = db_conn()
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS kv (
-            k TEXT PRIMARY KEY,
-            v TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-db_init()
-
+    quotes.init_schema(conn)
+    audit.init_schema(conn)
+
+# Subida: tabelas e caches são preparados por iniciar(), NÃO ao importar o módulo.
+# Os filhos do pool de PDF (forkserver/spawn, core/export.py) importam o __main__ de
+# novo (python app_web.py); se a subida rodasse no import, cada filho mexeria no banco.
+# Com gunicorn/Vercel (app_web:app) ela roda no primeiro request de cada processo.
+_INICIADO = False
+_INICIO_LOCK = threading.Lock()
+
+def iniciar() -> None:
+    global _INICIADO
+    if _INICIADO:
+        return
+    with _INICIO_LOCK:
+        if _INICIADO:
+            return
+        db_init()
+        TENANTS.init()
+        CATALOGO.init()
+        _INICIADO = True
+
+@app.before_request
+def _iniciar_no_primeiro_request():
+    iniciar()
+
+def db_health() -> dict:
+    status = DB_POOL.health()
+    if not KV_URL.startswith("sqlite:"):
+        status["kv_store"] = KV_STORE.health()
+        status["ok"] = status["ok"] and status["kv_store"]["ok"]
+    return status
+
+# Cache em memória na frente do kv (KV_ACTIVATED / KV_COMPANY_JSON são lidos em quase
+# toda tela). KV_STORE.versao() avisa quando OUTRO processo gravou (conferido no máximo
+# a cada sync_ms de ARTEPRECO_KV_URL, ver core/kvstore.py).
+KV_CACHE = KVCache(
+    maxsize=int(os.environ.get("ARTEPRECO_KV_CACHE_SIZE", "256")),
+    ttl=float(os.environ.get("ARTEPRECO_KV_CACHE_TTL", "60")),
+)
+
+def _kv_sync() -> None:
+    token, version = KV_STORE.versao()
+    KV_CACHE.sync(token, version)
+
+@metrics.cronometrado("kv")
 def kv_get(k: str, default: str = "") -> str:
-    conn = db_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT v FROM kv WHERE k=?", (k,))
-    row = cur.fetchone()
-    conn.close()
-    return (row["v"] if row else default)
+    _kv_sync()
+    v, hit = KV_CACHE.get(k)
+    if hit:
+        return default if v is MISSING else v
+    epoch = KV_CACHE.epoch()
+    v = KV_STORE.get(k)
+    v = MISSING if v is None else v
+    KV_CACHE.put(k, v, epoch=epoch)
+    return default if v is MISSING else v
 
 def kv_set(k: str, v: str) -> None:
-    conn = db_conn()
-    cur = conn.cursor()
-    cur.execute("INSERT INTO kv(k,v) VALUES(?,?) ON CONFLICT(k) DO UPDATE SET v=excluded.v", (k, v))
-    conn.commit()
-    conn.close()
+    # A própria escrita não invalida o cache inteiro: só a chave gravada muda
+    KV_STORE.set(k, v, gravado=KV_CACHE.avancar)
+    KV_CACHE.set(k, v)
+
+def kv_cache_stats() -> dict:
+    return KV_CACHE.stats()
 
 # chaves
 KV_ACTIVATED = "activated_key"
 KV_COMPANY_JSON = "company_json"
 
 # ============================================================
-# REGRAS DE CÁLCULO
+# ESTÚDIOS (multi-tenant): licença do request -> perfil da empresa
 # ============================================================
 
-@dataclass
-class CalcInput:
-    produto: str
-    custo_material: float
-    horas_trabalhadas: float
-    valor_hora: float
-    despesas_extras: float
-    margem_lucro_pct: float
-    validade_dias: int
-
-@dataclass
-class CalcResult:
-    custo_base: float
-    preco_final: float
-    preco_final_fmt: str
-    custo_base_fmt: str
-
-def _fmt_brl(v: float) -> str:
-    s = f"{v:,.2f}"
-    s = s.replace(",", "X").replace(".", ",").replace("X", ".")
-    return f"R$ {s}"
-
-def calcular_preco(ci: CalcInput) -> CalcResult:
-    custo_trabalho = max(ci.horas_trabalhadas, 0) * max(ci.valor_hora, 0)
-    custo_base = max(ci.custo_material, 0) + max(ci.despesas_extras, 0) + custo_trabalho
-    mult = 1.0 + (max(ci.margem_lucro_pct, 0) / 100.0)
-    preco_final = custo_base * mult
-    return CalcResult(
-        custo_base=custo_base,
-        preco_final=preco_final,
-        preco_final_fmt=_fmt_brl(preco_final),
-        custo_base_fmt=_fmt_brl(custo_base),
-    )
+# Cada request pode trazer a própria chave (Authorization: Bearer AP-..., header
+# X-ArtePreco-Chave ou cookie ap_chave); sem isso vale a chave ativada neste servidor.
+# O tenant é o cliente da licença (payload["c"]); o perfil da empresa de cada um fica
+# em company_profiles, com cache LRU por tenant na frente (core/tenants.py).
+
+def _chave_request() -> str:
+    auth = request.headers.get("Authorization", "")
+    if auth[:7].lower() == "bearer ":
+        return auth[7:].strip()
+    return request.headers.get("X-ArtePreco-Chave") or request.cookies.get("ap_chave") or kv_get(KV_ACTIVATED)
+
+def _licenca() -> Optional[dict]:
+    # Uma validação por request (o resultado fica em flask.g). Licença sem cliente não
+    # identifica estúdio nenhum: vale como não ativada.
+    if "licenca" not in g:
+        ok, _msg, payload = validar_chave(_chave_request())
+        g.licenca = payload if ok and payload.get("c") else None
+    return g.licenca
+
+def _tenant() -> str:
+    lic = _licenca()
+    return lic.get("c", "") if lic else ""
+
+def _empresa_legada(tenant: str) -> dict:
+    # Antes do multi-estúdio havia UMA empresa no kv: ela continua valendo para o
+    # dono da chave ativada neste servidor até ele salvar o perfil novo.
+    ok, _msg, payload = validar_chave(kv_get(KV_ACTIVATED))
+    if not ok or not tenant or payload.get("c", "") != tenant:
+        return {}
+    try:
+        return json.loads(kv_get(KV_COMPANY_JSON) or "{}")
+    except ValueError:
+        return {}
+
+TENANTS = TenantProfiles(
+    DB_POOL,
+    WRITER,
+    padrao=_empresa_legada,
+    maxsize=int(os.environ.get("ARTEPRECO_TENANT_CACHE_SIZE", "10000")),
+    ttl=float(os.environ.get("ARTEPRECO_TENANT_CACHE_TTL", "300")),
+    sync_ms=float(os.environ.get("ARTEPRECO_TENANT_SYNC_MS", "100")),
+)
+
+def _empresa() -> dict:
+    # Perfil do estúdio do request (dict do cache: não altere)
+    return TENANTS.get(_tenant())
+
+# Preço: motor único em core/pricing.py (CalcInput, CalcResult, calcular, calcular_precos)
 
 # ============================================================
 # PDF (GERAÇÃO SIMPLES)
 # ============================================================
 
-def gerar_pdf_bytes(dados_empresa: dict, dados_cliente: dict, ci: CalcInput, cr: CalcResult) -> bytes:
-    # PDF simples via texto (sem lib externa) — funciona bem na Vercel
-    # Estrutura minimalista PDF (ok para uso)
-    # Observação: NÃO mostramos margem no PDF (como você pediu).
-    now = datetime.now().strftime("%d/%m/%Y %H:%M")
-
-    empresa_nome = dados_empresa.get("nome", "").strip()
-    empresa_tel = dados_empresa.get("telefone", "").strip()
-    empresa_email = dados_empresa.get("email", "").strip()
-    empresa_end = dados_empresa.get("endereco", "").strip()
-
-    cliente_nome = dados_cliente.get("nome", "").strip()
-    cliente_tel = dados_cliente.get("telefone", "").strip()
-    cliente_email = dados_cliente.get("email", "").strip()
-    cliente_end = dados_cliente.get("endereco", "").strip()
-
-    lines = []
-    lines.append("ORCAMENTO - ARTE PRECO PRO")
-    lines.append("")
-    lines.append(f"Data: {now}")
-    lines.append("")
-    lines.append("DADOS DA EMPRESA")
-    lines.append(f"Nome: {empresa_nome}")
-    lines.append(f"Telefone: {empresa_tel}")
-    lines.append(f"E-mail: {empresa_email}")
-    lines.append(f"Endereço: {empresa_end}")
-    lines.append("")
-    lines.append("DADOS DO CLIENTE")
-    lines.append(f"Nome: {cliente_nome}")
-    lines.append(f"Telefone: {cliente_tel}")
-    lines.append(f"E-mail: {cliente_email}")
-    lines.append(f"Endereço: {cliente_end}")
-    lines.append("")
-    lines.append("DETALHES DO SERVIÇO")
-    lines.append(f"Produto/Serviço: {ci.produto}")
-    lines.append(f"Custo material: {_fmt_brl(ci.custo_material)}")
-    lines.append(f"Trabalho: {ci.horas_trabalhadas:g}h x {_fmt_brl(ci.valor_hora)}")
-    lines.append(f"Despesas extras: {_fmt_brl(ci.despesas_extras)}")
-    lines.append("")
-    lines.append(f"Custo Base: {cr.custo_base_fmt}")
-    lines.append(f"Preco Final: {cr.preco_final_fmt}")
-    lines.append(f"Validade: {ci.validade_dias} dia(s)")
-    text = "\n".join(lines)
-
-    # PDF básico (texto)
-    # monta um PDF simples com fonte padrão
-    def pdf_escape(s: str) -> str:
-        return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
-
-    content_stream = "BT\n/F1 14 Tf\n50 760 Td\n"
-    y = 0
-    for line in text.split("\n"):
-        if y != 0:
-            content_stream += "0 -18 Td\n"
-        content_stream += f"({pdf_escape(line)}) Tj\n"
-        y += 1
-    content_stream += "ET\n"
-    content_bytes = content_stream.encode("latin-1", errors="ignore")
-
-    objects = []
-    offsets = []
-
-    def add_obj(s: bytes):
-        offsets.append(sum(len(o) for o in objects))
-        objects.append(s)
-
-    # PDF header
-    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
-    objects.append(header)
-
-    # 1) catalog
-    add_obj(b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n")
-    # 2) pages
-    add_obj(b"2 0 obj\n<< /Type /Pages /Kids [3 0 R] /Count 1 >>\nendobj\n")
-    # 3) page
-    add_obj(b"3 0 obj\n<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>\nendobj\n")
-    # 4) font
-    add_obj(b"4 0 obj\n<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>\nendobj\n")
-    # 5) contents
-    add_obj(f"5 0 obj\n<< /Length {len(content_bytes)} >>\nstream\n".encode("utf-8") + content_bytes + b"\nendstream\nendobj\n")
-
-    # xref
-    xref_start = sum(len(o) for o in objects)
-    # compute real offsets (including header)
-    # rebuild xref offsets by scanning objects is complex; we used running offsets list
-    # Let's compute actual offsets by re-walking
-    full = b"".join(objects)
-    # But we need xref entries; easiest: compute by finding "1 0 obj" etc offsets
-    # We'll do a simple find
-    def find_offset(marker: bytes) -> int:
-        return full.find(marker)
-
-    off1 = find_offset(b"1 0 obj")
-    off2 = find_offset(b"2 0 obj")
-    off3 = find_offset(b"3 0 obj")
-    off4 = find_offset(b"4 0 obj")
-    off5 = find_offset(b"5 0 obj")
-
-    xref = "xref\n0 6\n0000000000 65535 f \n".encode("utf-8")
-    for off in [off1, off2, off3, off4, off5]:
-        xref += f"{off:010d} 00000 n \n".encode("utf-8")
-
-    trailer = f"trailer\n<< /Size 6 /Root 1 0 R >>\nstartxref\n{xref_start}\n%%EOF\n".encode("utf-8")
-
-    return full + xref + trailer
+# Layout do orçamento + esqueleto em cache ficam em core/quote_pdf.py
+# (gerar_pdf_bytes, gerar_pdf_stream), para rodar também fora do Flask (exportação em lote).
+
+def _pdf_stream(*args, **kwargs):
+    # PDF em pedaços, com o tempo de geração na etapa "pdf" do /metrics
+    return metrics.cronometrar_iter("pdf", gerar_pdf_stream(*args, **kwargs))
 
 # ============================================================
 # TELAS + FLUXO
 # ============================================================
 
-INDEX_HTML = r"""
-<!DOCTYPE html>
-<html lang="pt-BR">
-<head>
-  <meta charset="UTF-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-  <title>Arte Preço Pro</title>
-  <link rel="manifest" href="/manifest.webmanifest" />
-  <meta name="theme-color" content="#4E683E" />
-  <link rel="icon" href="/static/icon-192.png" />
-  <link rel="apple-touch-icon" href="/static/icon-192.png" />
-  <style>
-    :root{
-      --bg:#DCE6D5;
-      --card:#EAF1E6;
-      --dark:#4E683E;
-      --dark2:#3B5330;
-      --txt:#1a1a1a;
-      --muted:#444;
-      --radius:18px;
-    }
-    body{
-      margin:0;
-      font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif;
-      background:var(--bg);
-      color:var(--txt);
-    }
-    .wrap{
-      max-width:760px;
-      margin:0 auto;
-      padding:18px;
-    }
-    .card{
-      background:var(--card);
-      border-radius:var(--radius);
-      padding:18px;
-      box-shadow:0 4px 16px rgba(0,0,0,.08);
-      margin-bottom:18px;
-    }
-    h1{
-      margin:0 0 10px 0;
-      font-size:28px;
-      letter-spacing:.3px;
-    }
-    h2{
-      margin:0 0 10px 0;
-      font-size:18px;
-      color:var(--dark2);
-    }
-    .row{
-      display:flex;
-      gap:12px;
-      flex-wrap:wrap;
-    }
-    .col{
-      flex:1;
-      min-width:220px;
-    }
-    label{
-      display:block;
-      font-weight:700;
-      margin:10px 0 6px;
-      color:var(--muted);
-    }
-    input{
-      width:100%;
-      box-sizing:border-box;
-      border:1px solid rgba(0,0,0,.12);
-      border-radius:14px;
-      padding:12px 12px;
-      font-size:16px;
-      outline:none;
-      background:#fff;
-    }
-    input:focus{
-      border-color:rgba(78,104,62,.45);
-      box-shadow:0 0 0 3px rgba(78,104,62,.15);
-    }
-    .btn{
-      width:100%;
-      border:0;
-      padding:14px 14px;
-      font-size:18px;
-      font-weight:800;
-      border-radius:14px;
-      cursor:pointer;
-      background:var(--dark);
-      color:#fff;
-      margin-top:14px;
-    }
-    .btn:active{ transform: translateY(1px); }
-    .btn.secondary{
-      background:#6b6b6b;
-    }
-    .btn.outline{
-      background:transparent;
-      color:var(--dark);
-      border:2px solid var(--dark);
-    }
-    .small{
-      font-size:14px;
-      color:#333;
-      margin-top:6px;
-    }
-    .result{
-      margin-top:18px;
-      padding:14px;
-      background:#fff;
-      border-radius:16px;
-      border:1px solid rgba(0,0,0,.10);
-    }
-    .big{
-      font-size:34px;
-      font-weight:900;
-      color:#000;
-      margin-top:4px;
-    }
-    .muted{
-      color:#444;
-      font-size:15px;
-    }
-    .warn{
-      margin-top:10px;
-      color:#7a4b00;
-      font-weight:700;
-    }
-    .footer-actions{
-      display:flex;
-      gap:12px;
-      margin-top:14px;
-      flex-wrap:wrap;
-    }
-    .footer-actions .btn{
-      flex:1;
-      min-width:220px;
-      margin-top:0;
-    }
-  </style>
-  <script>
-    // Registra o Service Worker (para instalação/offline)
-    if ('serviceWorker' in navigator) {
-      window.addEventListener('load', () => {
-        navigator.serviceWorker.register('/sw.js').catch(()=>{});
-      });
+# Página principal: templates/index.html, compilado UMA vez na subida (não a cada
+# request). CSS/JS ficam em /static com a versão (hash do conteúdo) na URL, então o
+# navegador guarda por 1 ano e só baixa de novo quando o arquivo muda.
+
+app.jinja_env.globals["asset_url"] = asset_url
+app.jinja_env.globals["manifest_url"] = manifest_url
+INDEX_TEMPLATE = app.jinja_env.get_template("index.html")
+
+@metrics.cronometrado("render")
+def render_index(activated: bool, msg: str = "", form: Optional[dict] = None, result: Optional[dict] = None,
+                 empresa: Optional[dict] = None) -> str:
+    if empresa is None and activated:
+        empresa = _empresa()
+    return INDEX_TEMPLATE.render(activated=activated, msg=msg, form=form or {}, result=result, empresa=empresa or {})
+
+EMPRESA_TEMPLATE = app.jinja_env.get_template("empresa.html")
+
+# A chave ativada pelo navegador fica no cookie ap_chave (ver _chave_request): cada
+# aparelho entra no próprio estúdio, sem mexer na chave ativada do servidor.
+COOKIE_MAX_AGE = 365 * 24 * 3600
+
+def _form_numero(v: str):
+    # "1.234,56" / "1234,56" / "1234.56" -> float (int para validade_dias)
+    v = (v or "").strip()
+    if not v:
+        return None
+    if "," in v:
+        v = v.replace(".", "").replace(",", ".")
+    return float(v)
+
+def _form_preco(form) -> Tuple[Optional[dict], List[str]]:
+    data, erros = {}, []
+    for nome, campo in schema.PRECO.items():
+        v = (form.get(nome) or "").strip()
+        if campo.tipo is str:
+            data[nome] = v
+            continue
+        try:
+            n = _form_numero(v)
+        except ValueError:
+            erros.append(f"{nome}: número esperado")
+            continue
+        if campo.tipo is int and n is not None:
+            n = int(n) if n.is_integer() else n
+        data[nome] = n
+    if erros:
+        return None, erros
+    return schema.validar(schema.PRECO, data)
+
+@app.get("/")
+def index():
+    return render_index(_ativado())
+
+@app.post("/ativar")
+def ativar():
+    chave = (request.form.get("chave") or "").strip()
+    ok, msg, payload = validar_chave(chave)
+    if not ok or not payload.get("c"):
+        return render_index(False, msg=msg if not ok else "Chave sem estúdio (cliente).")
+    audit.registrar(WRITER, "ativacao", payload["c"])
+    resp = redirect("/")
+    resp.set_cookie("ap_chave", chave, max_age=COOKIE_MAX_AGE, httponly=True, samesite="Lax",
+                    secure=request.is_secure)
+    return resp
+
+@app.post("/revalidar")
+def revalidar():
+    # Refaz a validação sem o memo (ex.: chave renovada ou segredo trocado no servidor)
+    chave = _chave_request()
+    LICENSE_CACHE.descartar(chave)
+    g.pop("licenca", None)
+    ok, msg, _payload = validar_chave(chave)
+    if not ok:
+        return render_index(False, msg=msg)
+    return redirect("/")
+
+@app.post("/sair")
+def sair():
+    resp = redirect("/")
+    resp.delete_cookie("ap_chave", samesite="Lax", secure=request.is_secure)
+    return resp
+
+@app.post("/calcular")
+def calcular():
+    if not _ativado():
+        return redirect("/")
+    form = request.form.to_dict()
+    d, erros = _form_preco(request.form)
+    if erros:
+        return render_index(True, msg="; ".join(erros), form=form)
+    cliente = {"nome": (request.form.get("cliente") or "").strip()[:200]}
+    ci = _api_calc_input(d)
+    cr = calcular_precos([ci])[0]
+    quote_id = _salvar_orcamentos([(ci, cr, cliente)]).result(WRITER.espera)[0]
+    result = {
+        "id": quote_id,
+        "produto": ci.produto,
+        "custo_base_fmt": cr.custo_base_fmt,
+        "preco_final_fmt": cr.preco_final_fmt,
+        "validade_dias": ci.validade_dias,
     }
-  </script>
-</head>
-<body>
-  <div class="wrap">
-    {% if not activated %}
-      <div class="card">
-        <h1>Ativação do Arte Preço Pro</h1>
-        <div class="small">Cole a chave AP-... (uma vez). O app lembra automaticamente.</div>
-        <form method="POST" action="/ativar">
-          <label>Chave</label>
-          <input name="chave" placeholder="Cole sua chave AP-..." required />
-          <button class="btn" type="submit">Ativar</button>
-        </form>
-        {% if msg %}
-          <div class="warn">{{msg}}</div>
-        {% endif %}
-      </div>
-    {% else %}
-      <div class="card">
-        <h1>Arte Preço Pro</h1>
-        <div class="small">Preencha e clique em <b>Calcular</b>. Depois gere o PDF.</div>
-
-        <form method="POST" action="/calcular">
-          <label>Produto</label>
-          <input name="produto" value="{{form.produto}}" placeholder="Ex: Logo" required />
-
-          <label>Custo do Material (R$)</label>
-          <input name="custo_material" value="{{form.custo_material}}" placeholder="Ex: 10" inputmode="decimal" required />
-
-          <div class="row">
-            <div class="col">
-              <label>Horas Trabalhadas</label>
-              <input name="horas_trabalhadas" value="{{form.horas_trabalhadas}}" placeholder="Ex: 4" inputmode="decimal" required />
-            </div>
-            <div class="col">
-              <label>Valor da Hora (R$)</label>
-              <input name="valor_hora" value="{{form.valor_hora}}" placeholder="Ex: 30" inputmode="decimal" required />
-            </div>
-          </div>
-
-          <label>Despesas Extras (R$)</label>
-          <input name="despesas_extras" value="{{form.despesas_extras}}" placeholder="Ex: 2" inputmode="decimal" required />
-
-          <label>Margem de Lucro (%)</label>
-          <input name="margem_lucro_pct" value="{{form.margem_lucro_pct}}" placeholder="Ex: 80" inputmode="decimal" required />
-
-          <label>Validade (dias)</label>
-          <input name="validade_dias" value="{{form.validade_dias}}" placeholder="Ex: 7" inputmode="numeric" required />
-
-          <button class="btn" type="submit">Calcular</button>
-        </form>
-
-        {% if result %}
-          <div class="result">
-            <div><b>Produto:</b> {{result.produto}}</div>
-            <div><b>Custo Base:</b> {{result.custo_base_fmt}}</div>
-            <div class="big">Preço Final: {{result.preco_final_fmt}}</div>
-            <div class="muted">Validade: {{result.validade_dias}} dia(s)</div>
-
-            <div class="footer-actions">
-              <form method="GET" action="/pdf" style="flex:1;">
-                <button class="btn outline" type="submit">Gerar PDF</button>
-              </form>
-
-              <form method="GET" action="/empresa" style="flex:1;">
-                <button class="btn outline" type="submit">Dados da empresa</button>
-              </form>
-
-              <form method="GET" action="/cliente" style="flex:1;">
-                <button class="btn outline" type="submit">Dados do cliente</button>
-              </form>
-            </div>
-          </div>
-        {% endif %}
-      </div>
-
-      <div class="card">
-        <div class="footer-actions">
-          <form method="POST" action="/sair" style="flex:1;">
-            <button class="btn secondary" type="submit">Sair</button>
-          </form>
-          <form method="POST" action="/revalidar" style="flex:1;">
-            <button class="btn" type="submit">Revalidar chave</button>
-          </form>
-        </div>
-      </div>
-    {% endif %}
-  </div>
-</body>
-</html>
-"""
+    return render_index(True, form=form, result=result)
+
+@app.route("/empresa", methods=["GET", "POST"])
+def empresa_route():
+    if not _ativado():
+        return redirect("/")
+    if request.method == "GET":
+        with metrics.Etapa("render"):
+            return EMPRESA_TEMPLATE.render(empresa=_empresa(), msg="")
+    dados = {k: (request.form.get(k) or "").strip() for k in schema.CONTATO}
+    d, erros = schema.validar(schema.CONTATO, dados)
+    if erros:
+        with metrics.Etapa("render"):
+            return EMPRESA_TEMPLATE.render(empresa=dados, msg="; ".join(erros))
+    TENANTS.set(_tenant(), d)
+    return redirect("/")
 
 # ============================================================
-# REGRAS DE CÁLCULO
+# CÁLCULO EM LOTE (catálogos inteiros)
 # ============================================================
 
-@dataclass
-class CalcInput:
-    produto: str
-    custo_material: float
-    horas_trabalhadas: float
-    valor_hora: float
-    despesas_extras: float
-    margem_lucro_pct: float
-    validade_dias: int
-
-@dataclass
-class CalcResult:
-    custo_base: float
-    preco_final: float
-    preco_final_fmt: str
-    custo_base_fmt: str
-
-def _fmt_brl(v: float) -> str:
-    s = f"{v:,.2f}"
-    s = s.replace(",", "X").replace(".", ",").replace("X", ".")
-    return f"R$ {s}"
-
-def calcular_preco(ci: CalcInput) -> CalcResult:
-    custo_trabalho = max(ci.horas_trabalhadas, 0) * max(ci.valor_hora, 0)
-    custo_base = max(ci.custo_material, 0) + max(ci.despesas_extras, 0) + custo_trabalho
-    mult = 1.0 + (max(ci.margem_lucro_pct, 0) / 100.0)
-    preco_final = custo_base * mult
-    return CalcResult(
-        custo_base=custo_base,
-        preco_final=preco_final,
-        preco_final_fmt=_fmt_brl(preco_final),
-        custo_base_fmt=_fmt_brl(custo_base),
+LOTE_MAX_ITENS = int(os.environ.get("ARTEPRECO_LOTE_MAX", "1000000"))
+PDF_LOTE_MAX_ITENS = int(os.environ.get("ARTEPRECO_PDF_LOTE_MAX", "5000"))
+# /pdf/lote: todos os requests dividem um pool de processos (core/export.py); além de
+# PDF_LOTE_SIMULTANEOS exportações ao mesmo tempo, o request recebe 503
+PDF_LOTE_WORKERS = int(os.environ.get("ARTEPRECO_PDF_LOTE_WORKERS", str(os.cpu_count() or 1)))
+PDF_LOTE_SIMULTANEOS = threading.BoundedSemaphore(int(os.environ.get("ARTEPRECO_PDF_LOTE_SIMULTANEOS", "2")))
+
+def _ativado() -> bool:
+    return _licenca() is not None
+
+def _lote_csv(cols: dict, custo_base, preco_final, bloco: int = 1000):
+    yield "produto;custo_base;preco_final;custo_base_fmt;preco_final_fmt\n"
+    produtos = cols["produto"]
+    for i in range(0, len(produtos), bloco):
+        # Um bloco por vez, com os valores formatados em lote (BRL.format_many)
+        cbs = list(map(int, custo_base[i:i + bloco]))
+        pfs = list(map(int, preco_final[i:i + bloco]))
+        buf = []
+        for produto, cb, pf, cb_fmt, pf_fmt in zip(
+            produtos[i:i + bloco], cbs, pfs, BRL.format_many(cbs, centavos=True), BRL.format_many(pfs, centavos=True),
+        ):
+            produto = produto.replace('"', '""')
+            buf.append(f'"{produto}";{cb // 100}.{cb % 100:02d};{pf // 100}.{pf % 100:02d};{cb_fmt};{pf_fmt}\n')
+        yield "".join(buf)
+
+@app.post("/calcular/lote")
+def calcular_lote_route():
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+
+    try:
+        if request.mimetype == "text/csv":
+            cols = colunas_de_csv(request.get_data(as_text=True), LOTE_MAX_ITENS)
+        else:
+            data = request.get_json(silent=True)
+            if data is None:
+                return _json_resp({"erro": "Envie JSON ou text/csv."}, 415)
+            cols = colunas_de_json(data, LOTE_MAX_ITENS)
+        custo_base, preco_final = calcular_colunas(cols)
+    except ValueError as e:  # inclui LoteErro
+        return _json_resp({"erro": str(e)}, 400)
+
+    quer_csv = request.args.get("formato") == "csv" or (
+        request.accept_mimetypes.best_match(["application/json", "text/csv"]) == "text/csv"
     )
+    if quer_csv:
+        resp = app.response_class(_lote_csv(cols, custo_base, preco_final), mimetype="text/csv")
+        resp.headers["Content-Disposition"] = 'attachment; filename="precos.csv"'
+        return resp
 
-# ============================================================
-# PDF (GERAÇÃO SIMPLES)
-# ============================================================
+    cbs, pfs = list(map(int, custo_base)), list(map(int, preco_final))
+    itens = [
+        {
+            "produto": produto,
+            "custo_base": cb / 100,
+            "preco_final": pf / 100,
+            "custo_base_fmt": cb_fmt,
+            "preco_final_fmt": pf_fmt,
+            "validade_dias": vd,
+        }
+        for produto, cb, pf, cb_fmt, pf_fmt, vd in zip(
+            cols["produto"], cbs, pfs, BRL.format_many(cbs, centavos=True), BRL.format_many(pfs, centavos=True),
+            cols["validade_dias"],
+        )
+    ]
+    return _json_resp({"total": len(itens), "itens": itens})
+
+@app.post("/pdf/lote")
+def pdf_lote_route():
+    # Reemissão em massa: {"itens": [{produto, custo_material, ..., cliente?, empresa?}, ...]}
+    # -> ZIP com um PDF por item, gerado em paralelo e enviado conforme fica pronto.
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+
+    data = request.get_json(silent=True)
+    itens = data.get("itens") if isinstance(data, dict) else data
+    if not isinstance(itens, list) or not itens:
+        return _json_resp({"erro": "Envie uma lista em 'itens'."}, 400)
+    if len(itens) > PDF_LOTE_MAX_ITENS:
+        return _json_resp({"erro": f"Máximo de {PDF_LOTE_MAX_ITENS} itens por lote."}, 400)
+
+    logger = app.logger
+
+    def progresso(feitos, total, n_erros):
+        if feitos == total or feitos % 50 == 0:
+            logger.info("pdf/lote: %d/%d PDFs (%d erro(s))", feitos, total, n_erros)
+
+    if not PDF_LOTE_SIMULTANEOS.acquire(blocking=False):
+        resp = _json_resp({"erro": "Muitas exportações em andamento. Tente de novo em instantes."}, 503)
+        resp.headers["Retry-After"] = "5"
+        return resp
+    try:
+        audit.registrar(WRITER, "pdf_lote", str(len(itens)))
+        pool = pool_compartilhado(PDF_LOTE_WORKERS) if PDF_LOTE_WORKERS > 1 else None
+        resp = app.response_class(
+            metrics.cronometrar_iter("pdf", exportar_zip_stream(
+                itens, empresa_padrao=_empresa(), workers=PDF_LOTE_WORKERS, progresso=progresso, pool=pool,
+            )),
+            mimetype="application/zip",
+        )
+    except BaseException:
+        PDF_LOTE_SIMULTANEOS.release()
+        raise
+    # A vaga só é devolvida quando o ZIP termina de ser enviado (ou o cliente desiste)
+    resp.call_on_close(PDF_LOTE_SIMULTANEOS.release)
+    resp.headers["Content-Disposition"] = 'attachment; filename="orcamentos.zip"'
+    return resp
 
-def gerar_pdf_bytes(dados_empresa: dict, dados_cliente: dict, ci: CalcInput, cr: CalcResult) -> bytes:
-    # PDF simples via texto (sem lib externa) — funciona bem na Vercel
-    # Estrutura minimalista PDF (ok para uso)
-    # Observação: NÃO mostramos margem no PDF (como você pediu).
-    now = datetime.now().strftime("%d/%m/%Y %H:%M")
-
-    empresa_nome = dados_empresa.get("nome", "").strip()
-    empresa_tel = dados_empresa.get("telefone", "").strip()
-    empresa_email = dados_empresa.get("email", "").strip()
-    empresa_end = dados_empresa.get("endereco", "").strip()
-
-    cliente_nome = dados_cliente.get("nome", "").strip()
-    cliente_tel = dados_cliente.get("telefone", "").strip()
-    cliente_email = dados_cliente.get("email", "").strip()
-    cliente_end = dados_cliente.get("endereco", "").strip()
-
-    lines = []
-    lines.append("ORCAMENTO - ARTE PRECO PRO")
-    lines.append("")
-    lines.append(f"Data: {now}")
-    lines.append("")
-    lines.append("DADOS DA EMPRESA")
-    lines.append(f"Nome: {empresa_nome}")
-    lines.append(f"Telefone: {empresa_tel}")
-    lines.append(f"E-mail: {empresa_email}")
-    lines.append(f"Endereço: {empresa_end}")
-    lines.append("")
-    lines.append("DADOS DO CLIENTE")
-    lines.append(f"Nome: {cliente_nome}")
-    lines.append(f"Telefone: {cliente_tel}")
-    lines.append(f"E-mail: {cliente_email}")
-    lines.append(f"Endereço: {cliente_end}")
-    lines.append("")
-    lines.append("DETALHES DO SERVIÇO")
-    lines.append(f"Produto/Serviço: {ci.produto}")
-    lines.append(f"Custo material: {_fmt_brl(ci.custo_material)}")
-    lines.append(f"Trabalho: {ci.horas_trabalhadas:g}h x {_fmt_brl(ci.valor_hora)}")
-    lines.append(f"Despesas extras: {_fmt_brl(ci.despesas_extras)}")
-    lines.append("")
-    lines.append(f"Custo Base: {cr.custo_base_fmt}")
-    lines.append(f"Preco Final: {cr.preco_final_fmt}")
-    lines.append(f"Validade: {ci.validade_dias} dia(s)")
-    text = "\n".join(lines)
-
-    # PDF básico (texto)
-    # monta um PDF simples com fonte padrão
-    def pdf_escape(s: str) -> str:
-        return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
-
-    content_stream = "BT\n/F1 14 Tf\n50 760 Td\n"
-    y = 0
-    for line in text.split("\n"):
-        if y != 0:
-            content_stream += "0 -18 Td\n"
-        content_stream += f"({pdf_escape(line)}) Tj\n"
-        y += 1
-    content_stream += "ET\n"
-    content_bytes = content_stream.encode("latin-1", errors="ignore")
-
-    objects = []
-    offsets = []
-
-    def add_obj(s: bytes):
-        offsets.append(sum(len(o) for o in objects))
-        objects.append(s)
-
-    # PDF header
-    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
-    objects.append(header)
-
-    # 1) catalog
-    add_obj(b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n")
-    # 2) pages
-    add_obj(b"2 0 obj\n<< /Type /Pages /Kids [3 0 R] /Count 1 >>\nendobj\n")
-    # 3) page
-    add_obj(b"3 0 obj\n<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>\nendobj\n")
-    # 4) font
-    add_obj(b"4 0 obj\n<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>\nendobj\n")
-    # 5) contents
-    add_obj(f"5 0 obj\n<< /Length {len(content_bytes)} >>\nstream\n".encode("utf-8") + content_bytes + b"\nendstream\nendobj\n")
-
-    # xref
-    xref_start = sum(len(o) for o in objects)
-    # compute real offsets (including header)
-    # rebuild xref offsets by scanning objects is complex; we used running offsets list
-    # Let's compute actual offsets by re-walking
-    full = b"".join(objects)
-    # But we need xref entries; easiest: compute by finding "1 0 obj" etc offsets
-    # We'll do a simple find
-    def find_offset(marker: bytes) -> int:
-        return full.find(marker)
-
-    off1 = find_offset(b"1 0 obj")
-    off2 = find_offset(b"2 0 obj")
-    off3 = find_offset(b"3 0 obj")
-    off4 = find_offset(b"4 0 obj")
-    off5 = find_offset(b"5 0 obj")
-
-    xref = "xref\n0 6\n0000000000 65535 f \n".encode("utf-8")
-    for off in [off1, off2, off3, off4, off5]:
-        xref += f"{off:010d} 00000 n \n".encode("utf-8")
-
-    trailer = f"trailer\n<< /Size 6 /Root 1 0 R >>\nstartxref\n{xref_start}\n%%EOF\n".encode("utf-8")
-
-    return full + xref + trailer
+def _json_resp(data, status: int = 200):
+    resp = make_response(schema.dumps(data), status)
+    resp.headers["Content-Type"] = "application/json; charset=utf-8"
+    return resp
 
 # ============================================================
-# TELAS + FLUXO
+# API JSON (v1) — para integrações, sem renderizar a página
 # ============================================================
 
-INDEX_HTML = r"""
-<!DOCTYPE html>
-<html lang="pt-BR">
-<head>
-  <meta charset="UTF-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-  <title>Arte Preço Pro</title>
-  <link rel="manifest" href="/manifest.webmanifest" />
-  <meta name="theme-color" content="#4E683E" />
-  <link rel="icon" href="/static/icon-192.png" />
-  <link rel="apple-touch-icon" href="/static/icon-192.png" />
-  <style>
-    :root{
-      --bg:#DCE6D5;
-      --card:#EAF1E6;
-      --dark:#4E683E;
-      --dark2:#3B5330;
-      --txt:#1a1a1a;
-      --muted:#444;
-      --radius:18px;
-    }
-    body{
-      margin:0;
-      font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif;
-      background:var(--bg);
-      color:var(--txt);
-    }
-    .wrap{
-      max-width:760px;
-      margin:0 auto;
-      padding:18px;
-    }
-    .card{
-      background:var(--card);
-      border-radius:var(--radius);
-      padding:18px;
-      box-shadow:0 4px 16px rgba(0,0,0,.08);
-      margin-bottom:18px;
-    }
-    h1{
-      margin:0 0 10px 0;
-      font-size:28px;
-      letter-spacing:.3px;
-    }
-    h2{
-      margin:0 0 10px 0;
-      font-size:18px;
-      color:var(--dark2);
-    }
-    .row{
-      display:flex;
-      gap:12px;
-      flex-wrap:wrap;
-    }
-    .col{
-      flex:1;
-      min-width:220px;
-    }
-    label{
-      display:block;
-      font-weight:700;
-      margin:10px 0 6px;
-      color:var(--muted);
-    }
-    input{
-      width:100%;
-      box-sizing:border-box;
-      border:1px solid rgba(0,0,0,.12);
-      border-radius:14px;
-      padding:12px 12px;
-      font-size:16px;
-      outline:none;
-      background:#fff;
-    }
-    input:focus{
-      border-color:rgba(78,104,62,.45);
-      box-shadow:0 0 0 3px rgba(78,104,62,.15);
-    }
-    .btn{
-      width:100%;
-      border:0;
-      padding:14px 14px;
-      font-size:18px;
-      font-weight:800;
-      border-radius:14px;
-      cursor:pointer;
-      background:var(--dark);
-      color:#fff;
-      margin-top:14px;
-    }
-    .btn:active{ transform: translateY(1px); }
-    .btn.secondary{
-      background:#6b6b6b;
-    }
-    .btn.outline{
-      background:transparent;
-      color:var(--dark);
-      border:2px solid var(--dark);
-    }
-    .small{
-      font-size:14px;
-      color:#333;
-      margin-top:6px;
-    }
-    .result{
-      margin-top:18px;
-      padding:14px;
-      background:#fff;
-      border-radius:16px;
-      border:1px solid rgba(0,0,0,.10);
-    }
-    .big{
-      font-size:34px;
-      font-weight:900;
-      color:#000;
-      margin-top:4px;
-    }
-    .muted{
-      color:#444;
-      font-size:15px;
-    }
-    .warn{
-      margin-top:10px;
-      color:#7a4b00;
-      font-weight:700;
-    }
-    .footer-actions{
-      display:flex;
-      gap:12px;
-      margin-top:14px;
-      flex-wrap:wrap;
-    }
-    .footer-actions .btn{
-      flex:1;
-      min-width:220px;
-      margin-top:0;
+def _api_corpo(sch: dict):
+    # -> (dados, resposta_de_erro). Valida antes de qualquer cálculo.
+    try:
+        data = schema.loads(request.get_data() or b"null")
+    except ValueError:
+        return None, _json_resp({"erro": "JSON inválido."}, 400)
+    limpos, erros = schema.validar(sch, data)
+    if erros:
+        return None, _json_resp({"erro": "Entrada inválida.", "campos": erros}, 422)
+    return limpos, None
+
+def _api_calc_input(d: dict) -> CalcInput:
+    return CalcInput(
+        d["produto"], d["custo_material"], d["horas_trabalhadas"], d["valor_hora"],
+        d["despesas_extras"], d["margem_lucro_pct"], d["validade_dias"],
+    )
+
+def _api_resultado(cr: CalcResult) -> dict:
+    return {
+        "custo_base": cr.custo_base,
+        "preco_final": cr.preco_final,
+        "custo_base_fmt": cr.custo_base_fmt,
+        "preco_final_fmt": cr.preco_final_fmt,
+        "custo_base_centavos": cr.custo_base_centavos,
+        "preco_final_centavos": cr.preco_final_centavos,
     }
-  </style>
-  <script>
-    // Registra o Service Worker (para instalação/offline)
-    if ('serviceWorker' in navigator) {
-      window.addEventListener('load', () => {
-        navigator.serviceWorker.register('/sw.js').catch(()=>{});
-      });
+
+def _api_pdf(ci: CalcInput, cliente: dict):
+    audit.registrar(WRITER, "pdf", ci.produto)
+    resp = app.response_class(
+        _pdf_stream(_empresa(), cliente or {}, ci, calcular(ci)),
+        mimetype="application/pdf",
+    )
+    resp.headers["Content-Disposition"] = 'inline; filename="orcamento.pdf"'
+    return resp
+
+@app.post("/api/v1/price")
+def api_price():
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    d, erro = _api_corpo(schema.PRECO)
+    if erro:
+        return erro
+    ci = _api_calc_input(d)
+    # Accept: application/pdf -> o orçamento em PDF em vez do JSON
+    if request.accept_mimetypes.best_match(["application/json", "application/pdf"]) == "application/pdf":
+        return _api_pdf(ci, {})
+    return _json_resp(_api_resultado(calcular(ci)))
+
+# Simulação "e se?": um orçamento + faixas de margem/horas/valor da hora -> grade de
+# preços (core/sweep.py). ?formato=csv|pdf ou Accept: text/csv / application/pdf.
+SIMULACAO_MAX_CELULAS = int(os.environ.get("ARTEPRECO_SIMULACAO_MAX", "250000"))
+SIMULACAO_PDF_MAX_CELULAS = int(os.environ.get("ARTEPRECO_SIMULACAO_PDF_MAX", "5000"))
+
+@app.post("/api/v1/price/sweep")
+def api_price_sweep():
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    d, erro = _api_corpo(schema.SIMULACAO)
+    if erro:
+        return erro
+    try:
+        grade = varrer(_api_calc_input(d), d["faixas"], SIMULACAO_MAX_CELULAS)
+    except SweepErro as e:
+        return _json_resp({"erro": "Entrada inválida.", "campos": [str(e)]}, 422)
+
+    formato = request.args.get("formato") or {
+        "text/csv": "csv",
+        "application/pdf": "pdf",
+    }.get(request.accept_mimetypes.best_match(["application/json", "text/csv", "application/pdf"]), "json")
+    if formato == "csv":
+        resp = app.response_class(grade.csv(), mimetype="text/csv")
+        resp.headers["Content-Disposition"] = 'attachment; filename="simulacao.csv"'
+        return resp
+    if formato == "pdf":
+        if grade.celulas > SIMULACAO_PDF_MAX_CELULAS:
+            return _json_resp({"erro": f"PDF: máximo de {SIMULACAO_PDF_MAX_CELULAS} células (use CSV)."}, 422)
+        audit.registrar(WRITER, "pdf_simulacao", str(grade.celulas))
+        resp = app.response_class(
+            metrics.cronometrar_iter("pdf", gerar_pdf_simulacao_stream(_empresa(), grade)), mimetype="application/pdf",
+        )
+        resp.headers["Content-Disposition"] = 'inline; filename="simulacao.pdf"'
+        return resp
+    return _json_resp(dict(grade.para_dict(), celulas=grade.celulas))
+
+# Orçamento com itens (core/line_items.py): {"produto", "margem_lucro_pct", "itens": [
+# {"tipo": "material", "descricao", "quantidade", "unitario"}, {"tipo": "desconto", "pct": 10}, ...]}
+# -> cada item com seu valor + totais; Accept: application/pdf -> PDF com todas as linhas.
+# Item {"catalogo_id": 12, "quantidade": 3}: preço do catálogo na versão "catalogo_versao"
+# (padrão: a atual, devolvida na resposta) — mesma versão, mesmos números, mesmo PDF.
+def _itens_orcamento(d: dict):
+    # ORCAMENTO_ITENS validado -> (ItensOrcamento, cliente, versão do catálogo, erros);
+    # itens com catalogo_id pegam o unitário da versão pedida (padrão: a atual)
+    erros, validos = [], []
+    for i, it in enumerate(d["itens"]):
+        limpos, e = schema.validar(schema.ITEM, it)
+        if e:
+            erros.extend(f"itens[{i}].{x}" for x in e)
+        else:
+            validos.append((i, limpos))
+    tenant = _tenant()
+    versao_cat = d["catalogo_versao"]
+    if versao_cat is None:
+        versao_cat = CATALOGO.versao_atual(tenant)
+    try:
+        do_catalogo = CATALOGO.obter_varios(
+            tenant, [l["catalogo_id"] for _i, l in validos if l["catalogo_id"] is not None], versao_cat,
+        )
+    except CatalogoErro as e:
+        return None, None, versao_cat, [f"catalogo_versao: {e}"]
+
+    orc = ItensOrcamento(d["produto"], d["margem_lucro_pct"], d["validade_dias"])
+    for i, limpos in validos:
+        cid = limpos["catalogo_id"]
+        if cid is not None:
+            c = do_catalogo.get(cid)
+            if c is None:
+                erros.append(f"itens[{i}].catalogo_id: item {cid} não existe na versão {versao_cat}")
+                continue
+            limpos["tipo"] = limpos["tipo"] or c["tipo"]
+            limpos["descricao"] = limpos["descricao"] or c["nome"]
+            limpos["unitario"] = c["custo"]
+        try:
+            orc.adicionar(Item(**limpos))
+        except ItensErro as e:
+            erros.append(f"itens[{i}].{e}")
+    cliente, e = schema.validar(schema.CONTATO, d["cliente"])
+    erros.extend(f"cliente.{x}" for x in e)
+    return orc, cliente, versao_cat, erros
+
+@app.post("/api/v1/price/itens")
+def api_price_itens():
+    # Só calcula (não grava): para guardar no histórico, POST /api/v1/quotes/itens
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    d, erro = _api_corpo(schema.ORCAMENTO_ITENS)
+    if erro:
+        return erro
+    orc, cliente, versao_cat, erros = _itens_orcamento(d)
+    if erros:
+        return _json_resp({"erro": "Entrada inválida.", "campos": erros}, 422)
+
+    cr = orc.resultado()
+    if request.accept_mimetypes.best_match(["application/json", "application/pdf"]) == "application/pdf":
+        audit.registrar(WRITER, "pdf", orc.produto)
+        resp = app.response_class(
+            _pdf_stream(_empresa(), cliente, orc.calc_input(), cr, itens=orc),
+            mimetype="application/pdf",
+        )
+        resp.headers["Content-Disposition"] = 'inline; filename="orcamento.pdf"'
+        return resp
+    return _json_resp(dict(orc.para_dict(), catalogo_versao=versao_cat, **_api_resultado(cr)))
+
+# Preço reverso: dado o preço alvo, resolve UMA das variáveis (core/pricing.py, resolver).
+# {"resolver": "margem_lucro_pct", "preco_alvo": 150, ...demais campos de /api/v1/price}
+def _resolver_param(data) -> str:
+    v = request.args.get("resolver")
+    if not v and isinstance(data, dict):
+        v = data.get("resolver")
+    return v if v in RESOLVIVEIS else ""
+
+def _erro_resolver():
+    return _json_resp({"erro": "Entrada inválida.", "campos": [f"resolver: use um de {', '.join(RESOLVIVEIS)}"]}, 422)
+
+def _solucao_dict(variavel: str, valor: float, viavel: bool, final: int) -> dict:
+    return {
+        "resolver": variavel,
+        "valor": valor,
+        "viavel": viavel,
+        "preco_final": final / 100,
+        "preco_final_fmt": fmt_centavos(final),
+        "preco_final_centavos": final,
     }
-  </script>
-</head>
-<body>
-  <div class="wrap">
-    {% if not activated %}
-      <div class="card">
-        <h1>Ativação do Arte Preço Pro</h1>
-        <div class="small">Cole a chave AP-... (uma vez). O app lembra automaticamente.</div>
-        <form method="POST" action="/ativar">
-          <label>Chave</label>
-          <input name="chave" placeholder="Cole sua chave AP-..." required />
-          <button class="btn" type="submit">Ativar</button>
-        </form>
-        {% if msg %}
-          <div class="warn">{{msg}}</div>
-        {% endif %}
-      </div>
-    {% else %}
-      <div class="card">
-        <h1>Arte Preço Pro</h1>
-        <div class="small">Preencha e clique em <b>Calcular</b>. Depois gere o PDF.</div>
-
-        <form method="POST" action="/calcular">
-          <label>Produto</label>
-          <input name="produto" value="{{form.produto}}" placeholder="Ex: Logo" required />
-
-          <label>Custo do Material (R$)</label>
-          <input name="custo_material" value="{{form.custo_material}}" placeholder="Ex: 10" inputmode="decimal" required />
-
-          <div class="row">
-            <div class="col">
-              <label>Horas Trabalhadas</label>
-              <input name="horas_trabalhadas" value="{{form.horas_trabalhadas}}" placeholder="Ex: 4" inputmode="decimal" required />
-            </div>
-            <div class="col">
-              <label>Valor da Hora (R$)</label>
-              <input name="valor_hora" value="{{form.valor_hora}}" placeholder="Ex: 30" inputmode="decimal" required />
-            </div>
-          </div>
-
-          <label>Despesas Extras (R$)</label>
-          <input name="despesas_extras" value="{{form.despesas_extras}}" placeholder="Ex: 2" inputmode="decimal" required />
-
-          <label>Margem de Lucro (%)</label>
-          <input name="margem_lucro_pct" value="{{form.margem_lucro_pct}}" placeholder="Ex: 80" inputmode="decimal" required />
-
-          <label>Validade (dias)</label>
-          <input name="validade_dias" value="{{form.validade_dias}}" placeholder="Ex: 7" inputmode="numeric" required />
-
-          <button class="btn" type="submit">Calcular</button>
-        </form>
-
-        {% if result %}
-          <div class="result">
-            <div><b>Produto:</b> {{result.produto}}</div>
-            <div><b>Custo Base:</b> {{result.custo_base_fmt}}</div>
-            <div class="big">Preço Final: {{result.preco_final_fmt}}</div>
-            <div class="muted">Validade: {{result.validade_dias}} dia(s)</div>
-
-            <div class="footer-actions">
-              <form method="GET" action="/pdf" style="flex:1;">
-                <button class="btn outline" type="submit">Gerar PDF</button>
-              </form>
-
-              <form method="GET" action="/empresa" style="flex:1;">
-                <button class="btn outline" type="submit">Dados da empresa</button>
-              </form>
-
-              <form method="GET" action="/cliente" style="flex:1;">
-                <button class="btn outline" type="submit">Dados do cliente</button>
-              </form>
-            </div>
-          </div>
-        {% endif %}
-      </div>
-
-      <div class="card">
-        <div class="footer-actions">
-          <form method="POST" action="/sair" style="flex:1;">
-            <button class="btn secondary" type="submit">Sair</button>
-          </form>
-          <form method="POST" action="/revalidar" style="flex:1;">
-            <button class="btn" type="submit">Revalidar chave</button>
-          </form>
-        </div>
-      </div>
-    {% endif %}
-  </div>
-</body>
-</html>
-"""
+
+@app.post("/api/v1/price/solve")
+def api_price_solve():
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    try:
+        data = schema.loads(request.get_data() or b"null")
+    except ValueError:
+        return _json_resp({"erro": "JSON inválido."}, 400)
+    variavel = _resolver_param(data)
+    if not variavel:
+        return _erro_resolver()
+    d, erros = schema.validar(schema.RESOLVER[variavel], data)
+    if erros:
+        return _json_resp({"erro": "Entrada inválida.", "campos": erros}, 422)
+    s = resolver(_api_calc_input(d), variavel, d["preco_alvo"])
+    return _json_resp(_solucao_dict(variavel, s.valor, s.viavel, s.preco_final_centavos))
+
+def _solve_csv(cols: dict, variavel: str, valores, viaveis, finais, bloco: int = 1000):
+    yield f"produto;preco_alvo;{variavel};viavel;preco_final;preco_final_fmt\n"
+    produtos = cols["produto"]
+    for i in range(0, len(produtos), bloco):
+        fim = i + bloco
+        pfs = list(map(int, finais[i:fim]))
+        buf = []
+        for produto, alvo, v, ok, pf, pf_fmt in zip(
+            produtos[i:fim], cols["preco_alvo"][i:fim], valores[i:fim], viaveis[i:fim], pfs,
+            BRL.format_many(pfs, centavos=True),
+        ):
+            produto = produto.replace('"', '""')
+            buf.append(f'"{produto}";{float(alvo):.2f};{float(v):g};{int(bool(ok))};{pf // 100}.{pf % 100:02d};{pf_fmt}\n')
+        yield "".join(buf)
+
+@app.post("/api/v1/price/solve/lote")
+def api_price_solve_lote():
+    # Catálogo inteiro (JSON como /calcular/lote, ou text/csv) + coluna preco_alvo;
+    # a variável vem em ?resolver= (ou "resolver" no JSON).
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    try:
+        if request.mimetype == "text/csv":
+            variavel = _resolver_param(None)
+            cols = colunas_de_csv(request.get_data(as_text=True), LOTE_MAX_ITENS, extras=("preco_alvo",))
+        else:
+            data = request.get_json(silent=True)
+            if data is None:
+                return _json_resp({"erro": "Envie JSON ou text/csv."}, 415)
+            variavel = _resolver_param(data)
+            cols = colunas_de_json(data, LOTE_MAX_ITENS, extras=("preco_alvo",))
+        if not variavel:
+            return _erro_resolver()
+        valores, viaveis, finais = resolver_colunas(cols, variavel)
+    except ValueError as e:  # inclui LoteErro
+        return _json_resp({"erro": str(e)}, 400)
+
+    quer_csv = request.args.get("formato") == "csv" or (
+        request.accept_mimetypes.best_match(["application/json", "text/csv"]) == "text/csv"
+    )
+    if quer_csv:
+        resp = app.response_class(_solve_csv(cols, variavel, valores, viaveis, finais), mimetype="text/csv")
+        resp.headers["Content-Disposition"] = 'attachment; filename="precos_reversos.csv"'
+        return resp
+
+    itens = [
+        dict(_solucao_dict(variavel, float(v), bool(ok), int(pf)), produto=produto)
+        for produto, v, ok, pf in zip(cols["produto"], valores, viaveis, finais)
+    ]
+    return _json_resp({"total": len(itens), "inviaveis": sum(not i["viavel"] for i in itens), "itens": itens})
+
+@app.post("/api/v1/quote.pdf")
+def api_quote_pdf():
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    d, erro = _api_corpo(schema.ORCAMENTO_PDF)
+    if erro:
+        return erro
+    cliente, erros = schema.validar(schema.CONTATO, d["cliente"])
+    if erros:
+        return _json_resp({"erro": "Entrada inválida.", "campos": [f"cliente.{e}" for e in erros]}, 422)
+    return _api_pdf(_api_calc_input(d), cliente)
+
+@app.get("/api/v1/company")
+def api_company_get():
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    empresa = _empresa()
+    return _json_resp({k: empresa.get(k, "") for k in schema.CONTATO})
+
+@app.route("/api/v1/company", methods=["PUT", "POST"])
+def api_company_put():
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    d, erro = _api_corpo(schema.CONTATO)
+    if erro:
+        return erro
+    return _json_resp(TENANTS.set(_tenant(), d))
+
+# ============================================================
+# HISTÓRICO DE ORÇAMENTOS (core/quotes.py)
+# ============================================================
+
+# Cada orçamento salvo guarda o preço já calculado e os dados da empresa da época:
+# o PDF de um orçamento antigo sai igual ao original, sem recalcular.
+HISTORICO_PAGINA = 50
+HISTORICO_PAGINA_MAX = 500
+HISTORICO_LOTE_MAX = 1000
+
+def _data_param(nome: str) -> Optional[int]:
+    # ?de=2026-01-31 ou ?de=<epoch>
+    v = (request.args.get(nome) or "").strip()
+    if not v:
+        return None
+    if v.isdigit():
+        return int(v)
+    return int(datetime.strptime(v, "%Y-%m-%d").timestamp())
+
+def _historico_consulta():
+    limite = min(max(request.args.get("limite", HISTORICO_PAGINA, type=int) or 1, 1), HISTORICO_PAGINA_MAX)
+    return quotes.listar(
+        db_conn(),
+        tenant=_tenant(),
+        limite=limite,
+        cursor=request.args.get("cursor"),
+        cliente_id=request.args.get("cliente_id", type=int),
+        de=_data_param("de"),
+        ate=_data_param("ate"),
+        busca=request.args.get("q"),
+    )
+
+def _validar_orcamento(d, prefixo: str = ""):
+    # -> (CalcInput, cliente, erros)
+    limpos, erros = schema.validar(schema.ORCAMENTO_PDF, d)
+    if erros:
+        return None, None, [prefixo + e for e in erros]
+    cliente, erros = schema.validar(schema.CONTATO, limpos["cliente"])
+    if erros:
+        return None, None, [f"{prefixo}cliente.{e}" for e in erros]
+    return _api_calc_input(limpos), cliente, []
+
+def _salvar_orcamentos(orcamentos) -> Future:
+    # [(CalcInput, CalcResult, cliente)] -> Future com os ids (gravados pelo WRITER)
+    empresa = _empresa()
+    tenant = _tenant()
+    versao_cat = CATALOGO.versao_atual(tenant)
+    fut = WRITER.submit(
+        lambda conn: quotes.inserir_lote(conn, orcamentos, empresa, tenant=tenant, catalogo_versao=versao_cat)
+    )
+    audit.registrar(WRITER, "orcamento", str(len(orcamentos)))
+    return fut
+
+@app.post("/api/v1/quotes")
+def api_quotes_create():
+    # Um orçamento ({produto, ..., cliente?}) ou vários ({"itens": [...]}, uma transação)
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    try:
+        data = schema.loads(request.get_data() or b"null")
+    except ValueError:
+        return _json_resp({"erro": "JSON inválido."}, 400)
+
+    lote = isinstance(data, dict) and "itens" in data
+    itens = data["itens"] if lote else [data]
+    if not isinstance(itens, list) or not itens:
+        return _json_resp({"erro": "Envie uma lista em 'itens'."}, 400)
+    if len(itens) > HISTORICO_LOTE_MAX:
+        return _json_resp({"erro": f"Máximo de {HISTORICO_LOTE_MAX} itens por lote."}, 400)
+
+    entradas, erros = [], []
+    for i, item in enumerate(itens):
+        ci, cliente, e = _validar_orcamento(item, f"itens[{i}]." if lote else "")
+        erros.extend(e)
+        entradas.append((ci, cliente))
+    if erros:
+        return _json_resp({"erro": "Entrada inválida.", "campos": erros}, 422)
+
+    resultados = calcular_precos([ci for ci, _c in entradas])
+    fut = _salvar_orcamentos([(ci, cr, cliente) for (ci, cliente), cr in zip(entradas, resultados)])
+    if lote:
+        # Lote (ex.: fila offline do app): aceito e gravado em segundo plano
+        return _json_resp({"total": len(orcamentos)}, 202)
+    # Um orçamento: quem chamou quer o id, então espera o commit do lote em que ele entrou
+    return _json_resp(dict(_api_resultado(resultados[0]), id=fut.result(WRITER.espera)[0]), 201)
+
+@app.post("/api/v1/quotes/itens")
+def api_quotes_itens_create():
+    # Orçamento com itens (mesmo corpo de /api/v1/price/itens), gravado com os itens e a
+    # versão do catálogo: o unitário de cada item fica o daquela versão
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    d, erro = _api_corpo(schema.ORCAMENTO_ITENS)
+    if erro:
+        return erro
+    orc, cliente, versao_cat, erros = _itens_orcamento(d)
+    if erros:
+        return _json_resp({"erro": "Entrada inválida.", "campos": erros}, 422)
+    empresa = _empresa()
+    tenant = _tenant()
+    fut = WRITER.submit(
+        lambda conn: quotes.inserir_itens(conn, orc, cliente, empresa, tenant=tenant, catalogo_versao=versao_cat)
+    )
+    audit.registrar(WRITER, "orcamento", "1")
+    quote_id = fut.result(WRITER.espera)
+    return _json_resp(
+        dict(orc.para_dict(), id=quote_id, catalogo_versao=versao_cat, **_api_resultado(orc.resultado())), 201,
+    )
+
+@app.get("/api/v1/quotes")
+def api_quotes_list():
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    try:
+        rows, proximo = _historico_consulta()
+    except ValueError as e:
+        return _json_resp({"erro": str(e)}, 400)
+    return _json_resp({"itens": [quotes.para_dict(r) for r in rows], "proximo": proximo})
+
+@app.get("/api/v1/quotes/<int:quote_id>")
+def api_quotes_get(quote_id: int):
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    row = quotes.obter(db_conn(), quote_id, _tenant())
+    if row is None:
+        return _json_resp({"erro": "Orçamento não encontrado."}, 404)
+    orc = quotes.obter_itens(db_conn(), row)
+    if orc is None:
+        return _json_resp(quotes.para_dict(row))
+    return _json_resp(dict(quotes.para_dict(row), **orc.para_dict()))
+
+@app.get("/api/v1/quotes/<int:quote_id>.pdf")
+def api_quotes_pdf(quote_id: int):
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    row = quotes.obter(db_conn(), quote_id, _tenant())
+    if row is None:
+        return _json_resp({"erro": "Orçamento não encontrado."}, 404)
+    empresa, cliente, ci, cr = quotes.reconstruir(row)
+    audit.registrar(WRITER, "pdf_historico", str(quote_id))
+    resp = app.response_class(
+        _pdf_stream(empresa, cliente, ci, cr, emitido_em=datetime.fromtimestamp(row["criado_em"]),
+                    itens=quotes.obter_itens(db_conn(), row)),
+        mimetype="application/pdf",
+    )
+    resp.headers["Content-Disposition"] = f'inline; filename="orcamento-{quote_id}.pdf"'
+    return resp
+
+HISTORICO_TEMPLATE = app.jinja_env.get_template("historico.html")
+
+@app.get("/historico")
+def historico():
+    if not _ativado():
+        return redirect("/")
+    try:
+        rows, proximo = _historico_consulta()
+    except ValueError:
+        return redirect("/historico")
+    itens = [
+        dict(
+            quotes.para_dict(r),
+            data=datetime.fromtimestamp(r["criado_em"]).strftime("%d/%m/%Y %H:%M"),
+            preco_final_fmt=fmt_centavos(r["preco_final_centavos"]),
+        )
+        for r in rows
+    ]
+    with metrics.Etapa("render"):
+        return HISTORICO_TEMPLATE.render(itens=itens, proximo=proximo, q=request.args.get("q", ""))
+
+# ============================================================
+# CATÁLOGO DE MATERIAIS E VALORES DE HORA (core/catalog.py)
+# ============================================================
+
+CATALOGO = Catalogo(DB_POOL, WRITER)
+CATALOGO_BUSCA_MAX = 50
+CATALOGO_IMPORT_MAX = int(os.environ.get("ARTEPRECO_CATALOGO_IMPORT_MAX", "200000"))
+
+@app.get("/api/v1/catalog")
+def api_catalog_buscar():
+    # Autocomplete: ?q=papel&tipo=material&limite=10
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    limite = min(max(request.args.get("limite", 10, type=int) or 1, 1), CATALOGO_BUSCA_MAX)
+    itens = CATALOGO.buscar(_tenant(), request.args.get("q", ""), limite, request.args.get("tipo") or None)
+    return _json_resp({"itens": itens})
+
+@app.post("/api/v1/catalog")
+def api_catalog_salvar():
+    # Um item, {"itens": [...]} ou text/csv (tipo;nome;fornecedor;unidade;custo): uma transação só
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    try:
+        if request.mimetype == "text/csv":
+            total = CATALOGO.importar_csv(_tenant(), request.get_data(as_text=True), CATALOGO_IMPORT_MAX)
+        else:
+            try:
+                data = schema.loads(request.get_data() or b"null")
+            except ValueError:
+                return _json_resp({"erro": "JSON inválido."}, 400)
+            lote = isinstance(data, dict) and "itens" in data
+            itens = data["itens"] if lote else [data]
+            if not isinstance(itens, list) or not itens:
+                return _json_resp({"erro": "Envie uma lista em 'itens'."}, 400)
+            if len(itens) > CATALOGO_IMPORT_MAX:
+                return _json_resp({"erro": f"Máximo de {CATALOGO_IMPORT_MAX} itens."}, 400)
+            limpos, erros = [], []
+            for i, it in enumerate(itens):
+                d, e = schema.validar(schema.CATALOGO_ITEM, it)
+                erros.extend((f"itens[{i}].{x}" if lote else x) for x in e)
+                limpos.append(d)
+            if erros:
+                return _json_resp({"erro": "Entrada inválida.", "campos": erros}, 422)
+            total = CATALOGO.salvar(_tenant(), limpos)
+    except CatalogoErro as e:
+        return _json_resp({"erro": str(e)}, 400)
+    return _json_resp({"total": total, "versao": CATALOGO.versao_atual(_tenant())})
+
+@app.get("/api/v1/catalog/<int:item_id>")
+def api_catalog_get(item_id: int):
+    # ?versao=N: o item como estava na versão N da tabela de preços
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    v = request.args.get("versao", type=int)
+    if v is None:
+        item = CATALOGO.obter(_tenant(), item_id)
+    else:
+        item = CATALOGO.obter_em(_tenant(), item_id, v)
+    if item is None:
+        return _json_resp({"erro": "Item não encontrado."}, 404)
+    return _json_resp(item)
+
+@app.get("/api/v1/catalog/versoes")
+def api_catalog_versoes():
+    # Versões da tabela de preços (mais recentes primeiro; ?antes=N pagina);
+    # ?em=<epoch>: só a versão vigente naquele instante
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    tenant = _tenant()
+    em = request.args.get("em", type=int)
+    if em is not None:
+        return _json_resp({"versao": CATALOGO.versao_em_data(tenant, em)})
+    limite = min(max(request.args.get("limite", 50, type=int) or 1, 1), HISTORICO_PAGINA_MAX)
+    return _json_resp({
+        "atual": CATALOGO.versao_atual(tenant),
+        "itens": CATALOGO.versoes(tenant, limite, request.args.get("antes", type=int)),
+    })
+
+@app.get("/api/v1/catalog/versoes/<int:v>")
+def api_catalog_versao(v: int):
+    # O catálogo inteiro como estava na versão v
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    try:
+        itens = CATALOGO.listar_em(_tenant(), v)
+    except CatalogoErro as e:
+        return _json_resp({"erro": str(e)}, 404)
+    return _json_resp({"versao": v, "itens": itens})
+
+@app.delete("/api/v1/catalog/<int:item_id>")
+def api_catalog_delete(item_id: int):
+    if not _ativado():
+        return _json_resp({"erro": "App não ativado."}, 403)
+    if not CATALOGO.remover(_tenant(), item_id):
+        return _json_resp({"erro": "Item não encontrado."}, 404)
+    return ("", 204)
+
+if __name__ == "__main__":
+    # Desenvolvimento: python app_web.py (produção: gunicorn app_web:app)
+    iniciar()
+    app.run(host=os.environ.get("HOST", "127.0.0.1"), port=int(os.environ.get("PORT", "5000")))
@@ -0,0 +1,51 @@
+# bench/bench_catalog.py
+# Autocomplete do catálogo (core/catalog.py, _Indice.buscar) com 100 mil itens:
+# prefixos curtos e consultas de vários termos, raros e comuns. Meta: < 1 ms.
+# Uso: python bench/bench_catalog.py [itens]
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.catalog import _Indice  # noqa: E402
+
+MATERIAIS = ("papel", "vinil", "lona", "tinta", "cola", "fita", "linha", "tecido", "feltro", "eva", "madeira",
+             "mdf", "acrilico", "resina", "verniz", "pincel", "tesoura", "agulha", "botao", "ziper", "renda",
+             "cetim", "juta", "barbante", "arame", "isopor", "biscuit", "glitter", "papelao", "etiqueta")
+ADJETIVOS = ("adesivo", "fosco", "brilho", "kraft", "metalico", "perolado", "transparente", "branco", "preto",
+             "azul", "vermelho", "dourado", "prata", "rosa", "verde", "tipo", "tingido", "texturizado", "liso",
+             "estampado", "premium", "escolar", "offset", "couche", "reciclado", "duplo", "fino", "grosso")
+FORNECEDORES = ("Casa do Artesao", "Papelaria Central", "Tintas Brasil", "Armarinho Sao Jose", "Distribuidora Sul",
+                "Atacado Arte", "Loja Criativa", "Mega Papeis", "Tecidos Nobre", "Importadora Leste")
+
+
+def catalogo(n: int, seed: int = 1) -> list:
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(1, n + 1):
+        nome = " ".join((
+            rnd.choice(MATERIAIS), rnd.choice(ADJETIVOS), rnd.choice(ADJETIVOS),
+            rnd.choice(("A4", "A3", "30x40", "50cm", "1m", "100ml", "250g", f"{rnd.randint(1, 999)}",
+                        f"ref{rnd.randint(1000, 99999)}")),
+        ))
+        rows.append((i, "material", nome, rnd.choice(FORNECEDORES), "un", rnd.randint(10, 100000)))
+    return rows
+
+
+CONSULTAS = ("p", "pa", "papel", "papel ti", "vinil lona 99", "vinil adesivo", "cola branco a4",
+             "tinta fosco 100ml", "ref123", "sao jose tecido", "lona kraft dourado 30x40", "xyz abc")
+
+
+def main(n: int = 100_000, limite: int = 10, rodadas: int = 7, vezes: int = 200) -> None:
+    idx = _Indice(1, catalogo(n))
+    print(f"{n} itens, {len(idx.vocab)} palavras, limite={limite}")
+    for q in CONSULTAS:
+        # Rodadas curtas, fica o melhor (máquina barulhenta)
+        t = min(timeit.timeit(lambda: idx.buscar(q, limite), number=vezes) for _ in range(rodadas)) / vezes
+        print(f"  {q!r:28} {t * 1e3:7.3f} ms  ({len(idx.buscar(q, limite))} resultado(s))")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,53 @@
+# bench/bench_index.py
+# Página principal: template inline + render_template_string (antes) vs
+# template compilado na subida + CSS/JS em arquivos versionados (depois).
+# Uso: python bench/bench_index.py
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ARTEPRECO_DB", os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+from flask import render_template_string  # noqa: E402
+
+import app_web  # noqa: E402
+
+
+def _inline_source() -> str:
+    # Reconstrói o INDEX_HTML antigo: CSS e JS de volta dentro da página
+    with open(os.path.join(app_web.BASE_DIR, "templates", "index.html"), encoding="utf-8") as f:
+        src = f.read()
+    with open(os.path.join(app_web.STATIC_DIR, "app.css"), encoding="utf-8") as f:
+        css = f.read()
+    with open(os.path.join(app_web.STATIC_DIR, "app.js"), encoding="utf-8") as f:
+        js = f.read()
+    src = src.replace('  <link rel="stylesheet" href="{{ asset_url(\'app.css\') }}" />\n', f"  <style>\n{css}  </style>\n")
+    return src.replace('  <script src="{{ asset_url(\'app.js\') }}" defer></script>\n', f"  <script>\n{js}  </script>\n")
+
+
+def main(n: int = 5000) -> None:
+    ctx = dict(
+        activated=True,
+        msg="",
+        form={"produto": "Logo", "custo_material": "10", "horas_trabalhadas": "4", "valor_hora": "30",
+              "despesas_extras": "2", "margem_lucro_pct": "80", "validade_dias": "7"},
+        result={"id": 1, "produto": "Logo", "custo_base_fmt": "R$ 132,00", "preco_final_fmt": "R$ 237,60",
+                "validade_dias": 7},
+        empresa={"nome": "Ateliê"},
+    )
+    src = _inline_source()
+    with app_web.app.test_request_context("/"):
+        antes = render_template_string(src, **ctx)
+        depois = app_web.render_index(**ctx)
+        t_antes = timeit.timeit(lambda: render_template_string(src, **ctx), number=n)
+        t_depois = timeit.timeit(lambda: app_web.render_index(**ctx), number=n)
+
+    print(f"antes : {t_antes / n * 1e6:7.1f} us/render  {len(antes.encode()):6d} bytes/resposta")
+    print(f"depois: {t_depois / n * 1e6:7.1f} us/render  {len(depois.encode()):6d} bytes/resposta "
+          f"(+ CSS/JS uma vez, em cache por 1 ano)")
+
+
+if __name__ == "__main__":
+    main()
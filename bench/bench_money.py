@@ -0,0 +1,62 @@
+# bench/bench_money.py
+# Formatação de dinheiro: os fmt_brl/fmt_centavos antigos (replace encadeados, só R$)
+# vs o Formatador de core/money.py, valor a valor e em lote (format_many).
+# Uso: python bench/bench_money.py
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.money import BRL, formatador  # noqa: E402
+
+
+def fmt_centavos_antigo(c: int) -> str:
+    reais, cents = divmod(abs(int(c)), 100)
+    sinal = "-" if c < 0 else ""
+    return f"R$ {sinal}{reais:,}".replace(",", ".") + f",{cents:02d}"
+
+
+def fmt_brl_antigo(v: float) -> str:
+    s = f"{v:,.2f}"
+    s = s.replace(",", "X").replace(".", ",").replace("X", ".")
+    return f"R$ {s}"
+
+
+def _ns(casos, n: int, rodadas: int = 15) -> list:
+    # Rodadas intercaladas (um pouco de cada caso por vez): ruído da máquina pesa
+    # igual para todos; fica o melhor tempo de cada um
+    melhor = [float("inf")] * len(casos)
+    for _ in range(rodadas):
+        for i, fn in enumerate(casos):
+            melhor[i] = min(melhor[i], timeit.timeit(fn, number=1))
+    return [t / n * 1e9 for t in melhor]
+
+
+def main(n: int = 50_000) -> None:
+    random.seed(1)
+    # preços de orçamento: maioria abaixo de R$ 10 mil, alguns na casa dos milhões
+    centavos = [random.choice((random.randint(0, 10**6), random.randint(0, 10**9))) for _ in range(n)]
+    reais = [c / 100 for c in centavos]
+    assert [BRL.centavos(c) for c in centavos] == [fmt_centavos_antigo(c) for c in centavos]
+    assert BRL.format_many(reais) == [fmt_brl_antigo(v) for v in reais]
+
+    casos = (
+        ("reais    antes (fmt_brl)     ", lambda: [fmt_brl_antigo(v) for v in reais]),
+        ("reais    BRL.valor           ", lambda: [BRL.valor(v) for v in reais]),
+        ("reais    BRL.format_many     ", lambda: BRL.format_many(reais)),
+        ("centavos antes (fmt_centavos)", lambda: [fmt_centavos_antigo(c) for c in centavos]),
+        ("centavos BRL.centavos        ", lambda: [BRL.centavos(c) for c in centavos]),
+        ("centavos BRL.format_many     ", lambda: BRL.format_many(centavos, centavos=True)),
+    )
+    for (nome, _fn), t in zip(casos, _ns([fn for _nome, fn in casos], n)):
+        print(f"{nome}  {t:6.0f} ns/valor")
+
+    for moeda, locale in (("USD", "en_US"), ("EUR", "de_DE"), ("JPY", "ja_JP")):
+        f = formatador(moeda, locale)
+        t1, t2 = _ns((lambda: [f.centavos(c) for c in centavos], lambda: f.format_many(centavos, centavos=True)), n)
+        print(f"{moeda} {locale}: {f.centavos(centavos[0]):>16}  {t1:6.0f} ns/valor   format_many {t2:6.0f} ns/valor")
+
+if __name__ == "__main__":
+    main()
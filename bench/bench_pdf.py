@@ -0,0 +1,39 @@
+# bench/bench_pdf.py
+# Compara o PDF montado do zero com o PDF sobre o esqueleto em cache (PdfTemplate).
+# Uso: python bench/bench_pdf.py
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.pdf import PdfTemplate, pdf_bytes  # noqa: E402
+
+EMPRESA = [
+    "ORCAMENTO - ARTE PRECO PRO", "", "Data: 01/01/2026 10:00", "",
+    "DADOS DA EMPRESA", "Nome: Estúdio Exemplo", "Telefone: (11) 99999-0000",
+    "E-mail: contato@exemplo.com", "Endereço: Rua das Flores, 123", "",
+]
+CLIENTE = [
+    "DADOS DO CLIENTE", "Nome: Cliente", "Telefone: ", "E-mail: ", "Endereço: ", "",
+    "DETALHES DO SERVIÇO", "Produto/Serviço: Logo", "Custo material: R$ 10,00",
+    "Trabalho: 4h x R$ 30,00", "Despesas extras: R$ 2,00", "",
+    "Custo Base: R$ 132,00", "Preco Final: R$ 237,60", "Validade: 7 dia(s)",
+]
+FIXAS = (0, 4, 5, 6, 7, 8)
+
+
+def main(n: int = 20000) -> None:
+    linhas = EMPRESA + CLIENTE
+    tpl = PdfTemplate({i: linhas[i] for i in FIXAS})
+    variaveis = [None if i in FIXAS else t for i, t in enumerate(linhas)]
+
+    for compress in (False, True):
+        t_full = timeit.timeit(lambda: pdf_bytes(linhas, compress=compress), number=n)
+        t_tpl = timeit.timeit(lambda: pdf_bytes(variaveis, compress=compress, template=tpl), number=n)
+        print(f"compress={compress!s:5}  do zero: {t_full / n * 1e6:7.1f} us/pdf   "
+              f"com esqueleto: {t_tpl / n * 1e6:7.1f} us/pdf   ganho: {t_full / t_tpl:4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# core/assets.py
+# Tabela de arquivos estáticos montada UMA vez na subida: bytes, hash do conteúdo,
+# ETag forte e variantes gzip/brotli prontas. Cada request só escolhe a variante
+# (Accept-Encoding) ou responde 304 — sem os.path.exists / leitura de disco.
+import gzip
+import hashlib
+import mimetypes
+import os
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele servimos gzip
+    brotli = None
+
+# Só vale comprimir texto (PNG já é comprimido)
+COMPRIMIVEIS = ("text/", "application/javascript", "application/json", "application/manifest+json", "image/svg+xml")
+
+TIPOS = {
+    ".js": "application/javascript; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".json": "application/json; charset=utf-8",
+    ".webmanifest": "application/manifest+json; charset=utf-8",
+    ".html": "text/html; charset=utf-8",
+    ".svg": "image/svg+xml",
+    ".png": "image/png",
+    ".ico": "image/x-icon",
+}
+
+
+def _mimetype(name: str) -> str:
+    ext = os.path.splitext(name)[1].lower()
+    return TIPOS.get(ext) or mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+def aceita(accept_encoding: str):
+    # "gzip, deflate, br;q=0.5" -> {"gzip", "deflate", "br"} (q=0 fica de fora)
+    out = set()
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        out.add(name.strip())
+    return out
+
+
+class Asset:
+    __slots__ = ("name", "data", "mimetype", "hash", "etag", "variants")
+
+    def __init__(self, name: str, data: bytes, mimetype: str = None):
+        self.name = name
+        self.data = data
+        self.mimetype = mimetype or _mimetype(name)
+        self.hash = hashlib.sha256(data).hexdigest()[:16]
+        self.etag = f'"{self.hash}"'
+        # encoding -> (bytes, etag); ETag forte diferente por representação
+        self.variants = {}
+        if self.mimetype.startswith(COMPRIMIVEIS) and len(data) > 256:
+            if brotli is not None:
+                br = brotli.compress(data, quality=11)
+                if len(br) < len(data):
+                    self.variants["br"] = (br, f'"{self.hash}-br"')
+            gz = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(gz) < len(data):
+                self.variants["gzip"] = (gz, f'"{self.hash}-gz"')
+
+    def negociar(self, accept_encoding: str):
+        """-> (corpo, etag, content_encoding ou None)."""
+        if self.variants:
+            ok = aceita(accept_encoding)
+            for enc in ("br", "gzip"):
+                if enc in self.variants and enc in ok:
+                    body, etag = self.variants[enc]
+                    return body, etag, enc
+        return self.data, self.etag, None
+
+    def casa_etag(self, if_none_match: str) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        if self.etag in tags:
+            return True
+        return any(etag in tags for _body, etag in self.variants.values())
+
+
+class AssetTable:
+    def __init__(self):
+        self._assets = {}
+
+    @classmethod
+    def from_dir(cls, base_dir: str) -> "AssetTable":
+        table = cls()
+        if not os.path.isdir(base_dir):
+            return table
+        for root, _dirs, files in os.walk(base_dir):
+            for fn in files:
+                path = os.path.join(root, fn)
+                name = os.path.relpath(path, base_dir).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    table.add(name, f.read())
+        return table
+
+    def add(self, name: str, data: bytes, mimetype: str = None) -> Asset:
+        asset = Asset(name, data, mimetype)
+        self._assets[name] = asset
+        return asset
+
+    def get(self, name: str):
+        return self._assets.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._assets
+
+    def url(self, name: str, prefix: str = "/static/") -> str:
+        asset = self._assets.get(name)
+        return f"{prefix}{name}?v={asset.hash}" if asset else f"{prefix}{name}"
+
+    def manifest_hash(self) -> str:
+        # Hash de todos os arquivos juntos: muda se qualquer um mudar
+        h = hashlib.sha256()
+        for name in sorted(self._assets):
+            h.update(name.encode("utf-8") + b"\0" + self._assets[name].hash.encode("ascii"))
+        return h.hexdigest()[:12]
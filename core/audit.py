@@ -0,0 +1,26 @@
+# core/audit.py
+# Eventos de auditoria (PDF emitido, orçamento salvo, ...). Gravados pelo writer em
+# segundo plano (core/writer.py): o request nunca espera o commit.
+import time
+
+SQL_AUDIT_TABLE = """
+    CREATE TABLE IF NOT EXISTS audit_events (
+        id INTEGER PRIMARY KEY,
+        tipo TEXT NOT NULL,
+        detalhe TEXT NOT NULL DEFAULT '',
+        criado_em INTEGER NOT NULL
+    )
+"""
+SQL_AUDIT_INDEX = "CREATE INDEX IF NOT EXISTS idx_audit_events_tipo ON audit_events(tipo, criado_em)"
+SQL_AUDIT_INSERT = "INSERT INTO audit_events(tipo, detalhe, criado_em) VALUES(?,?,?)"
+
+
+def init_schema(conn) -> None:
+    with conn:
+        conn.execute(SQL_AUDIT_TABLE)
+        conn.execute(SQL_AUDIT_INDEX)
+
+
+def registrar(writer, tipo: str, detalhe: str = ""):
+    """Enfileira o evento; devolve o Future do writer (normalmente ninguém espera)."""
+    return writer.executar(SQL_AUDIT_INSERT, (tipo, detalhe, int(time.time())))
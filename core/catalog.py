@@ -0,0 +1,652 @@
+# core/catalog.py
+# Catálogo por estúdio: materiais (com fornecedor e unidade) e valores de hora
+# padrão, para o orçamento não depender de digitar custo_material/valor_hora de cabeça.
+#
+# Fonte da verdade: tabela catalog_items no SQLite. Para o autocomplete, cada tenant
+# ganha um índice em memória (vocabulário ordenado para busca por prefixo + bi/trigramas
+# para "contém"), que responde em dezenas/centenas de microssegundos com 100k itens.
+# O índice acompanha o banco por um contador por tenant (core/db.py): escrita deste
+# processo atualiza o índice no lugar; escrita de outro processo faz reconstruir.
+#
+# Versões (tabela de preços histórica): o mesmo contador é o id da versão — cada
+# escrita que muda algo gera uma versão nova. Cópia na escrita: só o item alterado
+# ganha uma linha em catalog_history, com validade [desde, ate). Preço de um item na
+# versão V = uma busca na chave (tenant, item_id, desde <= V), O(log n), sem replay.
+# A lista inteira numa versão antiga parte do snapshot mais próximo (catalog_snapshots,
+# JSON comprimido, gravado a cada tantas mudanças) mais o delta de catalog_history.
+import bisect
+import csv
+import heapq
+import io
+import json
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from collections import defaultdict
+from itertools import chain, islice
+from typing import Dict, Iterable, List, Optional
+
+from core.db import bump_versao, garantir_coluna, init_versoes, versao
+from core.pricing import CENT, _escala, fmt_centavos
+from core.pricing_batch import parse_num
+from core.schema import CATALOGO_ITEM, validar
+
+SQL_TABLE = """
+    CREATE TABLE IF NOT EXISTS catalog_items (
+        id INTEGER PRIMARY KEY,
+        tenant TEXT NOT NULL,
+        tipo TEXT NOT NULL,
+        nome TEXT NOT NULL,
+        fornecedor TEXT NOT NULL DEFAULT '',
+        unidade TEXT NOT NULL DEFAULT '',
+        custo_centavos INTEGER NOT NULL,
+        atualizado_em INTEGER NOT NULL,
+        versao INTEGER NOT NULL DEFAULT 0,
+        UNIQUE(tenant, tipo, nome, fornecedor)
+    )
+"""
+# Histórico: uma linha por item por período de validade [desde, ate); ate NULL = vigente
+SQL_HISTORY = (
+    """
+    CREATE TABLE IF NOT EXISTS catalog_history (
+        tenant TEXT NOT NULL,
+        item_id INTEGER NOT NULL,
+        desde INTEGER NOT NULL,
+        ate INTEGER,
+        tipo TEXT NOT NULL,
+        nome TEXT NOT NULL,
+        fornecedor TEXT NOT NULL,
+        unidade TEXT NOT NULL,
+        custo_centavos INTEGER NOT NULL,
+        PRIMARY KEY (tenant, item_id, desde)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS catalog_snapshots (
+        tenant TEXT NOT NULL,
+        versao INTEGER NOT NULL,
+        itens BLOB NOT NULL,
+        PRIMARY KEY (tenant, versao)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS catalog_versions (
+        tenant TEXT NOT NULL,
+        versao INTEGER NOT NULL,
+        criado_em INTEGER NOT NULL,
+        mudancas INTEGER NOT NULL,
+        PRIMARY KEY (tenant, versao)
+    ) WITHOUT ROWID
+    """,
+)
+SQL_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_catalog_fornecedor ON catalog_items(tenant, fornecedor)",
+    "CREATE INDEX IF NOT EXISTS idx_catalog_versao ON catalog_items(tenant, versao)",
+    "CREATE INDEX IF NOT EXISTS idx_catalog_history_desde ON catalog_history(tenant, desde)",
+    "CREATE INDEX IF NOT EXISTS idx_catalog_history_ate ON catalog_history(tenant, ate)",
+    "CREATE INDEX IF NOT EXISTS idx_catalog_versions_data ON catalog_versions(tenant, criado_em)",
+)
+# Só mexe na linha (e na versão dela) se o valor mudou de fato: reimportar a mesma
+# planilha não cria versão nova nem histórico.
+SQL_UPSERT = (
+    "INSERT INTO catalog_items(tenant, tipo, nome, fornecedor, unidade, custo_centavos, atualizado_em, versao) "
+    "VALUES(?,?,?,?,?,?,?,?) "
+    "ON CONFLICT(tenant, tipo, nome, fornecedor) DO UPDATE SET "
+    "unidade=excluded.unidade, custo_centavos=excluded.custo_centavos, atualizado_em=excluded.atualizado_em, "
+    "versao=excluded.versao "
+    "WHERE unidade IS NOT excluded.unidade OR custo_centavos IS NOT excluded.custo_centavos"
+)
+COLUNAS = "id, tipo, nome, fornecedor, unidade, custo_centavos"
+SQL_CARREGAR = f"SELECT {COLUNAS} FROM catalog_items WHERE tenant=?"
+SQL_POR_CHAVE = f"SELECT {COLUNAS} FROM catalog_items WHERE tenant=? AND tipo=? AND nome=? AND fornecedor=?"
+SQL_DELETE = "DELETE FROM catalog_items WHERE tenant=? AND id=?"
+SQL_CONTAR = "SELECT COUNT(*) FROM catalog_items WHERE tenant=?"
+
+# Cópia na escrita, em SQL de conjunto: fecha o período vigente dos itens que a
+# versão mudou e abre um novo com os valores atuais.
+SQL_HIST_FECHAR = (
+    "UPDATE catalog_history SET ate=:v WHERE tenant=:t AND ate IS NULL AND item_id IN "
+    "(SELECT id FROM catalog_items WHERE tenant=:t AND versao=:v)"
+)
+SQL_HIST_ABRIR = (
+    "INSERT INTO catalog_history(tenant, item_id, desde, ate, tipo, nome, fornecedor, unidade, custo_centavos) "
+    "SELECT tenant, id, versao, NULL, tipo, nome, fornecedor, unidade, custo_centavos "
+    "FROM catalog_items WHERE tenant=:t AND versao=:v"
+)
+SQL_HIST_FECHAR_ITEM = "UPDATE catalog_history SET ate=? WHERE tenant=? AND item_id=? AND ate IS NULL"
+# Itens anteriores ao histórico (bancos antigos) entram como vigentes desde a versão deles
+SQL_HIST_INICIAR = (
+    "INSERT INTO catalog_history(tenant, item_id, desde, ate, tipo, nome, fornecedor, unidade, custo_centavos) "
+    "SELECT i.tenant, i.id, i.versao, NULL, i.tipo, i.nome, i.fornecedor, i.unidade, i.custo_centavos "
+    "FROM catalog_items i WHERE NOT EXISTS "
+    "(SELECT 1 FROM catalog_history h WHERE h.tenant=i.tenant AND h.item_id=i.id)"
+)
+HIST_COLUNAS = "item_id, tipo, nome, fornecedor, unidade, custo_centavos"
+# Linha de um item na versão V: a última que começou até V (se não foi fechada até V)
+SQL_HIST_EM = (
+    f"SELECT {HIST_COLUNAS}, ate FROM catalog_history "
+    "WHERE tenant=? AND item_id=? AND desde<=? ORDER BY desde DESC LIMIT 1"
+)
+SQL_HIST_ABERTOS = (
+    f"SELECT {HIST_COLUNAS} FROM catalog_history "
+    "WHERE tenant=? AND desde>? AND desde<=? AND (ate IS NULL OR ate>?)"
+)
+SQL_HIST_FECHADOS = "SELECT item_id FROM catalog_history WHERE tenant=? AND ate>? AND ate<=?"
+SQL_SNAPSHOT_ULTIMO = "SELECT versao, itens FROM catalog_snapshots WHERE tenant=? AND versao<=? ORDER BY versao DESC LIMIT 1"
+SQL_SNAPSHOT_VERSAO = "SELECT COALESCE(MAX(versao), -1) FROM catalog_snapshots WHERE tenant=?"
+SQL_SNAPSHOT_INSERT = "INSERT OR REPLACE INTO catalog_snapshots(tenant, versao, itens) VALUES(?,?,?)"
+SQL_VERSAO_INSERT = "INSERT INTO catalog_versions(tenant, versao, criado_em, mudancas) VALUES(?,?,?,?)"
+SQL_VERSAO_PENDENTES = "SELECT COALESCE(SUM(mudancas), 0) FROM catalog_versions WHERE tenant=? AND versao>?"
+SQL_VERSAO_EM_DATA = (
+    "SELECT versao FROM catalog_versions WHERE tenant=? AND criado_em<=? ORDER BY criado_em DESC, versao DESC LIMIT 1"
+)
+SQL_VERSOES = (
+    "SELECT versao, criado_em, mudancas FROM catalog_versions WHERE tenant=? AND versao<? "
+    "ORDER BY versao DESC LIMIT ?"
+)
+
+# material: custo por unidade; trabalho: valor da hora
+TIPOS = ("material", "trabalho")
+CAMPOS_CSV = ("tipo", "nome", "fornecedor", "unidade", "custo")
+
+# Atualização no lugar até este tamanho; acima (importação grande), reconstrói
+_MAX_INCREMENTAL = 500
+
+# Snapshot novo quando as mudanças desde o último passam de max(mínimo, itens/4):
+# a lista numa versão antiga lê no máximo ~1,25x o catálogo, e o espaço gasto com
+# snapshots cresce com as mudanças, não com o número de versões.
+SNAPSHOT_MIN_MUDANCAS = 1000
+
+
+class CatalogoErro(ValueError):
+    pass
+
+
+_COMBINANTES = re.compile("[\u0300-\u036f]")
+
+
+def normalizar(s: str) -> str:
+    # "Papel Cartão" -> "papel cartao" (busca sem acento e sem caixa)
+    s = s.lower()
+    if s.isascii():
+        return s
+    return _COMBINANTES.sub("", unicodedata.normalize("NFKD", s))
+
+
+def _ngramas(p: str):
+    # bigramas e trigramas: "contém" para termos de 2 letras ou mais
+    return {p[i:i + n] for n in (2, 3) for i in range(len(p) - n + 1)}
+
+
+def _versao_nome(tenant: str) -> str:
+    return f"catalog:{tenant}"
+
+
+def para_dict(row) -> dict:
+    id_, tipo, nome, fornecedor, unidade, custo = row
+    return {
+        "id": id_, "tipo": tipo, "nome": nome, "fornecedor": fornecedor, "unidade": unidade,
+        "custo": custo / CENT, "custo_centavos": custo, "custo_fmt": fmt_centavos(custo),
+    }
+
+
+_FIM_PREFIXO = "\U0010ffff"
+
+
+class _Indice:
+    """Índice em memória de um tenant. Não é thread-safe: o Catalogo protege com lock.
+
+    vocab: palavras distintas em ordem (o bisect acha as que começam com o termo);
+    ids: palavra -> itens com ela; ngramas: bigramas/trigramas do vocabulário
+    (bem menor que o catálogo) -> palavras que contêm o termo no meio."""
+
+    __slots__ = ("versao", "linhas", "texto", "vocab", "ids", "ngramas")
+
+    def __init__(self, versao: int, rows=()):
+        self.versao = versao
+        self.linhas: Dict[int, tuple] = {}
+        self.texto: Dict[int, str] = {}
+        linhas, textos = self.linhas, self.texto
+        ids = defaultdict(set)
+        for row in rows:
+            id_ = row[0]
+            linhas[id_] = row
+            textos[id_] = texto = normalizar(row[2] + " " + row[3])
+            for p in texto.split():
+                ids[p].add(id_)
+        self.ids: Dict[str, set] = dict(ids)
+        self.vocab: List[str] = sorted(ids)
+        self.ngramas: Dict[str, set] = {}
+        for p in self.vocab:
+            self._ngramas_add(p)
+
+    def _ngramas_add(self, p: str) -> None:
+        for g in _ngramas(p):
+            s = self.ngramas.get(g)
+            if s is None:
+                self.ngramas[g] = s = set()
+            s.add(p)
+
+    def colocar(self, row) -> None:
+        id_ = row[0]
+        self.tirar(id_)
+        texto = normalizar(f"{row[2]} {row[3]}")
+        self.linhas[id_] = row
+        self.texto[id_] = texto
+        for p in set(texto.split()):
+            s = self.ids.get(p)
+            if s is None:
+                self.ids[p] = s = set()
+                bisect.insort(self.vocab, p)
+                self._ngramas_add(p)
+            s.add(id_)
+
+    def tirar(self, id_: int) -> None:
+        texto = self.texto.pop(id_, None)
+        if texto is None:
+            return
+        del self.linhas[id_]
+        for p in set(texto.split()):
+            s = self.ids[p]
+            s.discard(id_)
+            if s:
+                continue
+            del self.ids[p]
+            del self.vocab[bisect.bisect_left(self.vocab, p)]
+            for g in _ngramas(p):
+                ps = self.ngramas[g]
+                ps.discard(p)
+                if not ps:
+                    del self.ngramas[g]
+
+    def _contendo(self, termo: str, prefixo: list) -> list:
+        # Palavras do vocabulário que contêm o termo (2+ letras) sem começar com ele
+        if len(termo) <= 3:
+            ps = self.ngramas.get(termo, ())  # o próprio termo é um n-grama indexado
+        else:
+            sets = sorted((self.ngramas.get(termo[i:i + 3], ()) for i in range(len(termo) - 2)), key=len)
+            ps = [p for p in sets[0].intersection(*sets[1:]) if termo in p] if sets[0] else ()
+        return list(set(ps).difference(prefixo)) if ps else []
+
+    def _prefixo(self, termo: str) -> list:
+        lo = bisect.bisect_left(self.vocab, termo)
+        return self.vocab[lo:bisect.bisect_left(self.vocab, termo + _FIM_PREFIXO, lo)]
+
+    def _varrer(self, guia: str, termos: list, prefixo: list, meio, limite: int, tipo: Optional[str]) -> list:
+        # Itens das palavras que começam com o termo guia (ordem alfabética), depois das
+        # que o têm no meio (`meio()` só é chamado se ainda faltar resultado). Para no
+        # limite. O guia já está no texto de todos; só os outros termos são conferidos.
+        outros = [" " + t if len(t) == 1 else t for t in termos if t != guia]  # 1 letra: início de palavra
+        espaco = " " if any(len(t) == 2 and t[0] == " " for t in outros) else ""
+        achados = []
+        vistos = set()
+        linhas, textos, ids = self.linhas, self.texto, self.ids
+        heap = None
+        i = 0
+        while True:
+            if i < len(prefixo):
+                p = prefixo[i]
+                i += 1
+            else:
+                if heap is None:
+                    heap = meio()
+                    heapq.heapify(heap)
+                if not heap:
+                    return achados
+                p = heapq.heappop(heap)
+            for id_ in ids[p]:
+                if id_ in vistos:
+                    continue
+                vistos.add(id_)
+                texto = espaco + textos[id_]
+                for t in outros:
+                    if t not in texto:
+                        break
+                else:
+                    row = linhas[id_]
+                    if tipo and row[1] != tipo:
+                        continue
+                    achados.append(row)
+                    if len(achados) >= limite:
+                        return achados
+
+    def buscar(self, q: str, limite: int, tipo: Optional[str] = None) -> list:
+        termos = normalizar(q).split()
+        if not termos:
+            return []
+        # Termos de 1 letra só valem por prefixo, e só guiam a busca se não houver outro
+        guias = [t for t in termos if len(t) >= 2] or termos
+        if len(guias) == 1:
+            t = guias[0]
+            prefixo = self._prefixo(t)
+            return self._varrer(t, termos, prefixo, lambda: self._contendo(t, prefixo) if len(t) >= 2 else [],
+                                limite, tipo)
+
+        # Vários termos: todo resultado contém todos. Parte do termo mais raro (menos
+        # itens), palavra a palavra na ordem do _varrer, em blocos que dobram de tamanho
+        # (acha logo quando quase tudo casa; quando quase nada casa, o trabalho vai para
+        # as interseções de sets, em C) cortados pelos outros termos; para no limite.
+        ids = self.ids
+        planos = []
+        for t in guias:
+            prefixo = self._prefixo(t)
+            meio = self._contendo(t, prefixo)
+            palavras = prefixo + sorted(meio)
+            planos.append((sum(map(len, map(ids.__getitem__, palavras))), t, palavras))
+        planos.sort(key=lambda x: x[0])
+        if not planos[0][0]:
+            return []
+        _custo, guia, palavras = planos[0]
+        filtros = [(t, ps) for _c, t, ps in planos[1:]]
+        curtos = [" " + t for t in termos if t not in guias]  # 1 letra: início de palavra
+        achados = []
+        vistos = set()
+        linhas, textos = self.linhas, self.texto
+        fonte = chain.from_iterable(map(ids.__getitem__, palavras))
+        tam = 32
+        while True:
+            lista = list(islice(fonte, tam))
+            if not lista:
+                return achados
+            tam = min(tam * 2, 1 << 16)
+            bloco = set(lista)
+            bloco -= vistos
+            vistos |= bloco
+            for t, ps in filtros:
+                if not bloco:
+                    break
+                bloco = self._com_termo(bloco, t, ps)
+            if not bloco:
+                continue
+            for id_ in lista:  # na ordem das palavras do guia (prefixo antes do meio)
+                if id_ not in bloco:
+                    continue
+                bloco.discard(id_)
+                if curtos:
+                    texto = " " + textos[id_]
+                    if not all(t in texto for t in curtos):
+                        continue
+                row = linhas[id_]
+                if tipo and row[1] != tipo:
+                    continue
+                achados.append(row)
+                if len(achados) >= limite:
+                    return achados
+
+    def _com_termo(self, bloco: set, termo: str, palavras: list) -> set:
+        # Itens do bloco com alguma das `palavras` (as que contêm `termo`). Bloco
+        # pequeno: confere no texto; senão, uma interseção por palavra.
+        if len(bloco) <= len(palavras):
+            textos = self.texto
+            if len(termo) == 1:  # 1 letra: só início de palavra
+                termo = " " + termo
+                return {i for i in bloco if termo in " " + textos[i]}
+            return {i for i in bloco if termo in textos[i]}
+        ids = self.ids
+        if len(palavras) == 1:
+            return bloco & ids[palavras[0]]
+        achou = set()
+        for p in palavras:
+            achou |= bloco & ids[p]
+        return achou
+
+
+class Catalogo:
+    def __init__(self, pool, writer):
+        self.pool = pool
+        self.writer = writer
+        self._indices: Dict[str, _Indice] = {}
+        self._lock = threading.Lock()
+        self._stats = {"reconstrucoes": 0, "incrementais": 0, "snapshots": 0}
+
+    def init(self) -> None:
+        conn = self.pool.get()
+        with conn:
+            conn.execute(SQL_TABLE)
+            garantir_coluna(conn, "catalog_items", "versao", "INTEGER NOT NULL DEFAULT 0")
+            for sql in SQL_HISTORY + SQL_INDEXES:
+                conn.execute(sql)
+            conn.execute(SQL_HIST_INICIAR)
+        init_versoes(conn)
+
+    def _indice(self, tenant: str) -> _Indice:
+        conn = self.pool.get()
+        v = versao(conn, _versao_nome(tenant))
+        idx = self._indices.get(tenant)
+        if idx is not None and idx.versao == v:
+            return idx
+        # Reconstrói: primeira busca do tenant, ou outro processo mexeu no catálogo
+        cur = conn.cursor()
+        cur.row_factory = None  # tuplas: bem mais leves que sqlite3.Row para 100k itens
+        rows = cur.execute(SQL_CARREGAR, (tenant,)).fetchall()
+        idx = _Indice(v, rows)
+        with self._lock:
+            atual = self._indices.get(tenant)
+            if atual is None or atual.versao <= v:
+                self._indices[tenant] = idx
+        self._stats["reconstrucoes"] += 1
+        return idx
+
+    def buscar(self, tenant: str, q: str, limite: int = 10, tipo: Optional[str] = None) -> List[dict]:
+        idx = self._indice(tenant)
+        with self._lock:
+            rows = idx.buscar(q, limite, tipo)
+        return [para_dict(r) for r in rows]
+
+    def obter(self, tenant: str, id_: int) -> Optional[dict]:
+        row = self._indice(tenant).linhas.get(id_)
+        return para_dict(row) if row else None
+
+    def _aplicar(self, tenant: str, anterior: int, nova: int, colocar=(), tirar=()) -> None:
+        # Depois do commit: se o índice estava exatamente na versão anterior à nossa
+        # escrita, aplica a mudança nele; senão descarta (a próxima busca reconstrói).
+        with self._lock:
+            idx = self._indices.get(tenant)
+            if idx is None:
+                return
+            if idx.versao != anterior or colocar is None:
+                del self._indices[tenant]
+                return
+            for id_ in tirar:
+                idx.tirar(id_)
+            for row in colocar:
+                idx.colocar(row)
+            idx.versao = nova
+        self._stats["incrementais"] += 1
+
+    def salvar(self, tenant: str, itens: List[dict]) -> int:
+        """Insere/atualiza (chave: tipo + nome + fornecedor) numa transação só, com
+        executemany. itens: dicts com tipo, nome, fornecedor, unidade, custo (R$)."""
+        agora = int(time.time())
+        params = []
+        for i, it in enumerate(itens):
+            tipo = it.get("tipo") or "material"
+            if tipo not in TIPOS:
+                raise CatalogoErro(f"item {i}: tipo deve ser {' ou '.join(TIPOS)}")
+            nome = str(it.get("nome") or "").strip()
+            if not nome:
+                raise CatalogoErro(f"item {i}: nome obrigatório")
+            try:
+                custo = _escala(it.get("custo") or 0, CENT)
+            except ValueError as e:
+                raise CatalogoErro(f"item {i}: custo: {e}")
+            params.append((
+                tenant, tipo, nome, str(it.get("fornecedor") or "").strip(), str(it.get("unidade") or "").strip(),
+                custo, agora,
+            ))
+        if not params:
+            return 0
+        nome_v = _versao_nome(tenant)
+
+        def job(conn):
+            anterior = versao(conn, nome_v)
+            nova = anterior + 1
+            antes = conn.total_changes
+            conn.executemany(SQL_UPSERT, [p + (nova,) for p in params])
+            if conn.total_changes == antes:
+                return anterior, anterior, None  # nada mudou: sem versão nova
+            conn.execute(SQL_HIST_FECHAR, {"t": tenant, "v": nova})
+            mudancas = conn.execute(SQL_HIST_ABRIR, {"t": tenant, "v": nova}).rowcount
+            self._nova_versao(conn, tenant, nova, agora, mudancas)
+            rows = None
+            if len(params) <= _MAX_INCREMENTAL:
+                rows = [tuple(conn.execute(SQL_POR_CHAVE, p[:4]).fetchone()) for p in params]
+            return anterior, nova, rows
+
+        anterior, nova, rows = self.writer.submit(job).result(self.writer.espera)
+        if nova != anterior:
+            self._aplicar(tenant, anterior, nova, colocar=rows)
+        return len(params)
+
+    def _nova_versao(self, conn, tenant: str, nova: int, agora: int, mudancas: int) -> None:
+        # Dentro da transação da escrita: contador, registro da versão e, se já
+        # acumulou mudanças suficientes, um snapshot do catálogo inteiro.
+        bump_versao(conn, _versao_nome(tenant))
+        conn.execute(SQL_VERSAO_INSERT, (tenant, nova, agora, mudancas))
+        ultimo = conn.execute(SQL_SNAPSHOT_VERSAO, (tenant,)).fetchone()[0]
+        pendentes = conn.execute(SQL_VERSAO_PENDENTES, (tenant, ultimo)).fetchone()[0]
+        if pendentes < SNAPSHOT_MIN_MUDANCAS:
+            return
+        idx = self._indices.get(tenant)
+        total = len(idx.linhas) if idx is not None else conn.execute(SQL_CONTAR, (tenant,)).fetchone()[0]
+        if pendentes < total // 4:
+            return
+        cur = conn.cursor()
+        cur.row_factory = None
+        rows = cur.execute(SQL_CARREGAR, (tenant,)).fetchall()
+        dados = zlib.compress(json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode())
+        conn.execute(SQL_SNAPSHOT_INSERT, (tenant, nova, dados))
+        self._stats["snapshots"] += 1
+
+    def importar_csv(self, tenant: str, texto: str, limite: int) -> int:
+        """CSV com cabeçalho tipo;nome;fornecedor;unidade;custo (só nome e custo são
+        obrigatórios; "," ou ";" como separador, números em pt-BR)."""
+        amostra = texto[:2048]
+        delim = ";" if amostra.count(";") > amostra.count(",") else ","
+        reader = csv.reader(io.StringIO(texto), delimiter=delim)
+        try:
+            header = [normalizar(h.strip()) for h in next(reader)]
+        except StopIteration:
+            raise CatalogoErro("CSV vazio.")
+        idx = {c: header.index(c) for c in CAMPOS_CSV if c in header}
+        if "nome" not in idx or "custo" not in idx:
+            raise CatalogoErro("CSV precisa das colunas 'nome' e 'custo'.")
+        itens = []
+        linha = 1
+        try:
+            for linha, row in enumerate(reader, start=2):
+                if not row:
+                    continue
+                if len(itens) >= limite:
+                    raise CatalogoErro(f"Máximo de {limite} itens por importação.")
+                it = {c: row[i].strip() for c, i in idx.items()}
+                it["custo"] = parse_num(it["custo"])
+                # Mesmas regras do JSON (schema.CATALOGO_ITEM): custo finito, 0 a 1e9;
+                # coluna opcional em branco fica com o padrão
+                it, erros = validar(CATALOGO_ITEM, {c: v for c, v in it.items() if v != "" or c == "nome"})
+                if erros:
+                    raise CatalogoErro(f"Linha {linha}: {'; '.join(erros)}")
+                itens.append(it)
+        except (IndexError, ValueError) as e:
+            if isinstance(e, CatalogoErro):
+                raise
+            raise CatalogoErro(f"Linha {linha}: {e}")
+        try:
+            return self.salvar(tenant, itens)
+        except CatalogoErro as e:
+            raise CatalogoErro(f"CSV, {e}")
+
+    def remover(self, tenant: str, id_: int) -> bool:
+        nome_v = _versao_nome(tenant)
+
+        def job(conn):
+            anterior = versao(conn, nome_v)
+            n = conn.execute(SQL_DELETE, (tenant, id_)).rowcount
+            if not n:
+                return n, anterior, anterior
+            nova = anterior + 1
+            conn.execute(SQL_HIST_FECHAR_ITEM, (nova, tenant, id_))
+            self._nova_versao(conn, tenant, nova, int(time.time()), 1)
+            return n, anterior, nova
+
+        n, anterior, nova = self.writer.submit(job).result(self.writer.espera)
+        if n:
+            self._aplicar(tenant, anterior, nova, tirar=(id_,))
+        return bool(n)
+
+    # ---- versões ----
+
+    def versao_atual(self, tenant: str) -> int:
+        return versao(self.pool.get(), _versao_nome(tenant))
+
+    def _checar_versao(self, tenant: str, v: int) -> None:
+        atual = self.versao_atual(tenant)
+        if v < 0 or v > atual:
+            raise CatalogoErro(f"versão {v} não existe (atual: {atual})")
+
+    def obter_em(self, tenant: str, id_: int, v: int) -> Optional[dict]:
+        """O item como estava na versão v (None se não existia ou já tinha saído)."""
+        row = self.pool.get().execute(SQL_HIST_EM, (tenant, id_, v)).fetchone()
+        if row is None or (row[6] is not None and row[6] <= v):
+            return None
+        return para_dict(tuple(row)[:6])
+
+    def obter_varios(self, tenant: str, ids: Iterable[int], v: Optional[int] = None) -> Dict[int, dict]:
+        """{id: item} na versão v (padrão: atual). Na versão do índice em memória, lê
+        dele; numa antiga, uma busca por item no histórico."""
+        idx = self._indice(tenant)
+        if v is None or v == idx.versao:
+            linhas = idx.linhas
+            return {i: para_dict(linhas[i]) for i in set(ids) if i in linhas}
+        self._checar_versao(tenant, v)
+        itens = {}
+        for i in set(ids):
+            item = self.obter_em(tenant, i, v)
+            if item is not None:
+                itens[i] = item
+        return itens
+
+    def listar_em(self, tenant: str, v: int) -> List[dict]:
+        """O catálogo inteiro na versão v: snapshot mais próximo (<= v) + delta."""
+        idx = self._indice(tenant)
+        if v == idx.versao:
+            with self._lock:
+                rows = list(idx.linhas.values())
+        else:
+            self._checar_versao(tenant, v)
+            conn = self.pool.get()
+            cur = conn.cursor()
+            cur.row_factory = None
+            snap = cur.execute(SQL_SNAPSHOT_ULTIMO, (tenant, v)).fetchone()
+            if snap is None:
+                base, itens = -1, {}
+            else:
+                base = snap[0]
+                itens = {r[0]: tuple(r) for r in json.loads(zlib.decompress(snap[1]))}
+            # Saiu ou mudou entre o snapshot e v: tira; o que vale em v (e começou
+            # depois do snapshot) entra por cima.
+            for (id_,) in cur.execute(SQL_HIST_FECHADOS, (tenant, base, v)):
+                itens.pop(id_, None)
+            for row in cur.execute(SQL_HIST_ABERTOS, (tenant, base, v, v)):
+                itens[row[0]] = row
+            rows = list(itens.values())
+        rows.sort()
+        return [para_dict(r) for r in rows]
+
+    def versao_em_data(self, tenant: str, quando: int) -> int:
+        """Versão vigente no instante `quando` (epoch); 0 = antes de qualquer escrita."""
+        row = self.pool.get().execute(SQL_VERSAO_EM_DATA, (tenant, int(quando))).fetchone()
+        return row[0] if row else 0
+
+    def versoes(self, tenant: str, limite: int = 50, antes: Optional[int] = None) -> List[dict]:
+        """Mais recentes primeiro; `antes` pagina (keyset pela própria versão)."""
+        antes = self.versao_atual(tenant) + 1 if antes is None else antes
+        rows = self.pool.get().execute(SQL_VERSOES, (tenant, antes, limite)).fetchall()
+        return [{"versao": r[0], "criado_em": r[1], "mudancas": r[2]} for r in rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            itens = sum(len(i.linhas) for i in self._indices.values())
+            return dict(self._stats, tenants=len(self._indices), itens=itens)
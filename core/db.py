@@ -0,0 +1,145 @@
+# core/db.py
+import os
+import sqlite3
+import threading
+
+# Banco padrão: artepreco.db na raiz do app (ao lado de app_web.py); ARTEPRECO_DB troca
+DEFAULT_DB_PATH = os.environ.get(
+    "ARTEPRECO_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "artepreco.db"),
+)
+
+# Pragmas aplicados em toda conexão nova.
+# WAL: leitores não bloqueiam o escritor; synchronous=NORMAL: fsync só no checkpoint.
+DEFAULT_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("busy_timeout", "5000"),
+    ("temp_store", "MEMORY"),
+    ("mmap_size", str(64 * 1024 * 1024)),
+    ("cache_size", "-8000"),  # ~8 MB (valor negativo = KiB)
+)
+
+# Tamanho do cache de statements preparados por conexão (sqlite3 reaproveita
+# o statement compilado sempre que o MESMO texto SQL é executado de novo).
+STATEMENT_CACHE = 128
+
+
+class ConnectionPool:
+    """Uma conexão SQLite por thread (e por processo), reaproveitada entre requests."""
+
+    def __init__(self, path: str, pragmas=DEFAULT_PRAGMAS):
+        self.path = path
+        self.pragmas = tuple(pragmas)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns = []
+        self._pid = os.getpid()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=5.0,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE,
+        )
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas:
+            conn.execute(f"PRAGMA {name}={value}")
+        with self._lock:
+            self._conns.append(conn)
+        return conn
+
+    def _check_fork(self) -> None:
+        # Depois de um fork (gunicorn --preload), conexões herdadas não podem ser usadas.
+        pid = os.getpid()
+        if pid != self._pid:
+            with self._lock:
+                self._conns = []
+                self._pid = pid
+            self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        self._check_fork()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    def discard(self) -> None:
+        # Fecha e esquece a conexão da thread atual (a próxima get() reabre).
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is None:
+            return
+        with self._lock:
+            if conn in self._conns:
+                self._conns.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def health(self) -> dict:
+        # Health check: SELECT 1 na conexão da thread; se falhar, reabre uma vez.
+        for attempt in (1, 2):
+            try:
+                conn = self.get()
+                conn.execute("SELECT 1").fetchone()
+                mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+                return {"ok": True, "path": self.path, "journal_mode": mode, "connections": len(self._conns)}
+            except sqlite3.Error as e:
+                self.discard()
+                if attempt == 2:
+                    return {"ok": False, "path": self.path, "error": str(e)}
+        return {"ok": False, "path": self.path}
+
+    def close_all(self) -> None:
+        with self._lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+# Contadores de versão por "área" (kv, perfis de empresa...). Quem grava incrementa
+# na mesma transação; os caches em memória comparam o número para saber se OUTRO
+# processo mudou aquela área. (PRAGMA data_version muda com QUALQUER commit de outra
+# conexão — inclusive a do writer gravando auditoria — e esvaziaria o cache à toa.)
+SQL_VERSOES_TABLE = """
+    CREATE TABLE IF NOT EXISTS cache_versions (
+        nome TEXT PRIMARY KEY,
+        n INTEGER NOT NULL
+    ) WITHOUT ROWID
+"""
+SQL_VERSAO_GET = "SELECT n FROM cache_versions WHERE nome=?"
+SQL_VERSAO_BUMP = "INSERT INTO cache_versions(nome, n) VALUES(?, 1) ON CONFLICT(nome) DO UPDATE SET n=n+1"
+
+
+def init_versoes(conn: sqlite3.Connection) -> None:
+    with conn:
+        conn.execute(SQL_VERSOES_TABLE)
+
+
+def versao(conn: sqlite3.Connection, nome: str) -> int:
+    row = conn.execute(SQL_VERSAO_GET, (nome,)).fetchone()
+    return row[0] if row else 0
+
+
+def bump_versao(conn: sqlite3.Connection, nome: str) -> None:
+    # Chame dentro da transação da escrita
+    conn.execute(SQL_VERSAO_BUMP, (nome,))
+
+
+def garantir_coluna(conn: sqlite3.Connection, tabela: str, coluna: str, definicao: str) -> bool:
+    """Migração simples: ALTER TABLE ADD COLUMN se a coluna ainda não existe
+    (bancos criados antes dela). Retorna True se adicionou."""
+    colunas = {r[1] for r in conn.execute(f"PRAGMA table_info({tabela})")}
+    if coluna in colunas:
+        return False
+    conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}")
+    return True
@@ -0,0 +1,249 @@
+# core/export.py
+# Exportação em lote: N orçamentos -> N PDFs (em paralelo, um processo por núcleo)
+# -> um ZIP escrito aos pedaços, conforme cada PDF fica pronto.
+# Um item com erro não derruba o lote: vai para "erros.csv" dentro do ZIP.
+#
+# Uso (linha de comando):
+#   python -m core.export itens.json -o orcamentos.zip [--empresa empresa.json] [-j 8]
+import argparse
+import atexit
+import csv
+import io
+import json
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import unicodedata
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from core.pricing import CalcInput, calcular
+from core.pricing_batch import CAMPOS_NUM, parse_num
+from core.quote_pdf import gerar_pdf_bytes
+
+
+def _slug(s: str) -> str:
+    s = unicodedata.normalize("NFKD", s or "").encode("ascii", "ignore").decode("ascii")
+    s = re.sub(r"[^A-Za-z0-9]+", "-", s).strip("-").lower()
+    return s[:40] or "orcamento"
+
+
+def _orcamento_de_item(idx: int, item: dict, empresa_padrao: dict):
+    if not isinstance(item, dict):
+        raise ValueError("objeto esperado")
+    nums = [parse_num(item.get(c, 0)) for c in CAMPOS_NUM]
+    ci = CalcInput(str(item.get("produto", "")), *nums, int(parse_num(item.get("validade_dias", 7))))
+    empresa = item.get("empresa") or empresa_padrao or {}
+    cliente = item.get("cliente") or {}
+    nome = f"{idx + 1:05d}-{_slug(item.get('arquivo') or ci.produto)}.pdf"
+    return nome, empresa, cliente, ci
+
+
+def _render(job):
+    # Roda no processo filho: qualquer erro volta como texto, nunca como exceção
+    idx, item, empresa_padrao, compress = job
+    try:
+        nome, empresa, cliente, ci = _orcamento_de_item(idx, item, empresa_padrao)
+        return idx, nome, gerar_pdf_bytes(empresa, cliente, ci, calcular(ci), compress=compress), None
+    except Exception as e:
+        return idx, None, None, f"{type(e).__name__}: {e}"
+
+
+# ------------------------------------------------------------
+# Pool do servidor: um só por processo, criado no primeiro uso
+# ------------------------------------------------------------
+# Os requests de exportação dividem o mesmo pool (o total de processos não cresce
+# com o número de requests). Os filhos saem do forkserver (ou spawn), nunca de um
+# fork do servidor: fork com threads vivas (writer, locks do pool de conexões)
+# pode herdar um lock travado e o filho fica parado para sempre.
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def _contexto():
+    metodos = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in metodos else "spawn")
+
+
+def pool_compartilhado(workers: int):
+    """O ProcessPoolExecutor do processo (None se não houver multiprocessing)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            try:
+                _POOL = ProcessPoolExecutor(max_workers=max(1, workers), mp_context=_contexto())
+            except (OSError, NotImplementedError, ValueError):
+                return None
+        return _POOL
+
+
+def _descartar_pool(pool) -> None:
+    # Um filho morreu (ex.: OOM): o executor fica "broken"; o próximo uso cria outro
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is pool:
+            _POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def _fechar_pool() -> None:
+    if _POOL is not None:
+        _POOL.shutdown(wait=False, cancel_futures=True)
+
+
+def renderizar(itens, empresa_padrao=None, workers=None, compress: bool = True, pool=None):
+    """Gera (idx, nome, pdf_bytes, erro) na ordem em que os PDFs ficam prontos.
+
+    No máximo 2 x workers itens ficam em voo, então a entrada pode ser um iterador grande.
+    `pool`: executor já existente (ex.: pool_compartilhado()); sem ele, cria um só para
+    esta exportação (linha de comando).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    jobs = ((i, item, empresa_padrao, compress) for i, item in enumerate(itens))
+
+    proprio = None
+    if pool is None and workers > 1:
+        try:
+            proprio = pool = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError):
+            pass  # ambiente sem multiprocessing (ex.: alguns serverless): segue em série
+
+    if pool is None or workers <= 1:
+        for job in jobs:
+            yield _render(job)
+        return
+
+    pending = {}
+    try:
+        for job in jobs:
+            try:
+                fut = pool.submit(_render, job)
+            except BrokenProcessPool:
+                if proprio is None:
+                    _descartar_pool(pool)
+                yield _render(job)  # o resto do lote segue em série neste processo
+                for job in jobs:
+                    yield _render(job)
+                break
+            pending[fut] = job[0]
+            if len(pending) >= 2 * workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield _resultado(fut, pending.pop(fut), None if proprio else pool)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield _resultado(fut, pending.pop(fut), None if proprio else pool)
+    finally:
+        for fut in pending:
+            fut.cancel()  # cliente desistiu do download: não gera o resto
+        if proprio is not None:
+            proprio.shutdown()
+
+
+def _resultado(fut, idx: int, pool=None):
+    try:
+        return fut.result()
+    except Exception as e:  # processo filho morreu, item não serializável etc.
+        if pool is not None and isinstance(e, BrokenProcessPool):
+            _descartar_pool(pool)
+        return idx, None, None, f"{type(e).__name__}: {e}"
+
+
+class _Pedacos:
+    # Destino "sem seek" para o ZipFile: acumula os bytes até alguém pegar
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _erros_csv(erros) -> str:
+    buf = io.StringIO()
+    w = csv.writer(buf, delimiter=";")
+    w.writerow(["item", "erro"])
+    for idx, erro in sorted(erros):
+        w.writerow([idx + 1, erro])
+    return buf.getvalue()
+
+
+def exportar_zip_stream(itens, empresa_padrao=None, workers=None, compress: bool = True, progresso=None,
+                        pool=None):
+    """Generator de bytes do ZIP. `progresso(feitos, total, erros)` é chamado a cada PDF."""
+    total = len(itens) if hasattr(itens, "__len__") else None
+    sink = _Pedacos()
+    erros = []
+    feitos = 0
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as zf:
+        for idx, nome, pdf, erro in renderizar(itens, empresa_padrao, workers, compress, pool):
+            feitos += 1
+            if erro is not None:
+                erros.append((idx, erro))
+            else:
+                zf.writestr(nome, pdf)
+            if progresso is not None:
+                progresso(feitos, total, len(erros))
+            data = sink.take()
+            if data:
+                yield data
+        if erros:
+            zf.writestr("erros.csv", _erros_csv(erros))
+    yield sink.take()
+
+
+def exportar_zip(itens, out, **kw) -> None:
+    for data in exportar_zip_stream(itens, **kw):
+        out.write(data)
+
+
+def _ler_itens(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        data = json.load(f)
+    return data.get("itens", []) if isinstance(data, dict) else data
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Gera um ZIP com os PDFs de vários orçamentos.")
+    ap.add_argument("entrada", help="JSON (lista ou {'itens': [...]}) ou JSONL com os orçamentos")
+    ap.add_argument("-o", "--saida", default="orcamentos.zip")
+    ap.add_argument("--empresa", help="JSON com os dados da empresa (padrão para os itens)")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="processos (padrão: núcleos)")
+    ap.add_argument("--sem-compressao", action="store_true", help="não comprime o conteúdo dos PDFs")
+    args = ap.parse_args(argv)
+
+    itens = _ler_itens(args.entrada)
+    empresa = None
+    if args.empresa:
+        with open(args.empresa, "r", encoding="utf-8") as f:
+            empresa = json.load(f)
+
+    def progresso(feitos, total, n_erros):
+        sys.stderr.write(f"\r{feitos}/{total} PDFs ({n_erros} erro(s))")
+        sys.stderr.flush()
+
+    with open(args.saida, "wb") as out:
+        exportar_zip(itens, out, empresa_padrao=empresa, workers=args.workers,
+                     compress=not args.sem_compressao, progresso=progresso)
+    sys.stderr.write(f"\nZIP gravado em {args.saida}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
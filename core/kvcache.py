@@ -0,0 +1,111 @@
+# core/kvcache.py
+import threading
+import time
+from collections import OrderedDict
+
+# Marca "chave não existe no banco" (também é cacheado, para não ir ao SQLite toda vez).
+MISSING = object()
+
+
+class KVCache:
+    """Cache LRU limitado, com TTL, na frente da tabela kv.
+
+    Invalidação entre processos fica a cargo de quem usa: basta chamar
+    `sync(token, version)` com um contador que muda quando outro processo
+    grava (ex.: PRAGMA data_version da conexão).
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self._visto = None  # último (token, versão) visto por este processo
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def epoch(self) -> int:
+        # Use antes de ler do banco e passe para put(): evita gravar no cache um
+        # valor que ficou velho porque alguém escreveu no meio da leitura.
+        return self._epoch
+
+    def get(self, k: str):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(k)
+            if item is None:
+                self.misses += 1
+                return MISSING, False
+            v, expires = item
+            if expires < now:
+                del self._data[k]
+                self.misses += 1
+                return MISSING, False
+            self._data.move_to_end(k)
+            self.hits += 1
+            return v, True
+
+    def put(self, k: str, v, epoch=None) -> None:
+        with self._lock:
+            if epoch is not None and epoch != self._epoch:
+                return
+            self._data[k] = (v, time.monotonic() + self.ttl)
+            self._data.move_to_end(k)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def set(self, k: str, v) -> None:
+        # Write-through: quem gravou no banco atualiza o cache na hora.
+        with self._lock:
+            self._epoch += 1
+        self.put(k, v)
+
+    def invalidate(self, k=None) -> None:
+        with self._lock:
+            self._epoch += 1
+            self.invalidations += 1
+            if k is None:
+                self._data.clear()
+            else:
+                self._data.pop(k, None)
+
+    def sync(self, token, version) -> None:
+        # Chamado antes de ler, com a versão atual do banco. O último valor visto é do
+        # processo, não da thread: o servidor atende cada request numa thread qualquer
+        # (às vezes nova), e a primeira olhada dela também precisa ver a mudança.
+        current = (token, version)
+        with self._lock:
+            if self._visto == current:
+                return
+            mudou = self._visto is not None
+            self._visto = current
+            if mudou:
+                self._epoch += 1
+                self.invalidations += 1
+                self._data.clear()
+
+    def avancar(self, token, antes, depois) -> None:
+        # Escrita DESTE processo levou a versão de `antes` a `depois`, sem outra no meio
+        # (lido na mesma transação): o cache continua valendo, quem gravou já atualizou
+        # a própria chave (set). Se o cache não estava em `antes`, o próximo sync limpa.
+        with self._lock:
+            if self._visto == (token, antes):
+                self._visto = (token, depois)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / total) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
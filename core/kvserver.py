@@ -0,0 +1,128 @@
+# core/kvserver.py
+# Servidor chave-valor local que fala o protocolo do Redis (RESP), só com os
+# comandos que o app usa. Serve para testar/desenvolver o backend redis:// sem
+# instalar um Redis de verdade.
+#
+# Uso:
+#   python -m core.kvserver --porta 6380
+#   ARTEPRECO_KV_URL=redis://127.0.0.1:6380/0 python app_web.py
+import argparse
+import socketserver
+import sys
+import threading
+
+
+class _Estado:
+    def __init__(self):
+        self.bancos = {}
+        self.lock = threading.Lock()
+
+    def banco(self, n: int) -> dict:
+        return self.bancos.setdefault(n, {})
+
+
+def _bulk(v) -> bytes:
+    if v is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(v), v)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _ler_comando(self):
+        linha = self.rfile.readline()
+        if not linha:
+            return None
+        if not linha.startswith(b"*"):
+            return linha.split()  # comando inline (ex.: "PING" via telnet)
+        args = []
+        for _ in range(int(linha[1:])):
+            n = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(n + 2)[:-2])
+        return args
+
+    def handle(self):
+        estado = self.server.estado
+        db = 0
+        while True:
+            args = self._ler_comando()
+            if args is None:
+                return
+            if not args:
+                continue
+            cmd = args[0].upper()
+            with estado.lock:
+                dados = estado.banco(db)
+                if cmd == b"PING":
+                    out = b"+PONG\r\n"
+                elif cmd == b"GET" and len(args) == 2:
+                    out = _bulk(dados.get(args[1]))
+                elif cmd == b"MGET" and len(args) >= 2:
+                    out = b"*%d\r\n" % (len(args) - 1) + b"".join(_bulk(dados.get(k)) for k in args[1:])
+                elif cmd == b"SET" and len(args) == 3:
+                    dados[args[1]] = args[2]
+                    out = b"+OK\r\n"
+                elif cmd == b"DEL" and len(args) >= 2:
+                    out = b":%d\r\n" % sum(dados.pop(k, None) is not None for k in args[1:])
+                elif cmd == b"INCR" and len(args) == 2:
+                    try:
+                        n = int(dados.get(args[1], b"0")) + 1
+                    except ValueError:
+                        out = b"-ERR value is not an integer\r\n"
+                    else:
+                        dados[args[1]] = str(n).encode()
+                        out = b":%d\r\n" % n
+                elif cmd == b"SELECT" and len(args) == 2:
+                    db = int(args[1])
+                    out = b"+OK\r\n"
+                elif cmd == b"AUTH":
+                    out = b"+OK\r\n"
+                elif cmd == b"DBSIZE":
+                    out = b":%d\r\n" % len(dados)
+                elif cmd == b"FLUSHDB":
+                    dados.clear()
+                    out = b"+OK\r\n"
+                elif cmd == b"QUIT":
+                    self.wfile.write(b"+OK\r\n")
+                    return
+                else:
+                    out = b"-ERR unknown command '%s'\r\n" % args[0]
+            self.wfile.write(out)
+
+
+class KVServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, endereco=("127.0.0.1", 6380)):
+        super().__init__(endereco, _Handler)
+        self.estado = _Estado()
+
+    @property
+    def porta(self) -> int:
+        return self.server_address[1]
+
+    def iniciar(self) -> threading.Thread:
+        """Sobe em segundo plano (porta 0 = qualquer porta livre; veja .porta)."""
+        t = threading.Thread(target=self.serve_forever, name="artepreco-kvserver", daemon=True)
+        t.start()
+        return t
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Servidor chave-valor local (protocolo Redis) para testes.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--porta", type=int, default=6380)
+    args = ap.parse_args(argv)
+    srv = KVServer((args.host, args.porta))
+    sys.stderr.write(f"kvserver em {args.host}:{srv.porta}\n")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+# core/kvstore.py
+# Onde a tabela kv mora (chave ativada, dados da empresa). Três backends com a
+# mesma interface, escolhidos por ARTEPRECO_KV_URL:
+#
+#   sqlite://                        (padrão) tabela kv no banco do app (ARTEPRECO_DB),
+#                                    escrita via writer; ?sync_ms= como no redis://
+#                                    (padrão 100)
+#   memory://                        dict em memória (testes, benchmarks)
+#   redis://host:6379/0              servidor chave-valor compartilhado (protocolo
+#                                    Redis/RESP), com pool de conexões — vários
+#                                    workers/instâncias enxergam os mesmos dados.
+#   redis://host:6379/0?sync_ms=250  idem, conferindo a versão a cada 250 ms
+#
+# O contador de versão é lido no máximo a cada sync_ms (redis:// padrão 1000, sqlite://
+# padrão 100): depois que OUTRO processo grava, este pode servir o valor antigo do
+# KVCache por até sync_ms. sync_ms=0 confere a cada leitura (uma consulta a mais por
+# leitura em cache). A escrita do próprio processo não invalida nada: set() chama
+# gravado(token, antes, depois) e o KVCache.avancar segue com o cache como está.
+#
+# Interface: init(), get(k) -> str ou None, set(k, v, gravado=None), versao() ->
+# (token, versão) para o KVCache invalidar quando outro processo gravou, health(), close().
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qs, unquote, urlparse
+
+from core.db import bump_versao, init_versoes, versao
+
+SQL_KV_TABLE = """
+    CREATE TABLE IF NOT EXISTS kv (
+        k TEXT PRIMARY KEY,
+        v TEXT
+    )
+"""
+SQL_KV_GET = "SELECT v FROM kv WHERE k=?"
+SQL_KV_SET = "INSERT INTO kv(k,v) VALUES(?,?) ON CONFLICT(k) DO UPDATE SET v=excluded.v"
+
+
+class KVErro(RuntimeError):
+    pass
+
+
+class _Versionado:
+    # Versão lida no máximo a cada self.sync segundos; a escrita própria avança a
+    # versão guardada sem reler (e sem contar como mudança para o KVCache)
+    sync = 0.0
+    _versao = (0.0, None)
+
+    def _versao_lida(self, ler) -> int:
+        lido_em, v = self._versao
+        agora = time.monotonic()
+        if v is None or agora - lido_em >= self.sync:
+            v = ler()
+            self._versao = (agora, v)
+        return v
+
+    def _propria(self, token, antes: int, gravado=None) -> None:
+        lido_em, v = self._versao
+        if v == antes:
+            self._versao = (lido_em, antes + 1)
+        if gravado is not None:
+            gravado(token, antes, antes + 1)
+
+
+class SQLiteKV(_Versionado):
+    """Tabela kv no SQLite. set() vai para o writer (core/writer.py); até o commit,
+    o valor fica num overlay em memória para a leitura já enxergar o valor novo."""
+
+    def __init__(self, pool, writer, sync_ms: float = 100):
+        self.pool = pool
+        self.writer = writer
+        self.sync = sync_ms / 1000.0
+        self._pendente = {}
+        self._lock = threading.Lock()
+
+    def init(self) -> None:
+        conn = self.pool.get()
+        with conn:
+            conn.execute(SQL_KV_TABLE)
+        init_versoes(conn)
+
+    def get(self, k: str):
+        v = self._pendente.get(k)
+        if v is not None:
+            return v
+        row = self.pool.get().execute(SQL_KV_GET, (k,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, k: str, v: str, gravado=None) -> None:
+        with self._lock:
+            self._pendente[k] = v
+
+        def pronto(fut):
+            with self._lock:
+                if self._pendente.get(k) is v:
+                    del self._pendente[k]
+            if fut.exception() is None:
+                self._propria("kv", fut.result(), gravado)
+
+        def job(conn):
+            antes = versao(conn, "kv")
+            conn.execute(SQL_KV_SET, (k, v))
+            bump_versao(conn, "kv")
+            return antes
+
+        self.writer.submit(job).add_done_callback(pronto)
+
+    def versao(self):
+        # Contador "kv" (core/db.py): só muda quando alguém grava no kv
+        return "kv", self._versao_lida(lambda: versao(self.pool.get(), "kv"))
+
+    def health(self) -> dict:
+        return dict(self.pool.health(), backend="sqlite")
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryKV:
+    """dict em memória: some quando o processo termina. Para testes e benchmarks."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def init(self) -> None:
+        pass
+
+    def get(self, k: str):
+        return self._data.get(k)
+
+    def set(self, k: str, v: str, gravado=None) -> None:
+        with self._lock:
+            self._data[k] = v
+
+    def versao(self):
+        # Só este processo escreve, e o KVCache já é write-through
+        return id(self), 0
+
+    def health(self) -> dict:
+        return {"ok": True, "backend": "memory", "chaves": len(self._data)}
+
+    def close(self) -> None:
+        pass
+
+
+# ------------------------------------------------------------
+# Cliente RESP (protocolo Redis) mínimo, com pool de conexões
+# ------------------------------------------------------------
+
+def _comando(*args) -> bytes:
+    partes = [b"*%d\r\n" % len(args)]
+    for a in args:
+        if not isinstance(a, bytes):
+            a = str(a).encode("utf-8")
+        partes.append(b"$%d\r\n%s\r\n" % (len(a), a))
+    return b"".join(partes)
+
+
+class _Conexao:
+    __slots__ = ("sock", "arq")
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.arq = self.sock.makefile("rb")
+
+    def enviar(self, *comandos) -> list:
+        # Pipeline: manda todos os comandos de uma vez e lê as respostas em ordem
+        self.sock.sendall(b"".join(comandos))
+        return [self._ler() for _ in comandos]
+
+    def _ler(self):
+        linha = self.arq.readline()
+        if not linha.endswith(b"\r\n"):
+            raise ConnectionError("conexão fechada pelo servidor")
+        tipo, resto = linha[:1], linha[1:-2]
+        if tipo == b"+":
+            return resto.decode("utf-8")
+        if tipo == b"-":
+            raise KVErro(resto.decode("utf-8", "replace"))
+        if tipo == b":":
+            return int(resto)
+        if tipo == b"$":
+            n = int(resto)
+            if n < 0:
+                return None
+            dados = self.arq.read(n + 2)
+            return dados[:-2].decode("utf-8")
+        if tipo == b"*":
+            n = int(resto)
+            return None if n < 0 else [self._ler() for _ in range(n)]
+        raise KVErro(f"resposta inesperada: {linha!r}")
+
+    def fechar(self) -> None:
+        try:
+            self.arq.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RedisKV(_Versionado):
+    """Backend de rede (Redis ou compatível). Chaves ficam em `prefixo` + k; cada set()
+    incrementa um contador de versão, lido no máximo a cada `sync_ms` por versao()."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, db: int = 0, senha: str = None,
+                 prefixo: str = "artepreco:kv:", max_conexoes: int = 16, timeout: float = 2.0,
+                 espera: float = 10.0, sync_ms: float = 1000):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.senha = senha
+        self.prefixo = prefixo
+        self.max_conexoes = max_conexoes
+        self.timeout = timeout  # socket
+        self.espera = espera    # tempo máximo esperando uma conexão livre do pool
+        self.sync = sync_ms / 1000.0
+        self._chave_versao = prefixo + "__versao__"
+        self._lock = threading.Lock()
+        self._reset_pool()
+
+    def _reset_pool(self) -> None:
+        self._pid = os.getpid()
+        self._sem = threading.BoundedSemaphore(self.max_conexoes)
+        self._livres = []
+        self._abertas = 0
+        self._versao = (0.0, None)
+
+    def _abrir(self) -> _Conexao:
+        c = _Conexao(self.host, self.port, self.timeout)
+        iniciais = []
+        if self.senha:
+            iniciais.append(_comando("AUTH", self.senha))
+        if self.db:
+            iniciais.append(_comando("SELECT", self.db))
+        if iniciais:
+            c.enviar(*iniciais)
+        with self._lock:
+            self._abertas += 1
+        return c
+
+    def _descartar(self, c: _Conexao) -> None:
+        c.fechar()
+        with self._lock:
+            self._abertas -= 1
+
+    @contextmanager
+    def _conexao(self):
+        if os.getpid() != self._pid:  # depois de fork: não reaproveita sockets do pai
+            with self._lock:
+                self._reset_pool()
+        # O semáforo limita as conexões abertas; quem passa pega uma livre ou abre outra
+        sem = self._sem
+        if not sem.acquire(timeout=self.espera):
+            raise KVErro("pool de conexões esgotado")
+        try:
+            try:
+                c = self._livres.pop()
+            except IndexError:
+                c = self._abrir()
+            try:
+                yield c
+            except BaseException:
+                # Qualquer falha no meio de um pipeline deixa respostas por ler: descarta
+                self._descartar(c)
+                raise
+            self._livres.append(c)
+        finally:
+            sem.release()
+
+    def _executar(self, *comandos) -> list:
+        # Uma nova tentativa se a conexão do pool tiver caído (servidor reiniciou etc.)
+        for tentativa in (1, 2):
+            try:
+                with self._conexao() as c:
+                    return c.enviar(*comandos)
+            except (OSError, ConnectionError):
+                if tentativa == 2:
+                    raise
+
+    def init(self) -> None:
+        self._executar(_comando("PING"))
+
+    def get(self, k: str):
+        return self._executar(_comando("GET", self.prefixo + k))[0]
+
+    def set(self, k: str, v: str, gravado=None) -> None:
+        _ok, n = self._executar(_comando("SET", self.prefixo + k, v), _comando("INCR", self._chave_versao))
+        # Sem MULTI: outro cliente pode gravar entre o SET e o INCR; aí o contador dele
+        # também entra e o próximo versao() (até sync_ms) invalida o cache
+        self._propria(id(self), n - 1, gravado)
+
+    def versao(self):
+        return id(self), self._versao_lida(lambda: int(self._executar(_comando("GET", self._chave_versao))[0] or 0))
+
+    def health(self) -> dict:
+        info = {"backend": "redis", "host": self.host, "port": self.port, "db": self.db,
+                "conexoes": self._abertas, "max_conexoes": self.max_conexoes}
+        try:
+            self._executar(_comando("PING"))
+            return dict(info, ok=True)
+        except (OSError, ConnectionError, KVErro) as e:
+            return dict(info, ok=False, error=str(e))
+
+    def close(self) -> None:
+        while self._livres:
+            try:
+                self._descartar(self._livres.pop())
+            except IndexError:
+                break
+
+
+def abrir(url: str, pool=None, writer=None):
+    """ARTEPRECO_KV_URL -> backend. sqlite:// usa o pool/writer do app."""
+    u = urlparse(url or "sqlite://")
+    if u.scheme == "memory":
+        return MemoryKV()
+    qs = parse_qs(u.query)
+    if u.scheme in ("redis", "tcp"):
+        db = int(u.path.strip("/") or 0)
+        return RedisKV(
+            host=u.hostname or "127.0.0.1",
+            port=u.port or 6379,
+            db=db,
+            senha=unquote(u.password) if u.password else None,
+            sync_ms=float(qs["sync_ms"][-1]) if "sync_ms" in qs else 1000,
+        )
+    if u.scheme == "sqlite":
+        if pool is None or writer is None:
+            raise ValueError("sqlite:// precisa do pool e do writer do app")
+        return SQLiteKV(pool, writer, sync_ms=float(qs["sync_ms"][-1]) if "sync_ms" in qs else 100)
+    raise ValueError(f"ARTEPRECO_KV_URL não suportada: {url}")
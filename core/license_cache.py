@@ -0,0 +1,99 @@
+# core/license_cache.py
+# Memo de chaves já verificadas: evita refazer HMAC + base64 + json.loads a cada request.
+# - positivo: digest da chave -> (payload, exp); vale até exatamente o "exp" do payload
+# - negativo: chaves ruins (assinatura/formato) ficam um tempo curto, para absorver
+#   tentativas repetidas (força bruta, retry em loop) sem gastar CPU com HMAC
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def _digest(chave: str) -> bytes:
+    return hashlib.blake2b(chave.encode("utf-8"), digest_size=16).digest()
+
+
+class LicenseCache:
+    def __init__(self, maxsize: int = 1024, neg_maxsize: int = 4096, neg_ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.neg_maxsize = neg_maxsize
+        self.neg_ttl = neg_ttl
+        self._ok = OrderedDict()   # digest -> (payload, exp)
+        self._bad = OrderedDict()  # digest -> (resultado, expira_em)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.neg_hits = 0
+        self.misses = 0
+
+    def _put(self, od: OrderedDict, k: bytes, v, maxsize: int) -> None:
+        od[k] = v
+        od.move_to_end(k)
+        while len(od) > maxsize:
+            od.popitem(last=False)
+
+    def validar(self, chave: str, validar_fn):
+        """Mesmo contrato de validar_fn(chave) -> (ok, msg, payload), com memo."""
+        if not chave:
+            return validar_fn(chave)
+        k = _digest(chave)
+        now = time.time()
+        with self._lock:
+            item = self._ok.get(k)
+            if item is not None:
+                payload, exp = item
+                if not exp or now <= exp:
+                    self._ok.move_to_end(k)
+                    self.hits += 1
+                    return True, "OK", payload
+                # passou do exp: a chave continua bem assinada, só expirou
+                del self._ok[k]
+                self.hits += 1
+                res = (False, "Chave expirada.", payload)
+                self._put(self._bad, k, (res, None), self.neg_maxsize)
+                return res
+            item = self._bad.get(k)
+            if item is not None:
+                res, until = item
+                if until is None or now < until:
+                    self._bad.move_to_end(k)
+                    self.neg_hits += 1
+                    return res
+                del self._bad[k]
+            self.misses += 1
+
+        res = validar_fn(chave)
+        ok, msg, payload = res
+        with self._lock:
+            if ok:
+                exp = int((payload or {}).get("exp", 0) or 0)
+                self._put(self._ok, k, (payload, exp), self.maxsize)
+            elif msg == "Chave expirada.":
+                # expirada não volta a valer: fica no negativo sem prazo (até sair pelo LRU)
+                self._put(self._bad, k, (res, None), self.neg_maxsize)
+            else:
+                self._put(self._bad, k, (res, now + self.neg_ttl), self.neg_maxsize)
+        return res
+
+    def descartar(self, chave: str) -> None:
+        """Esquece uma chave (ex.: "Revalidar chave"): a próxima validação refaz o HMAC."""
+        k = _digest(chave or "")
+        with self._lock:
+            self._ok.pop(k, None)
+            self._bad.pop(k, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ok.clear()
+            self._bad.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.neg_hits + self.misses
+            return {
+                "size": len(self._ok),
+                "neg_size": len(self._bad),
+                "hits": self.hits,
+                "neg_hits": self.neg_hits,
+                "misses": self.misses,
+                "hit_ratio": ((self.hits + self.neg_hits) / total) if total else 0.0,
+            }
@@ -1,57 +1,147 @@
 # core/license_core.py
-import hmac
-import hashlib
+# Módulo único de licença (chave AP-...), usado pelo app web e pelas ferramentas.
+#
+# Formato v2 (atual):  "AP-" + b64url(corpo) + "." + b64url(HMAC-SHA256(segredo[kid], corpo))
+#   corpo (binário) = versão (1 byte) | kid (1 byte) | exp (uint32, 0 = sem validade) | cliente (utf-8)
+# O kid escolhe o segredo, então dá para trocar o segredo sem invalidar chaves antigas:
+# basta manter o kid antigo em ARTEPRECO_LICENSE_KEYS e emitir com o novo.
+# Sem segredo configurado (APP_SECRET ou ARTEPRECO_LICENSE_KEYS) nada é emitido nem
+# aceito: não existe segredo padrão.
+#
+# Chaves antigas (corpo JSON) só valem com ARTEPRECO_LICENSE_LEGADO=1:
+#   - app_web:      HMAC(APP_SECRET, b64url(json))
+#   - license_core: HMAC(ARTEPRECO_LICENSE_SECRET_LEGADO, json)
+# Os segredos que vinham fixos no código são públicos: nunca entram em KEYS nem no
+# legado, mesmo vindos do ambiente (qualquer um poderia emitir chave para qualquer cliente).
 import base64
+import hashlib
+import hmac
 import json
+import os
+import struct
 import time
 
-# 🔑 SEGREDO DO SEU APP (troque depois para um texto seu)
-SECRET = b"ARTEPRECO_CHAVE_UNICA_2026_SEGREDO_FORTE_TROQUE_ISSO"
+VERSAO = 2
+PREFIXO = "AP-"
+_HEAD = struct.Struct(">BBI")
+EXP_MAX = 2 ** 32 - 1  # exp é uint32 (epoch em segundos, até 2106)
+
+# 🔑 Segredos: só do ambiente, sem padrão
+_SEGREDOS_PUBLICOS = (b"ARTEPRECO_CHAVE_UNICA_2026_SEGREDO_FORTE_TROQUE_ISSO", b"ARTEPRECO_SUPER_SEGREDO_2026")
+SECRET = os.environ.get("ARTEPRECO_LICENSE_SECRET_LEGADO", "").encode("utf-8")
+APP_SECRET = os.environ.get("APP_SECRET", "").encode("utf-8")
+
+
+class LicencaErro(ValueError):
+    pass
+
+
+def _segredo_ok(segredo: bytes) -> bool:
+    return bool(segredo) and segredo not in _SEGREDOS_PUBLICOS
+
+
+def _carregar_chaves() -> dict:
+    # ARTEPRECO_LICENSE_KEYS="1:segredo-antigo,2:segredo-novo"; sem isso, kid 1 = APP_SECRET
+    raw = os.environ.get("ARTEPRECO_LICENSE_KEYS", "").strip()
+    if not raw:
+        return {1: APP_SECRET} if _segredo_ok(APP_SECRET) else {}
+    chaves = {}
+    for parte in raw.split(","):
+        kid, _, segredo = parte.strip().partition(":")
+        segredo = segredo.encode("utf-8")
+        if _segredo_ok(segredo):
+            chaves[int(kid)] = segredo
+    return chaves
+
+
+KEYS = _carregar_chaves()
+KID_ATUAL = int(os.environ.get("ARTEPRECO_LICENSE_KID", max(KEYS, default=0)))
+ACEITAR_LEGADO = os.environ.get("ARTEPRECO_LICENSE_LEGADO", "0") == "1"
+# Segredos aceitos no corpo JSON: (segredo, assina o b64url em vez do JSON)
+_LEGADO = [(seg, b64) for seg, b64 in ((APP_SECRET, True), (SECRET, False)) if _segredo_ok(seg)]
+
 
 def _b64url_encode(data: bytes) -> str:
     return base64.urlsafe_b64encode(data).decode("utf-8").rstrip("=")
 
+
 def _b64url_decode(s: str) -> bytes:
     pad = "=" * (-len(s) % 4)
     return base64.urlsafe_b64decode(s + pad)
 
-def gerar_chave(cliente: str, dias_validade: int) -> str:
-    payload = {
-        "c": (cliente or "").strip().upper(),
-        "exp": int(time.time()) + int(dias_validade) * 24 * 3600
-    }
-    msg = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
-    sig = hmac.new(SECRET, msg, hashlib.sha256).digest()
-    token = _b64url_encode(msg) + "." + _b64url_encode(sig)
-    return "AP-" + token
 
-def validar_chave(chave: str):
-    try:
-        chave = (chave or "").strip()
+def _sign(segredo: bytes, msg: bytes) -> bytes:
+    return hmac.digest(segredo, msg, hashlib.sha256)
+
+
+def assinar(cliente: str, exp: int, kid: int = None) -> str:
+    kid = KID_ATUAL if kid is None else kid
+    if kid not in KEYS:
+        raise LicencaErro("Sem segredo de licença para este kid: configure APP_SECRET ou ARTEPRECO_LICENSE_KEYS.")
+    exp = int(exp)
+    if not 0 <= exp <= EXP_MAX:
+        raise ValueError(f"Validade fora do intervalo da chave (0 a {EXP_MAX}).")
+    corpo = _HEAD.pack(VERSAO, kid, exp) + (cliente or "").encode("utf-8")
+    return PREFIXO + _b64url_encode(corpo) + "." + _b64url_encode(_sign(KEYS[kid], corpo))
+
+
+def gerar_chave(cliente: str, dias_validade: int, kid: int = None) -> str:
+    exp = int(time.time()) + int(dias_validade) * 24 * 3600
+    return assinar((cliente or "").strip().upper(), exp, kid)
+
 
-        if not chave.startswith("AP-"):
-            return False, "Formato inválido."
+def _validar_legado(msg_b64: str, msg: bytes, sig: bytes, now: float):
+    # corpo JSON: aceita as assinaturas antigas cujo segredo veio do ambiente
+    if not any(hmac.compare_digest(sig, _sign(seg, msg_b64.encode("utf-8") if b64 else msg)) for seg, b64 in _LEGADO):
+        return False, "Assinatura inválida.", None
+    payload = json.loads(msg.decode("utf-8"))
+    exp = int(payload.get("exp", 0))
+    if exp and now > exp:
+        return False, "Chave expirada.", payload
+    return True, "OK", payload
 
-        token = chave[3:]
-        parts = token.split(".")
-        if len(parts) != 2:
-            return False, "Formato inválido."
 
-        msg_b64, sig_b64 = parts
+def _validar(chave: str, now: float):
+    if not chave or not chave.startswith(PREFIXO):
+        return False, "Formato inválido.", None
+    try:
+        msg_b64, sep, sig_b64 = chave[3:].strip().partition(".")
+        if not sep:
+            return False, "Formato inválido.", None
         msg = _b64url_decode(msg_b64)
         sig = _b64url_decode(sig_b64)
+        if not msg:
+            return False, "Formato inválido.", None
 
-        sig_calc = hmac.new(SECRET, msg, hashlib.sha256).digest()
-        if not hmac.compare_digest(sig, sig_calc):
-            return False, "Chave inválida."
-
-        payload = json.loads(msg.decode("utf-8"))
-        exp = int(payload.get("exp", 0))
-        cliente = payload.get("c", "CLIENTE")
+        if msg[0] != VERSAO:
+            if msg[:1] == b"{" and ACEITAR_LEGADO:
+                return _validar_legado(msg_b64, msg, sig, now)
+            return False, "Versão de chave não suportada.", None
 
-        if time.time() > exp:
-            return False, "Chave expirada."
+        if len(msg) < _HEAD.size:
+            return False, "Formato inválido.", None
+        _v, kid, exp = _HEAD.unpack_from(msg)
+        segredo = KEYS.get(kid)
+        if segredo is None:
+            return False, "Chave de assinatura desconhecida.", None
+        if not hmac.compare_digest(sig, _sign(segredo, msg)):
+            return False, "Assinatura inválida.", None
 
-        return True, f"Ativado para {cliente}"
+        payload = {"c": msg[_HEAD.size:].decode("utf-8"), "exp": exp, "kid": kid, "v": VERSAO}
+        if exp and now > exp:
+            return False, "Chave expirada.", payload
+        return True, "OK", payload
     except Exception:
-        return False, "Chave inválida."
+        return False, "Chave inválida.", None
+
+
+def validar_chave(chave: str):
+    """-> (ok, mensagem, payload). payload tem "c" (cliente) e "exp" (0 = sem validade)."""
+    return _validar((chave or "").strip(), time.time())
+
+
+def validar_chaves(chaves):
+    """Versão em lote (back office de revenda): uma lista de resultados, na mesma ordem."""
+    now = time.time()
+    validar = _validar
+    return [validar((c or "").strip(), now) for c in chaves]
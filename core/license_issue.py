@@ -0,0 +1,179 @@
+# core/license_issue.py
+# Emissão de chaves em lote (offline), para revendas.
+#
+# Entrada: CSV com as colunas "cliente" e "dias" (ou "dias_validade"), separador "," ou ";".
+# Saída:   CSV ou JSONL escrito em fluxo (uma linha por chave, na ordem da entrada).
+# Cada emissão vai para a tabela de auditoria license_issuance (só o hash da chave).
+#
+# Uso:
+#   python -m core.license_issue clientes.csv -o chaves.csv [--formato jsonl] [-j 8] [--db artepreco.db]
+#
+# A entrada é lida em blocos e no máximo 2 x workers blocos ficam em voo, então a memória
+# não cresce com o tamanho do arquivo (1M de chaves roda com alguns MB).
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from core import license_core
+from core.db import DEFAULT_DB_PATH, ConnectionPool
+
+BLOCO = 5000
+
+SQL_AUDIT_TABLE = """
+    CREATE TABLE IF NOT EXISTS license_issuance (
+        id INTEGER PRIMARY KEY,
+        lote TEXT NOT NULL,
+        cliente TEXT NOT NULL,
+        kid INTEGER NOT NULL,
+        exp INTEGER NOT NULL,
+        chave_sha256 TEXT NOT NULL,
+        emitida_em INTEGER NOT NULL
+    )
+"""
+SQL_AUDIT_INDEX = "CREATE INDEX IF NOT EXISTS idx_license_issuance_cliente ON license_issuance(cliente)"
+SQL_AUDIT_INSERT = (
+    "INSERT INTO license_issuance(lote, cliente, kid, exp, chave_sha256, emitida_em) VALUES(?,?,?,?,?,?)"
+)
+
+
+def init_audit(conn) -> None:
+    with conn:
+        conn.execute(SQL_AUDIT_TABLE)
+        conn.execute(SQL_AUDIT_INDEX)
+
+
+def _dias(valor: str, n: int, agora: int) -> int:
+    try:
+        dias = int(valor)
+    except ValueError:
+        raise ValueError(f"Linha {n}: 'dias' deve ser um número inteiro, não {valor!r}.")
+    max_dias = (license_core.EXP_MAX - agora) // 86400
+    if not 1 <= dias <= max_dias:
+        raise ValueError(f"Linha {n}: 'dias' deve estar entre 1 e {max_dias}.")
+    return dias
+
+
+def _ler_blocos(path: str, bloco: int = BLOCO, agora: int = None):
+    agora = int(time.time()) if agora is None else agora
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        amostra = f.read(2048)
+        f.seek(0)
+        delim = ";" if amostra.count(";") > amostra.count(",") else ","
+        reader = csv.DictReader(f, delimiter=delim)
+        buf = []
+        for n, row in enumerate(reader, start=2):
+            # Campos a mais que o cabeçalho: o DictReader junta numa lista sob a chave None
+            if None in row:
+                raise ValueError(f"Linha {n}: mais colunas que o cabeçalho.")
+            row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+            cliente = row.get("cliente", "")
+            dias = row.get("dias") or row.get("dias_validade") or ""
+            if not cliente or not dias:
+                raise ValueError(f"Linha {n}: 'cliente' e 'dias' são obrigatórios.")
+            buf.append((cliente, _dias(dias, n, agora)))
+            if len(buf) >= bloco:
+                yield buf
+                buf = []
+        if buf:
+            yield buf
+
+
+def _emitir_bloco(job):
+    # Processo filho: assina o bloco inteiro
+    linhas, agora, kid = job
+    out = []
+    for cliente, dias in linhas:
+        cliente = cliente.upper()
+        exp = agora + dias * 24 * 3600
+        out.append((cliente, dias, exp, license_core.assinar(cliente, exp, kid)))
+    return out
+
+
+def emitir(blocos, workers: int = None, kid: int = None, agora: int = None):
+    """Gera blocos de (cliente, dias, exp, chave) na ordem da entrada."""
+    agora = int(time.time()) if agora is None else agora
+    kid = license_core.KID_ATUAL if kid is None else kid
+    workers = workers or os.cpu_count() or 1
+    jobs = ((b, agora, kid) for b in blocos)
+    if workers <= 1:
+        for job in jobs:
+            yield _emitir_bloco(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        fila = deque()
+        for job in jobs:
+            fila.append(pool.submit(_emitir_bloco, job))
+            if len(fila) >= 2 * workers:
+                yield fila.popleft().result()
+        while fila:
+            yield fila.popleft().result()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Emite chaves AP-... em lote a partir de um CSV de clientes.")
+    ap.add_argument("entrada", help="CSV com colunas cliente;dias")
+    ap.add_argument("-o", "--saida", default="-", help="arquivo de saída (padrão: stdout)")
+    ap.add_argument("--formato", choices=("csv", "jsonl"), default="csv")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="processos (padrão: núcleos)")
+    ap.add_argument("--kid", type=int, default=None, help="id do segredo (padrão: o atual)")
+    ap.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite da auditoria")
+    ap.add_argument("--sem-auditoria", action="store_true")
+    args = ap.parse_args(argv)
+
+    kid = license_core.KID_ATUAL if args.kid is None else args.kid
+    if not license_core.KEYS:
+        ap.error("nenhum segredo configurado: defina APP_SECRET ou ARTEPRECO_LICENSE_KEYS")
+    if kid not in license_core.KEYS:
+        ap.error(f"kid {kid} não está em ARTEPRECO_LICENSE_KEYS")
+
+    conn = None
+    if not args.sem_auditoria:
+        conn = ConnectionPool(args.db).get()
+        init_audit(conn)
+
+    lote = uuid.uuid4().hex
+    agora = int(time.time())
+    out = sys.stdout if args.saida == "-" else open(args.saida, "w", encoding="utf-8", newline="")
+    total = 0
+    try:
+        writer = csv.writer(out, delimiter=";") if args.formato == "csv" else None
+        if writer:
+            writer.writerow(["cliente", "dias", "exp", "chave"])
+        for bloco in emitir(_ler_blocos(args.entrada, agora=agora), args.workers, kid, agora):
+            if writer:
+                writer.writerows(bloco)
+            else:
+                out.write("".join(
+                    json.dumps({"cliente": c, "dias": d, "exp": e, "chave": k}, ensure_ascii=False) + "\n"
+                    for c, d, e, k in bloco
+                ))
+            if conn is not None:
+                with conn:
+                    conn.executemany(SQL_AUDIT_INSERT, [
+                        (lote, c, kid, e, hashlib.sha256(k.encode("utf-8")).hexdigest(), agora)
+                        for c, _d, e, k in bloco
+                    ])
+            total += len(bloco)
+            sys.stderr.write(f"\r{total} chave(s) emitida(s)")
+            sys.stderr.flush()
+    except (OSError, ValueError, csv.Error) as e:
+        # Entrada ruim (arquivo, linha sem 'dias', número inválido): mensagem de uso, sem traceback
+        if total:
+            sys.stderr.write("\n")
+        ap.error(f"{args.entrada}: {e}")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    sys.stderr.write(f"\nLote {lote}: {total} chave(s)\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
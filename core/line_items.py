@@ -0,0 +1,207 @@
+# core/line_items.py
+# Orçamento com vários itens (materiais, blocos de trabalho, taxas, descontos,
+# impostos), nos mesmos inteiros de core/pricing.py:
+#   valor do item  = quantidade x unitário         (trabalho: horas x valor_hora)
+#   custo_base     = soma(materiais + trabalho + taxas)
+#   com_margem     = custo_base x (1 + margem/100)
+#   subtotal       = com_margem - descontos        (desconto %: sobre com_margem)
+#   total          = subtotal + impostos           (imposto %: sobre subtotal)
+#
+# Editar um item só mexe na soma do tipo dele: os totais saem dessas somas mais os
+# itens percentuais (poucos), sem percorrer o orçamento inteiro — 1.000+ itens
+# continuam instantâneos. Um CalcInput vira material + trabalho + taxa (despesas)
+# e dá exatamente o preço de calcular().
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, Iterable, Optional
+
+from core.pricing import (
+    CENT, E4, MARGEM_ESCALA, CalcInput, CalcResult, _div_arred, _escala, resultado_de_centavos,
+)
+
+TIPOS = ("material", "trabalho", "taxa", "desconto", "imposto")
+CUSTOS = ("material", "trabalho", "taxa")
+
+
+class ItensErro(ValueError):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class Item:
+    tipo: str
+    descricao: str = ""
+    quantidade: float = 1.0
+    unitario: float = 0.0
+    pct: Optional[float] = None  # só desconto/imposto: percentual em vez de valor fixo
+    catalogo_id: Optional[int] = None  # item do catálogo (core/catalog.py) de onde veio o unitário
+
+
+@dataclass(frozen=True, slots=True)
+class Totais:
+    materiais: int
+    trabalho: int
+    taxas: int
+    custo_base: int
+    com_margem: int
+    descontos: int
+    subtotal: int
+    impostos: int
+    total: int
+
+
+def _checar(item: Item) -> Item:
+    if item.tipo not in TIPOS:
+        raise ItensErro(f"tipo: use um de {', '.join(TIPOS)}")
+    if item.pct is not None and item.tipo in CUSTOS:
+        raise ItensErro("pct: só vale para desconto e imposto")
+    return item
+
+
+def valor_fixo(item: Item) -> int:
+    # quantidade (4 casas) x unitário (centavos), arredondado como em pricing.py
+    return _div_arred(_escala(item.quantidade, E4) * _escala(item.unitario, CENT), E4)
+
+
+class ItensOrcamento:
+    """Itens em ordem de inclusão, com id estável. adicionar/alterar/remover são O(1);
+    totais() é O(itens percentuais) e fica em cache até a próxima mudança."""
+
+    def __init__(self, produto: str = "", margem_lucro_pct: float = 0.0, validade_dias: int = 7,
+                 itens: Iterable[Item] = ()):
+        self.produto = produto
+        self.validade_dias = validade_dias
+        self._margem = _escala(margem_lucro_pct, E4)
+        self.margem_lucro_pct = margem_lucro_pct
+        self._itens: Dict[int, Item] = {}
+        self._valor: Dict[int, int] = {}  # centavos, só itens de valor fixo
+        self._pct: Dict[str, Dict[int, int]] = {"desconto": {}, "imposto": {}}  # % em E4
+        self._soma = dict.fromkeys(TIPOS, 0)  # soma dos itens de valor fixo, por tipo
+        self._seq = 0
+        self._totais: Optional[Totais] = None
+        for item in itens:
+            self.adicionar(item)
+
+    @classmethod
+    def de_calc_input(cls, ci: CalcInput) -> "ItensOrcamento":
+        return cls(ci.produto, ci.margem_lucro_pct, ci.validade_dias, (
+            Item("material", "Material", 1, ci.custo_material),
+            Item("trabalho", "Trabalho", ci.horas_trabalhadas, ci.valor_hora),
+            Item("taxa", "Despesas extras", 1, ci.despesas_extras),
+        ))
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    def _entrar(self, item_id: int, item: Item) -> None:
+        if item.pct is not None:
+            self._pct[item.tipo][item_id] = _escala(item.pct, E4)
+        else:
+            v = valor_fixo(item)
+            self._valor[item_id] = v
+            self._soma[item.tipo] += v
+        self._totais = None
+
+    def _sair(self, item_id: int) -> Item:
+        item = self._itens[item_id]
+        if item.pct is not None:
+            del self._pct[item.tipo][item_id]
+        else:
+            self._soma[item.tipo] -= self._valor.pop(item_id)
+        self._totais = None
+        return item
+
+    def adicionar(self, item: Item) -> int:
+        _checar(item)
+        self._seq += 1
+        self._itens[self._seq] = item
+        self._entrar(self._seq, item)
+        return self._seq
+
+    def alterar(self, item_id: int, **campos) -> Item:
+        """alterar(3, quantidade=2): troca só os campos dados, mantendo a posição."""
+        if item_id not in self._itens:
+            raise ItensErro(f"item {item_id} não existe")
+        novo = _checar(replace(self._itens[item_id], **campos))
+        self._sair(item_id)
+        self._itens[item_id] = novo
+        self._entrar(item_id, novo)
+        return novo
+
+    def remover(self, item_id: int) -> Item:
+        if item_id not in self._itens:
+            raise ItensErro(f"item {item_id} não existe")
+        item = self._sair(item_id)
+        del self._itens[item_id]
+        return item
+
+    def definir_margem(self, margem_lucro_pct: float) -> None:
+        self.margem_lucro_pct = margem_lucro_pct
+        self._margem = _escala(margem_lucro_pct, E4)
+        self._totais = None
+
+    def totais(self) -> Totais:
+        if self._totais is not None:
+            return self._totais
+        s = self._soma
+        base = s["material"] + s["trabalho"] + s["taxa"]
+        com_margem = _div_arred(base * (MARGEM_ESCALA + self._margem), MARGEM_ESCALA)
+        descontos = s["desconto"] + sum(
+            _div_arred(com_margem * p, MARGEM_ESCALA) for p in self._pct["desconto"].values()
+        )
+        subtotal = max(com_margem - descontos, 0)
+        impostos = s["imposto"] + sum(
+            _div_arred(subtotal * p, MARGEM_ESCALA) for p in self._pct["imposto"].values()
+        )
+        self._totais = Totais(
+            materiais=s["material"], trabalho=s["trabalho"], taxas=s["taxa"], custo_base=base,
+            com_margem=com_margem, descontos=com_margem - subtotal, subtotal=subtotal,
+            impostos=impostos, total=subtotal + impostos,
+        )
+        return self._totais
+
+    def valor(self, item_id: int) -> int:
+        """Valor do item em centavos (percentuais: sobre a base atual do orçamento)."""
+        item = self._itens[item_id]
+        if item.pct is None:
+            return self._valor[item_id]
+        t = self.totais()
+        base = t.com_margem if item.tipo == "desconto" else t.subtotal
+        return _div_arred(base * self._pct[item.tipo][item_id], MARGEM_ESCALA)
+
+    def linhas(self):
+        """(id, item, valor, acumulado) em ordem; acumulado = custo base até aqui
+        (None nos descontos/impostos, que entram depois da margem)."""
+        acumulado = 0
+        for item_id, item in self._itens.items():
+            v = self.valor(item_id)
+            if item.tipo in CUSTOS:
+                acumulado += v
+                yield item_id, item, v, acumulado
+            else:
+                yield item_id, item, v, None
+
+    def resultado(self) -> CalcResult:
+        t = self.totais()
+        return resultado_de_centavos(t.custo_base, t.total)
+
+    def calc_input(self) -> CalcInput:
+        # Resumo de um item só (produto/validade para o PDF e o histórico)
+        t = self.totais()
+        return CalcInput(self.produto, t.custo_base / CENT, 0, 0, 0, self.margem_lucro_pct, self.validade_dias)
+
+    def para_dict(self) -> dict:
+        t = self.totais()
+        return {
+            "produto": self.produto,
+            "validade_dias": self.validade_dias,
+            "itens": [
+                {
+                    "id": item_id, "tipo": item.tipo, "descricao": item.descricao,
+                    "quantidade": item.quantidade, "unitario": item.unitario, "pct": item.pct,
+                    "catalogo_id": item.catalogo_id,
+                    "valor_centavos": v, "acumulado_centavos": acc,
+                }
+                for item_id, item, v, acc in self.linhas()
+            ],
+            "totais_centavos": asdict(t),
+        }
@@ -0,0 +1,222 @@
+# core/metrics.py
+# Instrumentação do request, sem depender do Flask:
+#   - etapas: tempo gasto em kv, licença, template, PDF... dentro de cada request
+#     (vira o header Server-Timing);
+#   - Metricas: histogramas de latência por rota e por etapa, no formato texto do
+#     Prometheus (/metrics). Por processo: com vários workers, cada um tem os seus;
+#   - Amostrador: perfil opcional por request, tirando amostras da pilha da thread do
+#     request; a saída "colapsada" (uma pilha por linha + contagem) abre direto no
+#     flamegraph.pl, speedscope ou inferno.
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Optional
+
+# Limites dos buckets (segundos): de 1 ms a 10 s
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Tempo por etapa do request atual: {"kv": segundos, ...}; None fora de request
+_etapas: ContextVar[Optional[Dict[str, float]]] = ContextVar("artepreco_etapas", default=None)
+
+
+def iniciar_request() -> Dict[str, float]:
+    d: Dict[str, float] = {}
+    _etapas.set(d)
+    return d
+
+
+def registrar_etapa(nome: str, segundos: float) -> None:
+    d = _etapas.get()
+    if d is not None:
+        d[nome] = d.get(nome, 0.0) + segundos
+
+
+def cronometrado(nome: str):
+    """Decorator: soma a duração de cada chamada na etapa `nome` do request."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                registrar_etapa(nome, time.perf_counter() - t0)
+        return wrapper
+    return deco
+
+
+class Etapa:
+    """with Etapa("render"): ... — o mesmo que @cronometrado, para um trecho."""
+
+    __slots__ = ("nome", "t0")
+
+    def __init__(self, nome: str):
+        self.nome = nome
+
+    def __enter__(self) -> "Etapa":
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        registrar_etapa(self.nome, time.perf_counter() - self.t0)
+
+
+def cronometrar_iter(nome: str, it):
+    # Para respostas em streaming (PDF em pedaços): o trabalho acontece enquanto o
+    # corpo é enviado, então só entra no /metrics (o header já foi)
+    t = 0.0
+    it = iter(it)
+    while True:
+        t0 = time.perf_counter()
+        try:
+            parte = next(it)
+        except StopIteration:
+            registrar_etapa(nome, t + time.perf_counter() - t0)
+            return
+        t += time.perf_counter() - t0
+        yield parte
+
+
+def server_timing(etapas: Dict[str, float], total: float) -> str:
+    # Server-Timing: kv;dur=0.12, licenca;dur=0.03, total;dur=4.56 (ms)
+    partes = [f"{nome};dur={s * 1000:.2f}" for nome, s in etapas.items()]
+    partes.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(partes)
+
+
+def _rotulo(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histograma:
+    """Contagem por bucket (não acumulada; a exposição acumula), soma e total,
+    por combinação de rótulos."""
+
+    __slots__ = ("buckets", "dados")
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.dados: Dict[tuple, list] = {}
+
+    def observar(self, rotulos: tuple, valor: float) -> None:
+        d = self.dados.get(rotulos)
+        if d is None:
+            d = self.dados[rotulos] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        d[0][bisect.bisect_left(self.buckets, valor)] += 1
+        d[1] += valor
+        d[2] += 1
+
+    def exposicao(self, nome: str, nomes_rotulos: tuple) -> list:
+        linhas = []
+        for rotulos, (contagens, soma, total) in sorted(self.dados.items()):
+            base = ",".join(f'{n}="{_rotulo(v)}"' for n, v in zip(nomes_rotulos, rotulos))
+            sep = "," if base else ""
+            acumulado = 0
+            for limite, c in zip(self.buckets, contagens):
+                acumulado += c
+                linhas.append(f'{nome}_bucket{{{base}{sep}le="{limite:g}"}} {acumulado}')
+            linhas.append(f'{nome}_bucket{{{base}{sep}le="+Inf"}} {total}')
+            linhas.append(f"{nome}_sum{{{base}}} {soma:.6f}")
+            linhas.append(f"{nome}_count{{{base}}} {total}")
+        return linhas
+
+
+class Metricas:
+    """Registro do processo. observar_request() é chamado uma vez por request, no fim."""
+
+    def __init__(self, buckets=BUCKETS):
+        self._lock = threading.Lock()
+        self._requests = Histograma(buckets)
+        self._etapas = Histograma(buckets)
+        self._status: Counter = Counter()
+        self._inicio = time.time()
+
+    def observar_request(self, rota: str, metodo: str, status: int, segundos: float,
+                         etapas: Optional[Dict[str, float]] = None) -> None:
+        with self._lock:
+            self._requests.observar((rota, metodo), segundos)
+            self._status[(rota, metodo, str(status))] += 1
+            for nome, s in (etapas or {}).items():
+                self._etapas.observar((nome,), s)
+
+    def prometheus(self) -> str:
+        with self._lock:
+            linhas = [
+                "# HELP artepreco_request_duration_seconds Latência dos requests, por rota.",
+                "# TYPE artepreco_request_duration_seconds histogram",
+            ]
+            linhas += self._requests.exposicao("artepreco_request_duration_seconds", ("rota", "metodo"))
+            linhas += [
+                "# HELP artepreco_requests_total Requests por rota e status.",
+                "# TYPE artepreco_requests_total counter",
+            ]
+            for (rota, metodo, status), n in sorted(self._status.items()):
+                linhas.append(
+                    f'artepreco_requests_total{{rota="{_rotulo(rota)}",metodo="{metodo}",status="{status}"}} {n}'
+                )
+            linhas += [
+                "# HELP artepreco_etapa_duration_seconds Tempo por etapa (kv, licença, template, PDF) em cada request.",
+                "# TYPE artepreco_etapa_duration_seconds histogram",
+            ]
+            linhas += self._etapas.exposicao("artepreco_etapa_duration_seconds", ("etapa",))
+        linhas += [
+            "# HELP artepreco_process_start_time_seconds Início do processo (epoch).",
+            "# TYPE artepreco_process_start_time_seconds gauge",
+            f"artepreco_process_start_time_seconds {self._inicio:.0f}",
+        ]
+        return "\n".join(linhas) + "\n"
+
+
+def _quadro(code) -> str:
+    # "funcao (arquivo.py:linha)" — ";" separa quadros no formato colapsado
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+class Amostrador:
+    """Amostra a pilha de UMA thread a cada `intervalo` segundos, numa thread à parte.
+    Custo só enquanto ligado; o GIL limita a taxa real (~switchinterval) em código
+    que não libera o GIL."""
+
+    def __init__(self, thread_id: Optional[int] = None, intervalo: float = 0.002):
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.intervalo = intervalo
+        self.pilhas: Counter = Counter()
+        self.amostras = 0
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def iniciar(self) -> "Amostrador":
+        self._thread = threading.Thread(target=self._rodar, name="artepreco-amostrador", daemon=True)
+        self._thread.start()
+        return self
+
+    def _rodar(self) -> None:
+        cache: Dict[object, str] = {}
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self.thread_id)
+            quadros = []
+            while frame is not None:
+                code = frame.f_code
+                q = cache.get(code)
+                if q is None:
+                    q = cache[code] = _quadro(code)
+                quadros.append(q)
+                frame = frame.f_back
+            if quadros:
+                quadros.reverse()  # raiz -> folha
+                self.pilhas[";".join(quadros)] += 1
+                self.amostras += 1
+
+    def parar(self) -> "Amostrador":
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def colapsado(self) -> str:
+        return "".join(f"{pilha} {n}\n" for pilha, n in self.pilhas.most_common())
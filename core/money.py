@@ -0,0 +1,179 @@
+# core/money.py
+# Dinheiro formatado por moeda + locale: "R$ 1.234,56", "$1,234.56", "1.234,56 €".
+# Cada Formatador é montado uma vez (formatador() guarda em cache) e já sai
+# especializado — separadores, casas e posição do símbolo viram funções prontas —,
+# então formatar um valor é um format() e no máximo dois replace. format_many faz o
+# lote todo de uma vez: um join, os replace sobre o texto inteiro e um split.
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple
+
+
+class MoedaErro(ValueError):
+    pass
+
+
+class Locale(NamedTuple):
+    milhar: str
+    decimal: str
+    simbolo_depois: bool  # "1.234,56 €" em vez de "€ 1.234,56"
+    espaco: bool          # espaço entre símbolo e número
+    sinal_fora: bool      # "-$1.00" (sinal antes do símbolo) em vez de "R$ -1,00"
+
+
+LOCALES = {
+    "pt_BR": Locale(".", ",", False, True, False),
+    "pt_PT": Locale(" ", ",", True, True, False),
+    "en_US": Locale(",", ".", False, False, True),
+    "en_GB": Locale(",", ".", False, False, True),
+    "es_ES": Locale(".", ",", True, True, False),
+    "es_AR": Locale(".", ",", False, True, False),
+    "es_MX": Locale(",", ".", False, False, True),
+    "de_DE": Locale(".", ",", True, True, False),
+    "fr_FR": Locale(" ", ",", True, True, False),
+    "it_IT": Locale(".", ",", True, True, False),
+    "ja_JP": Locale(",", ".", False, False, True),
+}
+
+# moeda (ISO 4217) -> (símbolo, casas decimais)
+MOEDAS = {
+    "BRL": ("R$", 2),
+    "USD": ("US$", 2),
+    "EUR": ("€", 2),
+    "GBP": ("£", 2),
+    "JPY": ("¥", 0),
+    "ARS": ("$", 2),
+    "MXN": ("$", 2),
+    "CLP": ("$", 0),
+}
+# Símbolo na própria terra da moeda (o dólar é "US$" no Brasil, "$" nos EUA)
+SIMBOLO_LOCAL = {("USD", "en_US"): "$"}
+
+# Abaixo disso centavos / 10^casas é exato o bastante num double: formatado com as
+# casas da moeda, dá o mesmo texto da conta inteira (e é bem mais rápido)
+_FLOAT_EXATO = 10 ** 15
+
+
+def _separadores(locale: Locale, casas: int):
+    # -> (spec do format(), trocas) com o menor número de replace para o par de
+    # separadores do locale: en_US nenhum, só milhar 1, milhar e decimal 2 (via "_")
+    mil, dec = locale.milhar, locale.decimal
+    if mil == "," and (dec == "." or casas == 0):
+        return f",.{casas}f", ()
+    if dec == "." or casas == 0:
+        return f",.{casas}f", ((",", mil),)
+    return f"_.{casas}f", ((".", dec), ("_", mil))
+
+
+def _montar(spec: str, trocas, pre: str, suf: str, esc: int = 1, exato=None):
+    # Função final de um formatador, já com símbolo, separadores e escala. esc > 1:
+    # entrada em unidades mínimas, divididas em float até _FLOAT_EXATO e por `exato`
+    # acima disso. Uma camada só: este é o caminho quente do PDF.
+    lim = _FLOAT_EXATO
+    if not trocas:
+        if esc == 1:
+            return lambda v: pre + f"{v:{spec}}" + suf
+        return lambda c: pre + f"{c / esc:{spec}}" + suf if -lim < c < lim else exato(c)
+    if len(trocas) == 1:
+        (a, b), = trocas
+        if esc == 1:
+            return lambda v: pre + f"{v:{spec}}".replace(a, b) + suf
+        return lambda c: pre + f"{c / esc:{spec}}".replace(a, b) + suf if -lim < c < lim else exato(c)
+    (a1, b1), (a2, b2) = trocas
+    if esc == 1:
+        return lambda v: pre + f"{v:{spec}}".replace(a1, b1).replace(a2, b2) + suf
+    return lambda c: (
+        pre + f"{c / esc:{spec}}".replace(a1, b1).replace(a2, b2) + suf if -lim < c < lim else exato(c)
+    )
+
+
+def _sinal_fora(f, pre: str):
+    # "$-1.00" -> "-$1.00"
+    n = len(pre)
+
+    def g(v):
+        s = f(v)
+        return "-" + pre + s[n + 1:] if s[n] == "-" else s
+    return g
+
+
+class Formatador:
+    """Formatador de uma moeda num locale. Use formatador(moeda, locale): cacheado.
+
+    valor(1234.5) -> "R$ 1.234,50"; centavos(123450) -> o mesmo, a partir do
+    inteiro (exato em qualquer tamanho); format_many(...) -> lista, para exportação."""
+
+    __slots__ = ("moeda", "locale", "simbolo", "casas", "valor", "centavos", "_lote", "_pre", "_suf", "_fora")
+
+    def __init__(self, moeda: str, locale: str):
+        if moeda not in MOEDAS:
+            raise MoedaErro(f"moeda: use uma de {', '.join(MOEDAS)}")
+        if locale not in LOCALES:
+            raise MoedaErro(f"locale: use um de {', '.join(LOCALES)}")
+        loc = LOCALES[locale]
+        simbolo, casas = MOEDAS[moeda]
+        simbolo = SIMBOLO_LOCAL.get((moeda, locale), simbolo)
+        self.moeda, self.locale, self.simbolo, self.casas = moeda, locale, simbolo, casas
+        esp = " " if loc.espaco else ""
+        pre, suf = ("", esp + simbolo) if loc.simbolo_depois else (simbolo + esp, "")
+        fora = loc.sinal_fora and bool(pre)
+        self._pre, self._suf, self._fora = pre, suf, fora
+        self._lote = spec, trocas = _separadores(loc, casas)
+        esc = 10 ** casas
+        inteiro = _montar(*_separadores(loc, 0), "", "")
+        dec = loc.decimal
+        frac = f"0{casas}d"
+
+        def exato(c) -> str:
+            # Só inteiros, para valores grandes demais para a divisão em float
+            c = int(c)
+            r, x = divmod(abs(c), esc)
+            num = inteiro(r) + (dec + format(x, frac) if casas else "")
+            return pre + ("-" if c < 0 else "") + num + suf
+
+        valor = _montar(spec, trocas, pre, suf)
+        centavos = _montar(spec, trocas, pre, suf, esc, exato)
+        if fora:
+            valor, centavos = _sinal_fora(valor, pre), _sinal_fora(centavos, pre)
+        self.valor = valor
+        self.centavos = centavos
+
+    def __repr__(self) -> str:
+        return f"Formatador({self.moeda!r}, {self.locale!r})"
+
+    def format_many(self, valores: Iterable, centavos: bool = False) -> List[str]:
+        """Lista formatada, na ordem. centavos=True: inteiros em unidades mínimas
+        (como em core/pricing.py). Aceita listas, geradores e arrays numpy."""
+        if hasattr(valores, "tolist"):
+            valores = valores.tolist()
+        elif not isinstance(valores, (list, tuple)):
+            valores = list(valores)
+        if not valores:
+            return []
+        if centavos:
+            if max(map(abs, valores)) >= _FLOAT_EXATO:
+                return list(map(self.centavos, valores))
+            esc = 10 ** self.casas
+            valores = [c / esc for c in valores]
+        if self._fora and min(valores) < 0:
+            return list(map(self.valor, valores))
+        # Um texto só: os replace de separador rodam uma vez para o lote inteiro
+        spec, trocas = self._lote
+        corpo = "\n".join([f"{v:{spec}}" for v in valores])
+        for a, b in trocas:
+            corpo = corpo.replace(a, b)
+        if self._pre or self._suf:
+            corpo = self._pre + corpo.replace("\n", f"{self._suf}\n{self._pre}") + self._suf
+        return corpo.split("\n")
+
+
+@lru_cache(maxsize=None)  # limitado por MOEDAS x LOCALES
+def _formatador(moeda: str, locale: str) -> Formatador:
+    return Formatador(moeda, locale)
+
+
+def formatador(moeda: str = "BRL", locale: str = "pt_BR") -> Formatador:
+    """O Formatador de (moeda, locale), montado uma vez e reaproveitado."""
+    return _formatador(moeda, locale)
+
+
+BRL = formatador("BRL", "pt_BR")
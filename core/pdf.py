@@ -0,0 +1,246 @@
+# core/pdf.py
+# Escritor de PDF incremental (sem lib externa — funciona bem na Vercel).
+# Cada objeto é escrito uma vez, na ordem, e o offset de cada um é anotado na hora
+# (nada de procurar "N 0 obj" no buffer depois). Uma página por vez fica em memória.
+import zlib
+
+PDF_HEADER = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+
+# A4 em pontos
+A4 = (595, 842)
+
+# Objetos fixos: 1 = catálogo, 2 = árvore de páginas, 3 = fonte, 4 = bloco fixo (template)
+OBJ_CATALOG = 1
+OBJ_PAGES = 2
+OBJ_FONT = 3
+OBJ_TEMPLATE = 4
+FONT_OBJ = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+
+
+def pdf_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _obj(num: int, body: bytes) -> bytes:
+    return b"%d 0 obj\n" % num + body + b"\nendobj\n"
+
+
+def _stream(content: bytes, compress: bool, extra: bytes = b"") -> bytes:
+    head = [extra] if extra else []
+    if compress:
+        content = zlib.compress(content, 6)
+        head.append(b"/Filter /FlateDecode")
+    head.append(b"/Length %d" % len(content))
+    return b"<< " + b" ".join(head) + b" >>\nstream\n" + content + b"\nendstream"
+
+
+def _text_block(lines, font_size: int, leading: int, x: int, top: int) -> bytes:
+    # Cada linha usa o operador ' (desce uma linha e escreve); None/"" só desce (T*)
+    parts = [f"BT\n/F1 {font_size} Tf\n{leading} TL\n{x} {top + leading} Td\n"]
+    for text in lines:
+        parts.append(f"({pdf_escape(text)}) '\n" if text else "T*\n")
+    parts.append("ET\n")
+    return "".join(parts).encode("cp1252", errors="replace")
+
+
+class PdfTemplate:
+    """Esqueleto pré-compilado: cabeçalho + fonte + um Form XObject com as linhas fixas.
+
+    `fixed` mapeia posição da linha (0 = topo da 1ª página) -> texto. O PdfWriter
+    copia `prefix` de uma vez e só escreve as linhas variáveis (None nas posições fixas).
+    """
+
+    def __init__(self, fixed: dict, compress: bool = False, page_size=A4, font_size: int = 14,
+                 leading: int = 18, margin_x: int = 50, top: int = 760, bottom: int = 50):
+        self.layout = dict(page_size=page_size, font_size=font_size, leading=leading,
+                           margin_x=margin_x, top=top, bottom=bottom)
+        self.compress = compress
+        self.slots = frozenset(fixed)
+        n = max(fixed) + 1 if fixed else 0
+        lines = [fixed.get(i) for i in range(n)]
+        content = _text_block(lines, font_size, leading, margin_x, top)
+
+        font = _obj(OBJ_FONT, FONT_OBJ)
+        w, h = page_size
+        form = _obj(OBJ_TEMPLATE, _stream(
+            content, compress,
+            b"/Type /XObject /Subtype /Form /BBox [0 0 %d %d] /Resources << /Font << /F1 %d 0 R >> >>" % (w, h, OBJ_FONT),
+        ))
+        self.prefix = PDF_HEADER + font + form
+        self.offsets = {OBJ_FONT: len(PDF_HEADER), OBJ_TEMPLATE: len(PDF_HEADER) + len(font)}
+
+
+class PdfWriter:
+    """Escreve um PDF de texto, página a página, em `out` (qualquer objeto com write()).
+
+    Sem `out`, os bytes ficam pendentes e saem por `drain()` — útil para gerar
+    a resposta aos pedaços (generator WSGI).
+    """
+
+    def __init__(self, out=None, compress: bool = False, page_size=A4, font_size: int = 14,
+                 leading: int = 18, margin_x: int = 50, top: int = 760, bottom: int = 50,
+                 template: "PdfTemplate" = None):
+        if template is not None:
+            # o layout precisa bater com o do esqueleto
+            page_size, font_size, leading, margin_x, top, bottom = (
+                template.layout[k] for k in ("page_size", "font_size", "leading", "margin_x", "top", "bottom")
+            )
+        self._out = out
+        self._pending = []
+        self._pending_size = 0
+        self._pos = 0
+        self._offsets = {}
+        self._next_obj = OBJ_FONT + 1
+        self._kids = []
+        self._page_lines = []
+        self._closed = False
+
+        self.compress = compress
+        self.page_size = page_size
+        self.font_size = font_size
+        self.leading = leading
+        self.margin_x = margin_x
+        self.top = top
+        self.bottom = bottom
+        self.lines_per_page = max(1, (top - bottom) // leading + 1)
+        # largura média da Helvetica ~0,5 x tamanho da fonte
+        self.max_chars = max(10, int((page_size[0] - 2 * margin_x) / (font_size * 0.5)))
+
+        self.template = template
+        if template is not None:
+            self._write(template.prefix)
+            self._offsets.update(template.offsets)
+            self._next_obj = OBJ_TEMPLATE + 1
+            self._resources = b"<< /Font << /F1 %d 0 R >> /XObject << /Tpl %d 0 R >> >>" % (OBJ_FONT, OBJ_TEMPLATE)
+        else:
+            self._write(PDF_HEADER)
+            self._write_obj(OBJ_FONT, FONT_OBJ)
+            self._resources = b"<< /Font << /F1 %d 0 R >> >>" % OBJ_FONT
+
+    # ---------- saída ----------
+
+    def _write(self, data: bytes) -> None:
+        self._pos += len(data)
+        if self._out is not None:
+            self._out.write(data)
+        else:
+            self._pending.append(data)
+            self._pending_size += len(data)
+
+    def _write_obj(self, num: int, body: bytes) -> None:
+        self._offsets[num] = self._pos
+        self._write(_obj(num, body))
+
+    def _alloc(self) -> int:
+        num = self._next_obj
+        self._next_obj += 1
+        return num
+
+    @property
+    def pending_size(self) -> int:
+        return self._pending_size
+
+    def drain(self) -> bytes:
+        data = b"".join(self._pending)
+        self._pending = []
+        self._pending_size = 0
+        return data
+
+    # ---------- conteúdo ----------
+
+    def _wrap(self, text: str):
+        if len(text) <= self.max_chars:
+            return [text]
+        out = []
+        line = ""
+        for word in text.split(" "):
+            while len(word) > self.max_chars:
+                if line:
+                    out.append(line)
+                    line = ""
+                out.append(word[:self.max_chars])
+                word = word[self.max_chars:]
+            cand = f"{line} {word}" if line else word
+            if len(cand) > self.max_chars:
+                out.append(line)
+                line = word
+            else:
+                line = cand
+        out.append(line)
+        return out
+
+    def line(self, text: str = "") -> None:
+        # None = linha ocupada pelo template (só pula)
+        if text is None:
+            if len(self._page_lines) >= self.lines_per_page:
+                self.page_break()
+            self._page_lines.append(None)
+            return
+        for part in self._wrap(text):
+            if len(self._page_lines) >= self.lines_per_page:
+                self.page_break()
+            self._page_lines.append(part)
+
+    def lines(self, texts) -> None:
+        for t in texts:
+            self.line(t)
+
+    def page_break(self) -> None:
+        # Fecha a página atual (mesmo vazia, se ainda não houver nenhuma)
+        lines = self._page_lines
+        self._page_lines = []
+        content = _text_block(lines, self.font_size, self.leading, self.margin_x, self.top)
+        if self.template is not None and not self._kids:
+            content = b"/Tpl Do\n" + content
+
+        content_num = self._alloc()
+        page_num = self._alloc()
+        self._write_obj(content_num, _stream(content, self.compress))
+        w, h = self.page_size
+        self._write_obj(
+            page_num,
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources %s /Contents %d 0 R >>"
+            % (OBJ_PAGES, w, h, self._resources, content_num),
+        )
+        self._kids.append(page_num)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        if self._page_lines or not self._kids:
+            self.page_break()
+        kids = b" ".join(b"%d 0 R" % k for k in self._kids)
+        self._write_obj(OBJ_PAGES, b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(self._kids))
+        self._write_obj(OBJ_CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % OBJ_PAGES)
+
+        size = self._next_obj
+        xref_start = self._pos
+        xref = [b"xref\n0 %d\n0000000000 65535 f \n" % size]
+        for num in range(1, size):
+            xref.append(b"%010d 00000 n \n" % self._offsets[num])
+        xref.append(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, OBJ_CATALOG, xref_start))
+        self._write(b"".join(xref))
+        self._closed = True
+
+    @property
+    def page_count(self) -> int:
+        return len(self._kids)
+
+
+def pdf_bytes(lines, compress: bool = False, **kw) -> bytes:
+    # kw aceita template=PdfTemplate(...) para reaproveitar o esqueleto fixo
+    w = PdfWriter(compress=compress, **kw)
+    w.lines(lines)
+    w.close()
+    return w.drain()
+
+
+def pdf_stream(lines, compress: bool = False, chunk_size: int = 64 * 1024, **kw):
+    # Generator: solta os bytes a cada ~chunk_size (resposta WSGI em pedaços)
+    w = PdfWriter(compress=compress, **kw)
+    for text in lines:
+        w.line(text)
+        if w.pending_size >= chunk_size:
+            yield w.drain()
+    w.close()
+    yield w.drain()
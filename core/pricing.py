@@ -1,7 +1,288 @@
 # core/pricing.py
+# Motor único de preço: usado pelo app web, pelo PDF e pelos lotes.
+# Toda a conta é feita em inteiros (centavos), então não há erro de float:
+#   custo_trabalho = horas x valor_hora
+#   custo_base     = material + despesas + custo_trabalho
+#   preco_final    = custo_base x (1 + margem/100)
+# Entradas negativas (ou NaN) valem 0; arredondamento sempre "meio para cima".
 
+import math
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import List, Sequence
 
+from core.money import BRL
+
+try:
+    import numpy as np
+except ImportError:  # numpy é opcional; sem ele o lote usa inteiros do Python
+    np = None
+
+# Escalas das entradas
+CENT = 100         # dinheiro -> centavos
+E4 = 10000         # horas e margem (%) com 4 casas decimais
+MARGEM_ESCALA = 100 * E4  # 1 + margem/100, com margem em E4
+
+# Acima disso o caminho numpy (int64) poderia estourar; caímos no caminho Python
+_INT64_SEGURO = 2 ** 62
+
+
+@dataclass(frozen=True, slots=True)
+class CalcInput:
+    produto: str
+    custo_material: float
+    horas_trabalhadas: float
+    valor_hora: float
+    despesas_extras: float
+    margem_lucro_pct: float
+    validade_dias: int
+
+
+@dataclass(frozen=True, slots=True)
+class CalcResult:
+    custo_base: float
+    preco_final: float
+    preco_final_fmt: str
+    custo_base_fmt: str
+    custo_base_centavos: int = 0
+    preco_final_centavos: int = 0
+
+
+# "R$ 1.234,56" a partir de centavos (int) ou de reais (float); outras moedas e
+# locales: core/money.py (formatador("EUR", "de_DE")...)
+fmt_centavos = BRL.centavos
+fmt_brl = BRL.valor
+
+
+def _escala(x, escala: int) -> int:
+    # float -> inteiro escalado, com clamp em 0 (NaN também vira 0)
+    if not x > 0:
+        return 0
+    try:
+        return int(math.floor(x * escala + 0.5))
+    except OverflowError:
+        raise ValueError("Valor fora do intervalo.")
+
+
+def _div_arred(n: int, d: int) -> int:
+    # divisão inteira arredondando meio para cima (n >= 0)
+    return (n + d // 2) // d
+
+
+def preco_centavos(custo_material, horas_trabalhadas, valor_hora, despesas_extras, margem_lucro_pct):
+    """Núcleo escalar: retorna (custo_base, preco_final) em centavos."""
+    trabalho = _div_arred(_escala(horas_trabalhadas, E4) * _escala(valor_hora, CENT), E4)
+    base = _escala(custo_material, CENT) + _escala(despesas_extras, CENT) + trabalho
+    final = _div_arred(base * (MARGEM_ESCALA + _escala(margem_lucro_pct, E4)), MARGEM_ESCALA)
+    return base, final
+
+
+def resultado_de_centavos(base: int, final: int) -> CalcResult:
+    # Também usado para remontar orçamentos gravados (sem recalcular)
+    return CalcResult(
+        custo_base=base / CENT,
+        preco_final=final / CENT,
+        preco_final_fmt=fmt_centavos(final),
+        custo_base_fmt=fmt_centavos(base),
+        custo_base_centavos=base,
+        preco_final_centavos=final,
+    )
+
+
+def calcular(ci: CalcInput) -> CalcResult:
+    base, final = preco_centavos(
+        ci.custo_material, ci.horas_trabalhadas, ci.valor_hora, ci.despesas_extras, ci.margem_lucro_pct
+    )
+    return resultado_de_centavos(base, final)
+
+
+# ------------------------------------------------------------
+# Lote (coluna a coluna)
+# ------------------------------------------------------------
+
+def _np_escala(col, escala: int):
+    a = np.asarray(col, dtype=np.float64)
+    if np.isinf(a).any():
+        raise ValueError("Valor fora do intervalo.")
+    a = np.where(a > 0, a, 0.0)  # clamp; NaN > 0 é False
+    return np.floor(a * escala + 0.5)
+
+
+def _lote_numpy(custo_material, horas_trabalhadas, valor_hora, despesas_extras, margem_lucro_pct):
+    m = _np_escala(custo_material, CENT)
+    h = _np_escala(horas_trabalhadas, E4)
+    vh = _np_escala(valor_hora, CENT)
+    d = _np_escala(despesas_extras, CENT)
+    mg = _np_escala(margem_lucro_pct, E4)
+    if not len(m):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # Limites do int64: se algum produto intermediário puder estourar, desiste
+    mx = [int(a.max()) for a in (m, h, vh, d, mg)]
+    trabalho_max = mx[1] * mx[2]
+    base_max = mx[0] + mx[3] + trabalho_max // E4 + 1
+    if trabalho_max >= _INT64_SEGURO or base_max * (MARGEM_ESCALA + mx[4]) >= _INT64_SEGURO:
+        return None
+
+    m, h, vh, d, mg = (a.astype(np.int64) for a in (m, h, vh, d, mg))
+    base = m + d + (h * vh + E4 // 2) // E4
+    final = (base * (MARGEM_ESCALA + mg) + MARGEM_ESCALA // 2) // MARGEM_ESCALA
+    return base, final
+
+
+def calcular_lote(custo_material, horas_trabalhadas, valor_hora, despesas_extras, margem_lucro_pct):
+    """Retorna (custo_base, preco_final) em centavos, um valor por linha.
+
+    Com numpy os vetores são int64; sem numpy (ou com valores enormes) são listas de int.
+    Os números são idênticos aos de calcular() linha a linha.
+    """
+    if np is not None:
+        out = _lote_numpy(custo_material, horas_trabalhadas, valor_hora, despesas_extras, margem_lucro_pct)
+        if out is not None:
+            return out
+
+    base = []
+    final = []
+    for m, h, vh, d, mg in zip(custo_material, horas_trabalhadas, valor_hora, despesas_extras, margem_lucro_pct):
+        b, f = preco_centavos(m, h, vh, d, mg)
+        base.append(b)
+        final.append(f)
+    return base, final
+
+
+def calcular_precos(itens: Sequence[CalcInput]) -> List[CalcResult]:
+    base, final = calcular_lote(
+        [ci.custo_material for ci in itens],
+        [ci.horas_trabalhadas for ci in itens],
+        [ci.valor_hora for ci in itens],
+        [ci.despesas_extras for ci in itens],
+        [ci.margem_lucro_pct for ci in itens],
+    )
+    return [resultado_de_centavos(b, f) for b, f in zip(map(int, base), map(int, final))]
+
+
+# ------------------------------------------------------------
+# Inverso: preço alvo -> a variável livre (margem, horas, valor da hora ou material)
+# ------------------------------------------------------------
+# Forma fechada, nos mesmos inteiros da fórmula: devolve o MENOR valor (na escala
+# da variável: 0,0001 para margem/horas, 1 centavo para dinheiro) cujo preço final
+# é >= o alvo. Como o preço sobe junto com cada variável, esse é "o" valor que
+# fecha a conta; quando a granularidade não deixa acertar o centavo, o preço obtido
+# fica logo acima do alvo.
+
+RESOLVIVEIS = ("margem_lucro_pct", "horas_trabalhadas", "valor_hora", "custo_material")
+_ESCALA_VAR = {"margem_lucro_pct": E4, "horas_trabalhadas": E4, "valor_hora": CENT, "custo_material": CENT}
+
+
+@dataclass(frozen=True, slots=True)
+class Solucao:
+    variavel: str
+    valor: float
+    viavel: bool
+    preco_final_centavos: int  # preço obtido com `valor` (>= alvo quando viável)
+
+
+class _Py:
+    # Mesmas operações de numpy para escalares: uma só implementação do inverso
+    maximum = staticmethod(max)
+
+    @staticmethod
+    def where(cond, a, b):
+        return a if cond else b
+
+
+def _ceil_div(n, d):
+    return -((-n) // d)
+
+
+def _inverso(xp, variavel: str, alvo, m, h, vh, d, mg):
+    """Inteiros escalados (escalares ou vetores int64) -> (valor_escalado, viável)."""
+    num = alvo * MARGEM_ESCALA - MARGEM_ESCALA // 2  # base*(1+margem) precisa passar disso
+    if variavel == "margem_lucro_pct":
+        base = m + d + (h * vh + E4 // 2) // E4
+        req = _ceil_div(num, xp.maximum(base, 1)) - MARGEM_ESCALA
+        # Base 0: o preço é 0 com qualquer margem; só o alvo 0 fecha (com margem 0)
+        val = xp.where(base > 0, xp.maximum(req, 0), 0)
+        return val, ((base > 0) & (req >= 0)) | ((base == 0) & (alvo == 0))
+
+    base_min = xp.maximum(_ceil_div(num, MARGEM_ESCALA + mg), 0)
+    if variavel == "custo_material":
+        req = base_min - d - (h * vh + E4 // 2) // E4
+        return xp.maximum(req, 0), req >= 0
+
+    # horas ou valor da hora: o trabalho precisa render `falta` centavos
+    falta = base_min - m - d
+    outro = vh if variavel == "horas_trabalhadas" else h
+    req = _ceil_div(xp.maximum(falta, 0) * E4 - E4 // 2, xp.maximum(outro, 1))
+    val = xp.where(outro > 0, xp.maximum(req, 0), 0)
+    return val, (falta >= 0) & ((outro > 0) | (falta == 0))
+
+
+def resolver(ci: CalcInput, variavel: str, preco_alvo: float) -> Solucao:
+    """Valor de `variavel` que leva ci ao preço alvo (o valor atual dela é ignorado)."""
+    if variavel not in RESOLVIVEIS:
+        raise ValueError(f"Variável não resolvível: {variavel}")
+    val, viavel = _inverso(
+        _Py, variavel, _escala(preco_alvo, CENT),
+        _escala(ci.custo_material, CENT), _escala(ci.horas_trabalhadas, E4), _escala(ci.valor_hora, CENT),
+        _escala(ci.despesas_extras, CENT), _escala(ci.margem_lucro_pct, E4),
+    )
+    valor = val / _ESCALA_VAR[variavel]
+    args = {c: getattr(ci, c) for c in RESOLVIVEIS + ("despesas_extras",)}
+    args[variavel] = valor
+    _, final = preco_centavos(
+        args["custo_material"], args["horas_trabalhadas"], args["valor_hora"], args["despesas_extras"],
+        args["margem_lucro_pct"],
+    )
+    return Solucao(variavel, valor, bool(viavel), final)
+
+
+def resolver_lote(variavel: str, preco_alvo, custo_material, horas_trabalhadas, valor_hora, despesas_extras,
+                  margem_lucro_pct):
+    """Catálogo inteiro de uma vez -> (valores, viável, preco_final_centavos obtido), por linha."""
+    if variavel not in RESOLVIVEIS:
+        raise ValueError(f"Variável não resolvível: {variavel}")
+    cols = {
+        "custo_material": custo_material, "horas_trabalhadas": horas_trabalhadas, "valor_hora": valor_hora,
+        "despesas_extras": despesas_extras, "margem_lucro_pct": margem_lucro_pct,
+    }
+    escala = _ESCALA_VAR[variavel]
+    valores = viaveis = None
+    if np is not None and len(preco_alvo):
+        p = _np_escala(preco_alvo, CENT)
+        m, h, vh, d, mg = (_np_escala(cols[c], s) for c, s in (
+            ("custo_material", CENT), ("horas_trabalhadas", E4), ("valor_hora", CENT),
+            ("despesas_extras", CENT), ("margem_lucro_pct", E4),
+        ))
+        mx = [float(a.max()) for a in (p, m, h, vh, d, mg)]
+        # Mesmo cuidado do lote: só int64 se nenhum produto intermediário estoura
+        if mx[0] * MARGEM_ESCALA < _INT64_SEGURO and mx[2] * mx[3] < _INT64_SEGURO:
+            p, m, h, vh, d, mg = (a.astype(np.int64) for a in (p, m, h, vh, d, mg))
+            val, viaveis = _inverso(np, variavel, p, m, h, vh, d, mg)
+            valores = val / escala
+    if valores is None:
+        valores, viaveis = [], []
+        for alvo, mm, hh, vv, dd, gg in zip(preco_alvo, custo_material, horas_trabalhadas, valor_hora,
+                                           despesas_extras, margem_lucro_pct):
+            val, ok = _inverso(
+                _Py, variavel, _escala(alvo, CENT), _escala(mm, CENT), _escala(hh, E4), _escala(vv, CENT),
+                _escala(dd, CENT), _escala(gg, E4),
+            )
+            valores.append(val / escala)
+            viaveis.append(bool(ok))
+
+    # Preço obtido: mais uma passada do lote com a variável já resolvida
+    cols[variavel] = valores
+    _, final = calcular_lote(*(cols[c] for c in (
+        "custo_material", "horas_trabalhadas", "valor_hora", "despesas_extras", "margem_lucro_pct",
+    )))
+    return valores, viaveis, final
+
+
+# ------------------------------------------------------------
+# API antiga (dict com datas, conta em float), mantida como era para quem ainda usa;
+# o app usa calcular(CalcInput)
+# ------------------------------------------------------------
 
 def calcular_preco(produto, material, horas, valor_hora, despesas, margem, validade_dias=7):
 
@@ -24,4 +305,4 @@ def calcular_preco(produto, material, horas, valor_hora, despesas, margem, valid
         "data_emissao": data_emissao.strftime("%d/%m/%Y %H:%M"),
         "data_validade": data_validade.strftime("%d/%m/%Y"),
         "validade_dias": validade_dias,
-    }
\ No newline at end of file
+    }
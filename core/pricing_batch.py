@@ -0,0 +1,132 @@
+# core/pricing_batch.py
+# Entrada de lotes (JSON/CSV) convertida em colunas para core.pricing.calcular_lote —
+# sem criar um objeto por linha.
+import csv
+import io
+import math
+
+from core.pricing import calcular_lote, resolver_lote
+from core.schema import PRECO
+
+# Colunas numéricas de CalcInput, na ordem da fórmula
+CAMPOS_NUM = ("custo_material", "horas_trabalhadas", "valor_hora", "despesas_extras", "margem_lucro_pct")
+CAMPOS = ("produto",) + CAMPOS_NUM + ("validade_dias",)
+
+
+class LoteErro(ValueError):
+    pass
+
+
+def parse_num(v) -> float:
+    if isinstance(v, (int, float)):
+        return float(v)
+    s = str(v or "").strip().replace("R$", "").strip()
+    if not s:
+        return 0.0
+    if "," in s:
+        # aceita "1.234,56" (pt-BR) e "10,5"
+        s = s.replace(".", "").replace(",", ".")
+    return float(s)
+
+
+_VALIDADE = PRECO["validade_dias"]  # mesmo intervalo da API (0 a 3650 dias)
+
+
+def parse_validade(v) -> int:
+    d = parse_num(v)
+    if not math.isfinite(d) or not _VALIDADE.minimo <= d <= _VALIDADE.maximo:
+        raise ValueError(f"validade_dias deve estar entre {_VALIDADE.minimo} e {_VALIDADE.maximo}")
+    return int(d)
+
+
+def _colunas_vazias(extras: tuple = ()) -> dict:
+    return {c: [] for c in CAMPOS + extras}
+
+
+def _validar(cols: dict, limite: int) -> dict:
+    n = len(cols["produto"])
+    if n == 0:
+        raise LoteErro("Nenhum item enviado.")
+    if n > limite:
+        raise LoteErro(f"Máximo de {limite} itens por lote.")
+    for c in cols:
+        if len(cols[c]) != n:
+            raise LoteErro(f"Coluna '{c}' com tamanho diferente.")
+    return cols
+
+
+def colunas_de_json(data, limite: int, extras: tuple = ()) -> dict:
+    # Aceita {"itens": [{...}, ...]}, uma lista de itens, ou {"colunas": {campo: [...]}}.
+    # `extras`: colunas numéricas além das de CalcInput (ex.: "preco_alvo"), padrão 0.
+    if isinstance(data, dict) and isinstance(data.get("colunas"), dict):
+        src = data["colunas"]
+        n = len(src.get("produto") or [])
+        cols = {"produto": [str(p) for p in (src.get("produto") or [])]}
+        try:
+            for c in CAMPOS_NUM + extras:
+                cols[c] = [parse_num(v) for v in (src.get(c) or [0] * n)]
+        except (TypeError, ValueError) as e:
+            raise LoteErro(f"Valor numérico inválido: {e}")
+        cols["validade_dias"] = []
+        for i, v in enumerate(src.get("validade_dias") or [7] * n):
+            try:
+                cols["validade_dias"].append(parse_validade(v))
+            except (TypeError, ValueError) as e:
+                raise LoteErro(f"Item {i}: {e}")
+        return _validar(cols, limite)
+
+    itens = data.get("itens") if isinstance(data, dict) else data
+    if not isinstance(itens, list):
+        raise LoteErro("Envie uma lista em 'itens'.")
+    if len(itens) > limite:
+        raise LoteErro(f"Máximo de {limite} itens por lote.")
+    cols = _colunas_vazias(extras)
+    for i, it in enumerate(itens):
+        if not isinstance(it, dict):
+            raise LoteErro(f"Item {i}: objeto esperado.")
+        try:
+            cols["produto"].append(str(it.get("produto", "")))
+            for c in CAMPOS_NUM + extras:
+                cols[c].append(parse_num(it.get(c, 0)))
+            cols["validade_dias"].append(parse_validade(it.get("validade_dias", 7)))
+        except (TypeError, ValueError) as e:
+            raise LoteErro(f"Item {i}: valor numérico inválido: {e}")
+    return _validar(cols, limite)
+
+
+def colunas_de_csv(texto: str, limite: int, extras: tuple = ()) -> dict:
+    # CSV com cabeçalho; separador "," ou ";" (Excel pt-BR)
+    amostra = texto[:2048]
+    delim = ";" if amostra.count(";") > amostra.count(",") else ","
+    reader = csv.reader(io.StringIO(texto), delimiter=delim)
+    try:
+        header = [h.strip() for h in next(reader)]
+    except StopIteration:
+        raise LoteErro("CSV vazio.")
+    idx = {c: header.index(c) for c in CAMPOS + extras if c in header}
+    if "produto" not in idx:
+        raise LoteErro("CSV sem coluna 'produto'.")
+    cols = _colunas_vazias(extras)
+    try:
+        for linha, row in enumerate(reader, start=2):
+            if not row:
+                continue
+            if len(cols["produto"]) >= limite:
+                raise LoteErro(f"Máximo de {limite} itens por lote.")
+            cols["produto"].append(row[idx["produto"]])
+            for c in CAMPOS_NUM + extras:
+                cols[c].append(parse_num(row[idx[c]]) if c in idx else 0.0)
+            cols["validade_dias"].append(parse_validade(row[idx["validade_dias"]]) if "validade_dias" in idx else 7)
+    except (IndexError, ValueError) as e:
+        raise LoteErro(f"Linha {linha}: {e}")
+    return _validar(cols, limite)
+
+
+def calcular_colunas(cols: dict):
+    # (custo_base, preco_final) em centavos
+    return calcular_lote(*(cols[c] for c in CAMPOS_NUM))
+
+
+def resolver_colunas(cols: dict, variavel: str):
+    # Colunas de colunas_de_*(..., extras=("preco_alvo",)) -> (valores, viável, preco_final)
+    return resolver_lote(variavel, cols["preco_alvo"], *(cols[c] for c in CAMPOS_NUM))
@@ -0,0 +1,189 @@
+# core/quote_pdf.py
+# Layout do PDF de orçamento. As linhas fixas (título + empresa) vão para um
+# PdfTemplate em cache; cada orçamento só escreve as linhas variáveis.
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from core.pdf import PdfTemplate, pdf_bytes, pdf_stream
+from core.pricing import CalcInput, CalcResult, calcular, fmt_brl, fmt_centavos
+
+
+def _dados_empresa(dados_empresa: dict) -> Tuple[str, str, str, str]:
+    return (
+        dados_empresa.get("nome", "").strip(),
+        dados_empresa.get("telefone", "").strip(),
+        dados_empresa.get("email", "").strip(),
+        dados_empresa.get("endereco", "").strip(),
+    )
+
+
+def _linhas_itens(itens) -> list:
+    # Orçamento com itens (core/line_items.py): uma linha por item, com o custo
+    # acumulado nos itens de custo; depois os subtotais.
+    linhas = []
+    for _id, item, v, acumulado in itens.linhas():
+        nome = item.descricao or item.tipo.capitalize()
+        if item.pct is not None:
+            nome = f"{nome} ({item.pct:g}%)"
+        elif item.tipo == "trabalho":
+            nome = f"{nome}: {item.quantidade:g}h x {fmt_brl(item.unitario)}"
+        elif item.quantidade != 1:
+            nome = f"{nome}: {item.quantidade:g} x {fmt_brl(item.unitario)}"
+        if item.tipo == "desconto":
+            linhas.append(f"{nome} = -{fmt_centavos(v)}")
+        elif acumulado is None:
+            linhas.append(f"{nome} = {fmt_centavos(v)}")
+        else:
+            linhas.append(f"{nome} = {fmt_centavos(v)} (acumulado {fmt_centavos(acumulado)})")
+    t = itens.totais()
+    linhas += [
+        "",
+        f"Materiais: {fmt_centavos(t.materiais)}",
+        f"Trabalho: {fmt_centavos(t.trabalho)}",
+        f"Taxas: {fmt_centavos(t.taxas)}",
+        f"Custo Base: {fmt_centavos(t.custo_base)}",
+    ]
+    if t.descontos or t.impostos:
+        linhas.append(f"Subtotal: {fmt_centavos(t.com_margem)}")
+    if t.descontos:
+        linhas.append(f"Descontos: -{fmt_centavos(t.descontos)}")
+    if t.impostos:
+        linhas.append(f"Impostos: {fmt_centavos(t.impostos)}")
+    return linhas
+
+
+def _linhas_orcamento(empresa: Tuple[str, str, str, str], dados_cliente: dict, ci: CalcInput, cr: CalcResult,
+                      emitido_em: Optional[datetime] = None, itens=None):
+    # Observação: NÃO mostramos margem no PDF (como você pediu).
+    # emitido_em: data original de um orçamento do histórico (padrão: agora)
+    # itens: ItensOrcamento (core/line_items.py) no lugar de material/trabalho/despesas
+    now = (emitido_em or datetime.now()).strftime("%d/%m/%Y %H:%M")
+
+    empresa_nome, empresa_tel, empresa_email, empresa_end = empresa
+
+    cliente_nome = dados_cliente.get("nome", "").strip()
+    cliente_tel = dados_cliente.get("telefone", "").strip()
+    cliente_email = dados_cliente.get("email", "").strip()
+    cliente_end = dados_cliente.get("endereco", "").strip()
+
+    linhas = [
+        "ORCAMENTO - ARTE PRECO PRO",
+        "",
+        f"Data: {now}",
+        "",
+        "DADOS DA EMPRESA",
+        f"Nome: {empresa_nome}",
+        f"Telefone: {empresa_tel}",
+        f"E-mail: {empresa_email}",
+        f"Endereço: {empresa_end}",
+        "",
+        "DADOS DO CLIENTE",
+        f"Nome: {cliente_nome}",
+        f"Telefone: {cliente_tel}",
+        f"E-mail: {cliente_email}",
+        f"Endereço: {cliente_end}",
+        "",
+        "DETALHES DO SERVIÇO",
+        f"Produto/Serviço: {ci.produto}",
+    ]
+    if itens is None:
+        linhas += [
+            f"Custo material: {fmt_brl(ci.custo_material)}",
+            f"Trabalho: {ci.horas_trabalhadas:g}h x {fmt_brl(ci.valor_hora)}",
+            f"Despesas extras: {fmt_brl(ci.despesas_extras)}",
+            "",
+            f"Custo Base: {cr.custo_base_fmt}",
+        ]
+    else:
+        linhas += _linhas_itens(itens)
+    linhas += [
+        f"Preco Final: {cr.preco_final_fmt}",
+        f"Validade: {ci.validade_dias} dia(s)",
+    ]
+    return linhas
+
+
+# Linhas fixas da 1ª página (título + bloco da empresa). Elas vão para um esqueleto
+# pré-compilado, em cache por perfil de empresa: a chave é o próprio conteúdo, então
+# quando os dados da empresa mudam o esqueleto antigo simplesmente deixa de ser usado.
+PDF_LINHAS_FIXAS = (0, 4, 5, 6, 7, 8)
+_CI_VAZIO = CalcInput("", 0, 0, 0, 0, 0, 0)
+
+
+@lru_cache(maxsize=1024)
+def _pdf_template(empresa: Tuple[str, str, str, str], compress: bool) -> PdfTemplate:
+    linhas = _linhas_orcamento(empresa, {}, _CI_VAZIO, calcular(_CI_VAZIO))
+    return PdfTemplate({i: linhas[i] for i in PDF_LINHAS_FIXAS}, compress=compress)
+
+
+def _linhas_variaveis(dados_empresa: dict, dados_cliente: dict, ci: CalcInput, cr: CalcResult, compress: bool,
+                      emitido_em: Optional[datetime] = None, itens=None):
+    empresa = _dados_empresa(dados_empresa)
+    tpl = _pdf_template(empresa, compress)
+    linhas = _linhas_orcamento(empresa, dados_cliente, ci, cr, emitido_em, itens)
+    for i in tpl.slots:
+        linhas[i] = None
+    return tpl, linhas
+
+
+def gerar_pdf_bytes(dados_empresa: dict, dados_cliente: dict, ci: CalcInput, cr: CalcResult,
+                    compress: bool = False, emitido_em: Optional[datetime] = None, itens=None) -> bytes:
+    # PDF simples via texto (core/pdf.py, sem lib externa) — funciona bem na Vercel.
+    # Com itens (ItensOrcamento), todas as linhas do orçamento, em quantas páginas precisar.
+    tpl, linhas = _linhas_variaveis(dados_empresa, dados_cliente, ci, cr, compress, emitido_em, itens)
+    return pdf_bytes(linhas, compress=compress, template=tpl)
+
+
+def gerar_pdf_stream(dados_empresa: dict, dados_cliente: dict, ci: CalcInput, cr: CalcResult,
+                     compress: bool = True, emitido_em: Optional[datetime] = None, itens=None):
+    # Mesmo PDF, em pedaços (para Response(generator) ou para gravar em arquivo)
+    tpl, linhas = _linhas_variaveis(dados_empresa, dados_cliente, ci, cr, compress, emitido_em, itens)
+    return pdf_stream(linhas, compress=compress, template=tpl)
+
+
+# ------------------------------------------------------------
+# Simulação (core/sweep.py): uma linha por horas x valor da hora, com o preço de
+# cada opção. As margens aparecem só como "Opção N" (margem não vai para o PDF).
+# ------------------------------------------------------------
+
+def _linhas_simulacao(empresa: Tuple[str, str, str, str], grade, emitido_em: Optional[datetime] = None):
+    ci = grade.ci
+    now = (emitido_em or datetime.now()).strftime("%d/%m/%Y %H:%M")
+    empresa_nome, empresa_tel, empresa_email, empresa_end = empresa
+    ms = grade.eixos["margem_lucro_pct"]
+    linhas = [
+        "SIMULACAO DE PRECO - ARTE PRECO PRO",
+        "",
+        f"Data: {now}",
+        "",
+        "DADOS DA EMPRESA",
+        f"Nome: {empresa_nome}",
+        f"Telefone: {empresa_tel}",
+        f"E-mail: {empresa_email}",
+        f"Endereço: {empresa_end}",
+        "",
+        "DETALHES DO SERVIÇO",
+        f"Produto/Serviço: {ci.produto}",
+        f"Custo material: {fmt_brl(ci.custo_material)}",
+        f"Despesas extras: {fmt_brl(ci.despesas_extras)}",
+        f"Validade: {ci.validade_dias} dia(s)",
+        "",
+    ]
+    cb, pf = grade.custo_base, grade.preco_final
+    if hasattr(pf, "tolist"):
+        cb, pf = cb.tolist(), pf.tolist()
+    for i, h in enumerate(grade.eixos["horas_trabalhadas"]):
+        for j, v in enumerate(grade.eixos["valor_hora"]):
+            trabalho = f"Trabalho: {h:g}h x {fmt_brl(v)}"
+            if len(ms) == 1:
+                linhas.append(f"{trabalho} -> {fmt_centavos(pf[i][j][0])}")
+            else:
+                opcoes = " | ".join(f"Opção {k + 1}: {fmt_centavos(p)}" for k, p in enumerate(pf[i][j]))
+                linhas.append(f"{trabalho} -> {opcoes}")
+    return linhas
+
+
+def gerar_pdf_simulacao_stream(dados_empresa: dict, grade, compress: bool = True):
+    linhas = _linhas_simulacao(_dados_empresa(dados_empresa), grade)
+    return pdf_stream(linhas, compress=compress)
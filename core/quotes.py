@@ -0,0 +1,335 @@
+# core/quotes.py
+# Histórico de orçamentos: tabelas normalizadas (clients, company_snapshots, quotes),
+# índices para data/cliente/produto, busca FTS5 e paginação por cursor (keyset) —
+# nada de OFFSET, então a página 10.000 custa o mesmo que a primeira.
+#
+# O orçamento guarda o resultado já calculado (centavos) e os dados da empresa da
+# época: baixar o PDF de novo NÃO recalcula o preço. catalogo_versao aponta a versão
+# da tabela de preços (core/catalog.py) vigente quando o orçamento foi feito.
+# Orçamento com itens (core/line_items.py): os itens vão para quote_items com o
+# unitário que valia naquela versão, então mudar o catálogo depois não mexe nele.
+import json
+import sqlite3
+import time
+from typing import List, Optional
+
+from core.db import garantir_coluna
+from core.line_items import Item, ItensOrcamento
+from core.pricing import CalcInput, CalcResult, resultado_de_centavos
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS clients (
+        id INTEGER PRIMARY KEY,
+        tenant TEXT NOT NULL DEFAULT '',
+        nome TEXT NOT NULL,
+        telefone TEXT NOT NULL DEFAULT '',
+        email TEXT NOT NULL DEFAULT '',
+        endereco TEXT NOT NULL DEFAULT '',
+        UNIQUE (tenant, nome, telefone, email)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS company_snapshots (
+        id INTEGER PRIMARY KEY,
+        dados TEXT NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS quotes (
+        id INTEGER PRIMARY KEY,
+        tenant TEXT NOT NULL DEFAULT '',
+        criado_em INTEGER NOT NULL,
+        client_id INTEGER REFERENCES clients(id),
+        company_id INTEGER REFERENCES company_snapshots(id),
+        produto TEXT NOT NULL,
+        custo_material REAL NOT NULL,
+        horas_trabalhadas REAL NOT NULL,
+        valor_hora REAL NOT NULL,
+        despesas_extras REAL NOT NULL,
+        margem_lucro_pct REAL NOT NULL,
+        validade_dias INTEGER NOT NULL,
+        custo_base_centavos INTEGER NOT NULL,
+        preco_final_centavos INTEGER NOT NULL,
+        catalogo_versao INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS quote_items (
+        quote_id INTEGER NOT NULL REFERENCES quotes(id),
+        pos INTEGER NOT NULL,
+        tipo TEXT NOT NULL,
+        descricao TEXT NOT NULL DEFAULT '',
+        quantidade REAL NOT NULL,
+        unitario REAL NOT NULL,
+        pct REAL,
+        catalogo_id INTEGER,
+        PRIMARY KEY (quote_id, pos)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_quotes_data ON quotes(tenant, criado_em, id)",
+    "CREATE INDEX IF NOT EXISTS idx_quotes_cliente ON quotes(client_id, criado_em, id)",
+    "CREATE INDEX IF NOT EXISTS idx_quotes_produto ON quotes(tenant, produto)",
+)
+
+# Índice de texto (produto + nome do cliente; tenant para a busca já vir filtrada).
+# Sem conteúdo próprio: só o índice.
+SCHEMA_FTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS quotes_fts USING fts5("
+    "produto, cliente, tenant, content='', tokenize='unicode61 remove_diacritics 2')"
+)
+
+SQL_CLIENTE_UPSERT = (
+    "INSERT INTO clients(tenant, nome, telefone, email, endereco) VALUES(?,?,?,?,?) "
+    "ON CONFLICT(tenant, nome, telefone, email) DO UPDATE SET endereco=excluded.endereco"
+)
+SQL_CLIENTE_ID = "SELECT id FROM clients WHERE tenant=? AND nome=? AND telefone=? AND email=?"
+SQL_EMPRESA_INSERT = "INSERT OR IGNORE INTO company_snapshots(dados) VALUES(?)"
+SQL_EMPRESA_ID = "SELECT id FROM company_snapshots WHERE dados=?"
+SQL_QUOTE_INSERT = """
+    INSERT INTO quotes(tenant, criado_em, client_id, company_id, produto, custo_material, horas_trabalhadas,
+                       valor_hora, despesas_extras, margem_lucro_pct, validade_dias,
+                       custo_base_centavos, preco_final_centavos, catalogo_versao)
+    VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+"""
+SQL_FTS_INSERT = "INSERT INTO quotes_fts(rowid, produto, cliente, tenant) VALUES(?,?,?,?)"
+SQL_ITEM_INSERT = """
+    INSERT INTO quote_items(quote_id, pos, tipo, descricao, quantidade, unitario, pct, catalogo_id)
+    VALUES(?,?,?,?,?,?,?,?)
+"""
+SQL_ITENS = """
+    SELECT tipo, descricao, quantidade, unitario, pct, catalogo_id FROM quote_items
+    WHERE quote_id = ? ORDER BY pos
+"""
+
+_SELECT = """
+    SELECT q.id, q.criado_em, q.produto, q.custo_material, q.horas_trabalhadas, q.valor_hora,
+           q.despesas_extras, q.margem_lucro_pct, q.validade_dias,
+           q.custo_base_centavos, q.preco_final_centavos, q.catalogo_versao,
+           q.client_id, c.nome AS cliente_nome, c.telefone AS cliente_telefone,
+           c.email AS cliente_email, c.endereco AS cliente_endereco,
+           e.dados AS empresa
+    FROM quotes q
+    LEFT JOIN clients c ON c.id = q.client_id
+    LEFT JOIN company_snapshots e ON e.id = q.company_id
+"""
+
+CONTATO_CAMPOS = ("nome", "telefone", "email", "endereco")
+
+
+def init_schema(conn: sqlite3.Connection) -> bool:
+    """Cria as tabelas; retorna True se o FTS5 está disponível neste SQLite."""
+    with conn:
+        for sql in SCHEMA:
+            conn.execute(sql)
+        garantir_coluna(conn, "quotes", "catalogo_versao", "INTEGER")
+    try:
+        with conn:
+            conn.execute(SCHEMA_FTS)
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def tem_fts(conn: sqlite3.Connection) -> bool:
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE name='quotes_fts'").fetchone()
+    return row is not None
+
+
+def _contato(d: Optional[dict]) -> tuple:
+    d = d or {}
+    return tuple(str(d.get(k, "") or "").strip() for k in CONTATO_CAMPOS)
+
+
+def _cliente_id(conn: sqlite3.Connection, tenant: str, cliente: Optional[dict]) -> Optional[int]:
+    nome, tel, email, end = _contato(cliente)
+    if not nome:
+        return None
+    conn.execute(SQL_CLIENTE_UPSERT, (tenant, nome, tel, email, end))
+    return conn.execute(SQL_CLIENTE_ID, (tenant, nome, tel, email)).fetchone()[0]
+
+
+def _empresa_id(conn: sqlite3.Connection, empresa: Optional[dict]) -> Optional[int]:
+    valores = _contato(empresa)
+    if not any(valores):
+        return None
+    dados = json.dumps(dict(zip(CONTATO_CAMPOS, valores)), ensure_ascii=False, sort_keys=True)
+    conn.execute(SQL_EMPRESA_INSERT, (dados,))
+    return conn.execute(SQL_EMPRESA_ID, (dados,)).fetchone()[0]
+
+
+def _inserir(conn: sqlite3.Connection, tenant: str, ci: CalcInput, cr: CalcResult, cliente, empresa,
+             criado_em: int, fts: bool, catalogo_versao: Optional[int] = None) -> int:
+    client_id = _cliente_id(conn, tenant, cliente)
+    company_id = _empresa_id(conn, empresa)
+    cur = conn.execute(SQL_QUOTE_INSERT, (
+        tenant, criado_em, client_id, company_id, ci.produto, ci.custo_material, ci.horas_trabalhadas,
+        ci.valor_hora, ci.despesas_extras, ci.margem_lucro_pct, ci.validade_dias,
+        cr.custo_base_centavos, cr.preco_final_centavos, catalogo_versao,
+    ))
+    if fts:
+        conn.execute(SQL_FTS_INSERT, (cur.lastrowid, ci.produto, _contato(cliente)[0], tenant))
+    return cur.lastrowid
+
+
+def salvar(conn: sqlite3.Connection, ci: CalcInput, cr: CalcResult, cliente: Optional[dict] = None,
+           empresa: Optional[dict] = None, criado_em: Optional[int] = None, tenant: str = "") -> int:
+    """Grava um orçamento (com o preço já calculado) e devolve o id."""
+    return salvar_lote(conn, [(ci, cr, cliente)], empresa, criado_em, tenant)[0]
+
+
+def salvar_lote(conn: sqlite3.Connection, orcamentos, empresa: Optional[dict] = None,
+                criado_em: Optional[int] = None, tenant: str = "") -> List[int]:
+    """orcamentos: [(CalcInput, CalcResult, cliente ou None), ...] — uma transação só."""
+    with conn:
+        return inserir_lote(conn, orcamentos, empresa, criado_em, tenant)
+
+
+def inserir_lote(conn: sqlite3.Connection, orcamentos, empresa: Optional[dict] = None,
+                 criado_em: Optional[int] = None, tenant: str = "",
+                 catalogo_versao: Optional[int] = None) -> List[int]:
+    """Como salvar_lote, mas dentro da transação de quem chamou (ex.: o writer)."""
+    criado_em = int(time.time()) if criado_em is None else int(criado_em)
+    fts = tem_fts(conn)
+    return [
+        _inserir(conn, tenant, ci, cr, cliente, empresa, criado_em, fts, catalogo_versao)
+        for ci, cr, cliente in orcamentos
+    ]
+
+
+def inserir_itens(conn: sqlite3.Connection, orc: ItensOrcamento, cliente=None, empresa: Optional[dict] = None,
+                  criado_em: Optional[int] = None, tenant: str = "",
+                  catalogo_versao: Optional[int] = None) -> int:
+    """Orçamento com itens, dentro da transação de quem chamou. O resumo (custo base e
+    preço final) vai para quotes, como nos outros; os itens, para quote_items."""
+    criado_em = int(time.time()) if criado_em is None else int(criado_em)
+    quote_id = _inserir(conn, tenant, orc.calc_input(), orc.resultado(), cliente, empresa, criado_em,
+                        tem_fts(conn), catalogo_versao)
+    conn.executemany(SQL_ITEM_INSERT, [
+        (quote_id, pos, it.tipo, it.descricao, it.quantidade, it.unitario, it.pct, it.catalogo_id)
+        for pos, (_id, it, _v, _acc) in enumerate(orc.linhas())
+    ])
+    return quote_id
+
+
+def obter_itens(conn: sqlite3.Connection, row) -> Optional[ItensOrcamento]:
+    """Itens gravados do orçamento `row` (de obter/listar); None se ele não tem itens."""
+    itens = [Item(*r) for r in conn.execute(SQL_ITENS, (row["id"],))]
+    if not itens:
+        return None
+    return ItensOrcamento(row["produto"], row["margem_lucro_pct"], row["validade_dias"], itens)
+
+
+def _aspas(t: str) -> str:
+    return '"' + t.replace('"', '""') + '"'
+
+
+def _fts_query(busca: str, tenant: str = "") -> str:
+    # Palavras inteiras entre aspas ("logo" "ana"): nada de sintaxe FTS vinda do usuário.
+    # Sem prefixo (*) de propósito: prefixo junta as listas de todos os termos parecidos
+    # antes de ordenar e fica lento com milhões de linhas.
+    termos = " ".join(_aspas(t) for t in busca.split() if t.strip())
+    if tenant:
+        # Só {produto cliente}: o tenant não entra na busca do usuário
+        termos = f"{{produto cliente}} : ({termos}) AND tenant : {_aspas(tenant)}"
+    return termos
+
+
+def cursor_de(row) -> str:
+    return f"{row['criado_em']}.{row['id']}"
+
+
+def _ler_cursor(cursor: Optional[str]):
+    if not cursor:
+        return None
+    try:
+        criado_em, quote_id = cursor.split(".", 1)
+        return int(criado_em), int(quote_id)
+    except ValueError:
+        raise ValueError("Cursor inválido.")
+
+
+def listar(conn: sqlite3.Connection, limite: int = 50, cursor: Optional[str] = None,
+           cliente_id: Optional[int] = None, de: Optional[int] = None, ate: Optional[int] = None,
+           busca: Optional[str] = None, tenant: str = ""):
+    """Mais recentes primeiro, só do tenant. -> (linhas, próximo_cursor ou None)."""
+    where = ["q.tenant = ?"]
+    params = [tenant]
+    pos = _ler_cursor(cursor)
+    busca = (busca or "").strip()
+    fts = bool(busca) and tem_fts(conn)
+
+    sql = _SELECT
+    if fts:
+        # Com busca, quem manda é o índice FTS (rowid = id do orçamento, em ordem
+        # decrescente): só as primeiras `limite` ocorrências são lidas.
+        sql = sql.replace("FROM quotes q", "FROM quotes_fts f JOIN quotes q ON q.id = f.rowid")
+        where.append("quotes_fts MATCH ?")
+        params.append(_fts_query(busca, tenant))
+        if pos is not None:
+            where.append("f.rowid < ?")
+            params.append(pos[1])
+        ordem = "f.rowid DESC"
+    else:
+        if pos is not None:
+            where.append("(q.criado_em, q.id) < (?, ?)")
+            params.extend(pos)
+        if busca:
+            where.append("(q.produto LIKE ? OR c.nome LIKE ?)")
+            params.extend([f"%{busca}%"] * 2)
+        ordem = "q.criado_em DESC, q.id DESC"
+    if cliente_id is not None:
+        where.append("q.client_id = ?")
+        params.append(cliente_id)
+    if de is not None:
+        where.append("q.criado_em >= ?")
+        params.append(int(de))
+    if ate is not None:
+        where.append("q.criado_em < ?")
+        params.append(int(ate))
+
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {ordem} LIMIT ?"
+    params.append(int(limite) + 1)
+
+    rows = conn.execute(sql, params).fetchall()
+    proximo = None
+    if len(rows) > limite:
+        rows = rows[:limite]
+        proximo = cursor_de(rows[-1])
+    return rows, proximo
+
+
+def obter(conn: sqlite3.Connection, quote_id: int, tenant: str = ""):
+    return conn.execute(_SELECT + " WHERE q.id = ? AND q.tenant = ?", (quote_id, tenant)).fetchone()
+
+
+def para_dict(row) -> dict:
+    return {
+        "id": row["id"],
+        "criado_em": row["criado_em"],
+        "produto": row["produto"],
+        "custo_material": row["custo_material"],
+        "horas_trabalhadas": row["horas_trabalhadas"],
+        "valor_hora": row["valor_hora"],
+        "despesas_extras": row["despesas_extras"],
+        "margem_lucro_pct": row["margem_lucro_pct"],
+        "validade_dias": row["validade_dias"],
+        "custo_base_centavos": row["custo_base_centavos"],
+        "preco_final_centavos": row["preco_final_centavos"],
+        "catalogo_versao": row["catalogo_versao"],
+        "cliente": {k: row[f"cliente_{k}"] or "" for k in CONTATO_CAMPOS} if row["client_id"] else None,
+    }
+
+
+def reconstruir(row):
+    """-> (empresa, cliente, CalcInput, CalcResult) do jeito que foram gravados, sem recalcular."""
+    ci = CalcInput(
+        row["produto"], row["custo_material"], row["horas_trabalhadas"], row["valor_hora"],
+        row["despesas_extras"], row["margem_lucro_pct"], row["validade_dias"],
+    )
+    cr = resultado_de_centavos(row["custo_base_centavos"], row["preco_final_centavos"])
+    empresa = json.loads(row["empresa"]) if row["empresa"] else {}
+    cliente = {k: row[f"cliente_{k}"] or "" for k in CONTATO_CAMPOS} if row["client_id"] else {}
+    return empresa, cliente, ci, cr
@@ -0,0 +1,159 @@
+# core/schema.py
+# Validação leve de entrada JSON (sem dependência externa) + serialização rápida.
+# Valida TUDO antes de calcular: a resposta de erro lista todos os campos ruins.
+import json
+import math
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usamos json da stdlib
+    orjson = None
+
+
+def dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class Campo:
+    __slots__ = ("tipo", "obrigatorio", "padrao", "minimo", "maximo", "max_len")
+
+    def __init__(self, tipo, obrigatorio: bool = True, padrao=None, minimo=None, maximo=None, max_len=None):
+        self.tipo = tipo
+        self.obrigatorio = obrigatorio
+        self.padrao = padrao
+        self.minimo = minimo
+        self.maximo = maximo
+        self.max_len = max_len
+
+
+def _checar(nome: str, campo: Campo, v):
+    if campo.tipo is float:
+        # bool é int em Python, mas não é número aqui
+        if isinstance(v, bool) or not isinstance(v, (int, float)) or not math.isfinite(v):
+            return None, f"{nome}: número esperado"
+        v = float(v)
+    elif campo.tipo is int:
+        if isinstance(v, bool) or not isinstance(v, int):
+            return None, f"{nome}: inteiro esperado"
+    elif campo.tipo is str:
+        if not isinstance(v, str):
+            return None, f"{nome}: texto esperado"
+        if campo.max_len is not None and len(v) > campo.max_len:
+            return None, f"{nome}: máximo de {campo.max_len} caracteres"
+    elif campo.tipo is dict:
+        if not isinstance(v, dict):
+            return None, f"{nome}: objeto esperado"
+    elif campo.tipo is list:
+        if not isinstance(v, list):
+            return None, f"{nome}: lista esperada"
+        if campo.max_len is not None and len(v) > campo.max_len:
+            return None, f"{nome}: máximo de {campo.max_len} itens"
+    if campo.minimo is not None and v < campo.minimo:
+        return None, f"{nome}: mínimo {campo.minimo}"
+    if campo.maximo is not None and v > campo.maximo:
+        return None, f"{nome}: máximo {campo.maximo}"
+    return v, None
+
+
+def validar(schema: dict, data, extras: bool = False):
+    """-> (dados_limpos, erros). Campos desconhecidos são erro, a não ser com extras=True."""
+    if not isinstance(data, dict):
+        return None, ["corpo: objeto JSON esperado"]
+    limpos = {}
+    erros = []
+    for nome, campo in schema.items():
+        if nome not in data or data[nome] is None:
+            if campo.obrigatorio:
+                erros.append(f"{nome}: obrigatório")
+            else:
+                limpos[nome] = campo.padrao
+            continue
+        v, erro = _checar(nome, campo, data[nome])
+        if erro:
+            erros.append(erro)
+        else:
+            limpos[nome] = v
+    if not extras:
+        for nome in data:
+            if nome not in schema:
+                erros.append(f"{nome}: campo desconhecido")
+    return (None if erros else limpos), erros
+
+
+# ------------------------------------------------------------
+# Schemas da API v1
+# ------------------------------------------------------------
+
+_DINHEIRO = dict(minimo=0, maximo=1e9)
+
+PRECO = {
+    "produto": Campo(str, max_len=200),
+    "custo_material": Campo(float, **_DINHEIRO),
+    "horas_trabalhadas": Campo(float, minimo=0, maximo=1e6),
+    "valor_hora": Campo(float, **_DINHEIRO),
+    "despesas_extras": Campo(float, obrigatorio=False, padrao=0.0, **_DINHEIRO),
+    "margem_lucro_pct": Campo(float, minimo=0, maximo=1e5),
+    "validade_dias": Campo(int, obrigatorio=False, padrao=7, minimo=0, maximo=3650),
+}
+
+CONTATO = {
+    "nome": Campo(str, obrigatorio=False, padrao="", max_len=200),
+    "telefone": Campo(str, obrigatorio=False, padrao="", max_len=50),
+    "email": Campo(str, obrigatorio=False, padrao="", max_len=200),
+    "endereco": Campo(str, obrigatorio=False, padrao="", max_len=300),
+}
+
+ORCAMENTO_PDF = dict(PRECO, cliente=Campo(dict, obrigatorio=False, padrao={}))
+
+# Orçamento com itens (core/line_items.py); tipo: material, trabalho, taxa, desconto, imposto
+# Com catalogo_id, tipo/descrição/unitário vêm do catálogo (na versão do orçamento)
+ITEM = {
+    "tipo": Campo(str, obrigatorio=False, padrao="", max_len=20),
+    "descricao": Campo(str, obrigatorio=False, padrao="", max_len=200),
+    "quantidade": Campo(float, obrigatorio=False, padrao=1.0, minimo=0, maximo=1e6),
+    "unitario": Campo(float, obrigatorio=False, padrao=0.0, **_DINHEIRO),
+    "pct": Campo(float, obrigatorio=False, minimo=0, maximo=1e5),
+    "catalogo_id": Campo(int, obrigatorio=False, minimo=1),
+}
+
+ORCAMENTO_ITENS = {
+    "produto": Campo(str, max_len=200),
+    "margem_lucro_pct": Campo(float, obrigatorio=False, padrao=0.0, minimo=0, maximo=1e5),
+    "validade_dias": Campo(int, obrigatorio=False, padrao=7, minimo=0, maximo=3650),
+    "itens": Campo(list, max_len=10000),
+    "cliente": Campo(dict, obrigatorio=False, padrao={}),
+    "catalogo_versao": Campo(int, obrigatorio=False, minimo=0),
+}
+
+# Simulação: faixas = {"margem_lucro_pct": {"de", "ate", "passo"} ou {"valores"}, ...}
+SIMULACAO = dict(PRECO, faixas=Campo(dict, obrigatorio=False, padrao={}))
+
+# Preço reverso: a variável em "resolver" é a incógnita, então não é obrigatória.
+# "resolver" também pode vir na query string (?resolver=...), então no corpo é opcional.
+_RESOLVIVEIS = ("margem_lucro_pct", "horas_trabalhadas", "valor_hora", "custo_material")
+RESOLVER = {
+    v: dict(
+        PRECO,
+        **{v: Campo(float, obrigatorio=False, padrao=0.0)},
+        resolver=Campo(str, obrigatorio=False, padrao=v, max_len=40),
+        preco_alvo=Campo(float, **_DINHEIRO),
+    )
+    for v in _RESOLVIVEIS
+}
+
+# Catálogo (core/catalog.py): custo = preço por unidade (material) ou valor da hora (trabalho)
+CATALOGO_ITEM = {
+    "tipo": Campo(str, obrigatorio=False, padrao="material", max_len=20),
+    "nome": Campo(str, max_len=200),
+    "fornecedor": Campo(str, obrigatorio=False, padrao="", max_len=200),
+    "unidade": Campo(str, obrigatorio=False, padrao="", max_len=20),
+    "custo": Campo(float, **_DINHEIRO),
+}
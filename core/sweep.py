@@ -0,0 +1,168 @@
+# core/sweep.py
+# Simulação "e se?": um CalcInput + faixas de margem, horas e valor da hora ->
+# a grade inteira de preços, calculada de uma vez em core.pricing.calcular_lote
+# (uma passada vetorizada, não uma chamada a calcular por célula).
+#
+# Faixa: {"de": 50, "ate": 100, "passo": 5} ou {"valores": [50, 80, 120]}.
+# Eixo sem faixa = o valor do próprio CalcInput.
+import math
+from typing import List, Optional
+
+from core.money import BRL
+from core.pricing import CalcInput, calcular_lote
+
+try:
+    import numpy as np
+except ImportError:  # numpy é opcional; sem ele a grade é montada em Python
+    np = None
+
+# Ordem dos eixos na grade: preco_final[h][v][m]
+EIXOS = ("horas_trabalhadas", "valor_hora", "margem_lucro_pct")
+
+
+class SweepErro(ValueError):
+    pass
+
+
+def faixa(spec, nome: str, max_pontos: int) -> List[float]:
+    if isinstance(spec, list):
+        spec = {"valores": spec}
+    if not isinstance(spec, dict):
+        raise SweepErro(f"faixas.{nome}: faixa deve ser {{de, ate, passo}} ou {{valores}}")
+    try:
+        if "valores" in spec:
+            valores = [float(v) for v in spec["valores"]]
+        else:
+            de, ate, passo = float(spec["de"]), float(spec["ate"]), float(spec["passo"])
+            if not (passo > 0) or ate < de:
+                raise SweepErro(f"faixas.{nome}: use de <= ate e passo > 0")
+            n = int(math.floor((ate - de) / passo + 1e-9)) + 1
+            if n > max_pontos:
+                raise SweepErro(f"faixas.{nome}: máximo de {max_pontos} pontos")
+            # round: 0.1 + 0.2 vira 0.3, não 0.30000000000000004
+            valores = [round(de + i * passo, 6) for i in range(n)]
+    except (KeyError, TypeError, ValueError) as e:
+        if isinstance(e, SweepErro):
+            raise
+        raise SweepErro(f"faixas.{nome}: faixa inválida")
+    if not valores:
+        raise SweepErro(f"faixas.{nome}: faixa vazia")
+    if len(valores) > max_pontos:
+        raise SweepErro(f"faixas.{nome}: máximo de {max_pontos} pontos")
+    if not all(math.isfinite(v) and v >= 0 for v in valores):
+        raise SweepErro(f"faixas.{nome}: valores devem ser números >= 0")
+    return valores
+
+
+class Grade:
+    """Resultado da simulação. custo_base[h][v] e preco_final[h][v][m], em centavos."""
+
+    __slots__ = ("ci", "eixos", "custo_base", "preco_final")
+
+    def __init__(self, ci: CalcInput, eixos: dict, custo_base, preco_final):
+        self.ci = ci
+        self.eixos = eixos
+        self.custo_base = custo_base
+        self.preco_final = preco_final
+
+    @property
+    def celulas(self) -> int:
+        return len(self.eixos["horas_trabalhadas"]) * len(self.eixos["valor_hora"]) * len(self.eixos["margem_lucro_pct"])
+
+    def para_dict(self) -> dict:
+        cb, pf = self.custo_base, self.preco_final
+        if np is not None and hasattr(pf, "tolist"):
+            cb, pf = cb.tolist(), pf.tolist()
+        return {
+            "produto": self.ci.produto,
+            "eixos": self.eixos,
+            "custo_base_centavos": cb,
+            "preco_final_centavos": pf,
+        }
+
+    def linhas(self):
+        """(horas, valor_hora, margem, custo_base, preco_final) célula a célula."""
+        hs, vs, ms = (self.eixos[e] for e in EIXOS)
+        cb, pf = self.custo_base, self.preco_final
+        if np is not None and hasattr(pf, "tolist"):
+            cb, pf = cb.tolist(), pf.tolist()
+        for i, h in enumerate(hs):
+            for j, v in enumerate(vs):
+                base = cb[i][j]
+                finais = pf[i][j]
+                for k, m in enumerate(ms):
+                    yield h, v, m, base, finais[k]
+
+    def csv(self, bloco: int = 2000):
+        yield "horas_trabalhadas;valor_hora;margem_lucro_pct;custo_base;preco_final;preco_final_fmt\n"
+        hs, vs, ms = (self.eixos[e] for e in EIXOS)
+        ms_txt = [f"{m:g}" for m in ms]
+        cb, pf = self.custo_base, self.preco_final
+        if np is not None and hasattr(pf, "tolist"):
+            cb, pf = cb.tolist(), pf.tolist()
+        buf = []
+        for i, h in enumerate(hs):
+            # Preços da linha inteira formatados de uma vez; a zip abaixo consome
+            # exatamente len(ms) textos por (h, v), na mesma ordem de pf[i][j]
+            textos = iter(BRL.format_many([f for fs in pf[i] for f in fs], centavos=True))
+            for j, v in enumerate(vs):
+                # Tudo o que não depende da margem é formatado uma vez por (h, v)
+                base = cb[i][j]
+                pre = f"{h:g};{v:g};"
+                meio = f";{base // 100}.{base % 100:02d};"
+                for m, f, txt in zip(ms_txt, pf[i][j], textos):
+                    buf.append(f"{pre}{m}{meio}{f // 100}.{f % 100:02d};{txt}\n")
+                if len(buf) >= bloco:
+                    yield "".join(buf)
+                    buf = []
+        if buf:
+            yield "".join(buf)
+
+
+def varrer(ci: CalcInput, faixas: Optional[dict] = None, max_celulas: int = 250_000) -> Grade:
+    """Calcula a grade horas x valor_hora x margem numa passada só."""
+    faixas = faixas or {}
+    desconhecidos = set(faixas) - set(EIXOS)
+    if desconhecidos:
+        raise SweepErro("; ".join(f"faixas.{e}: eixo desconhecido" for e in sorted(desconhecidos)))
+    eixos = {}
+    for e in EIXOS:
+        eixos[e] = faixa(faixas[e], e, max_celulas) if e in faixas else [float(getattr(ci, e))]
+    hs, vs, ms = (eixos[e] for e in EIXOS)
+    n = len(hs) * len(vs) * len(ms)
+    if n > max_celulas:
+        raise SweepErro(f"faixas: grade com {n} células; máximo {max_celulas}")
+
+    # O custo base só depende de horas x valor_hora: calcula H*V células e depois
+    # aplica todas as margens a elas (margem é o eixo mais interno da grade).
+    nhv = len(hs) * len(vs)
+    if np is not None:
+        h_col = np.repeat(np.asarray(hs, dtype=np.float64), len(vs))
+        v_col = np.tile(np.asarray(vs, dtype=np.float64), len(hs))
+        base, _ = calcular_lote(
+            np.full(nhv, ci.custo_material), h_col, v_col, np.full(nhv, ci.despesas_extras), np.zeros(nhv),
+        )
+        base_rep = np.repeat(np.asarray(base, dtype=np.float64), len(ms)) / 100.0
+        mg_col = np.tile(np.asarray(ms, dtype=np.float64), nhv)
+    else:
+        h_col = [h for h in hs for _v in vs]
+        v_col = [v for _h in hs for v in vs]
+        base, _ = calcular_lote([ci.custo_material] * nhv, h_col, v_col, [ci.despesas_extras] * nhv, [0.0] * nhv)
+        base_rep = [b / 100.0 for b in base for _m in ms]
+        mg_col = [m for _b in base for m in ms]
+
+    # Segunda passada com o custo base (centavos -> reais, exato) como "material":
+    # a fórmula dá o mesmo preço final que calcular() célula a célula.
+    zeros = np.zeros(n) if np is not None else [0.0] * n
+    _, final = calcular_lote(base_rep, zeros, zeros, zeros, mg_col)
+
+    if np is not None and hasattr(base, "reshape") and hasattr(final, "reshape"):
+        return Grade(ci, eixos, base.reshape(len(hs), len(vs)), final.reshape(len(hs), len(vs), len(ms)))
+    base = [int(b) for b in base]
+    final = [int(f) for f in final]
+    cb = [base[i * len(vs):(i + 1) * len(vs)] for i in range(len(hs))]
+    pf = [
+        [final[(i * len(vs) + j) * len(ms):(i * len(vs) + j + 1) * len(ms)] for j in range(len(vs))]
+        for i in range(len(hs))
+    ]
+    return Grade(ci, eixos, cb, pf)
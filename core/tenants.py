@@ -0,0 +1,100 @@
+# core/tenants.py
+# Perfil da empresa por estúdio (tenant = cliente da licença, payload["c"]).
+#
+# Tabela company_profiles com o tenant como chave primária; na frente dela, um
+# cache LRU em memória (KVCache): depois da primeira leitura, achar o perfil de um
+# tenant é um acesso a dict, com milhares de tenants ou com um só. O contador de
+# versão (gravação de outro processo) é lido no máximo a cada `sync_ms`; a gravação
+# deste processo só troca o tenant gravado no cache.
+import json
+import time
+
+from core.db import bump_versao, init_versoes, versao
+from core.kvcache import KVCache, MISSING
+
+SQL_TABLE = """
+    CREATE TABLE IF NOT EXISTS company_profiles (
+        tenant TEXT PRIMARY KEY,
+        dados TEXT NOT NULL,
+        atualizado_em INTEGER NOT NULL
+    ) WITHOUT ROWID
+"""
+SQL_GET = "SELECT dados FROM company_profiles WHERE tenant=?"
+SQL_SET = (
+    "INSERT INTO company_profiles(tenant, dados, atualizado_em) VALUES(?,?,?) "
+    "ON CONFLICT(tenant) DO UPDATE SET dados=excluded.dados, atualizado_em=excluded.atualizado_em"
+)
+
+CAMPOS = ("nome", "telefone", "email", "endereco")
+VERSAO = "company_profiles"
+
+
+class TenantProfiles:
+    """get(tenant) -> dict da empresa (NÃO altere o dict devolvido: ele é o do cache).
+
+    `padrao(tenant)` é chamado quando o tenant ainda não tem perfil (ex.: a empresa
+    única do kv, de antes do multi-estúdio)."""
+
+    def __init__(self, pool, writer, padrao=None, maxsize: int = 4096, ttl: float = 300.0, sync_ms: float = 100):
+        self.pool = pool
+        self.writer = writer
+        self.padrao = padrao
+        self.cache = KVCache(maxsize=maxsize, ttl=ttl)
+        self.sync = sync_ms / 1000.0
+        self._versao = (0.0, None)  # (lido_em, versão) do último SELECT no contador
+
+    def init(self) -> None:
+        conn = self.pool.get()
+        with conn:
+            conn.execute(SQL_TABLE)
+        init_versoes(conn)
+
+    def _sync(self, conn) -> None:
+        # Outro processo mudou algum perfil? (contador em core/db.py)
+        lido_em, v = self._versao
+        agora = time.monotonic()
+        if v is None or agora - lido_em >= self.sync:
+            v = versao(conn, VERSAO)
+            self._versao = (agora, v)
+        self.cache.sync(VERSAO, v)
+
+    def get(self, tenant: str) -> dict:
+        conn = self.pool.get()
+        self._sync(conn)
+        v, hit = self.cache.get(tenant)
+        if not hit:
+            epoch = self.cache.epoch()
+            row = conn.execute(SQL_GET, (tenant,)).fetchone()
+            v = MISSING
+            if row:
+                try:
+                    v = json.loads(row[0])
+                except ValueError:
+                    pass
+            self.cache.put(tenant, v, epoch=epoch)
+        if v is MISSING:
+            return self.padrao(tenant) if self.padrao else {}
+        return v
+
+    def set(self, tenant: str, dados: dict) -> dict:
+        dados = {k: str(dados.get(k, "") or "").strip() for k in CAMPOS}
+        raw = json.dumps(dados, ensure_ascii=False)
+
+        def job(conn):
+            antes = versao(conn, VERSAO)
+            conn.execute(SQL_SET, (tenant, raw, int(time.time())))
+            bump_versao(conn, VERSAO)
+            return antes
+
+        # Espera o commit: mudança de perfil é rara e tem que valer já em todos os processos
+        antes = self.writer.submit(job).result(self.writer.espera)
+        self.cache.set(tenant, dados)
+        # Só este tenant mudou (por nós): o resto do cache continua valendo
+        lido_em, v = self._versao
+        if v == antes:
+            self._versao = (lido_em, antes + 1)
+        self.cache.avancar(VERSAO, antes, antes + 1)
+        return dados
+
+    def stats(self) -> dict:
+        return self.cache.stats()
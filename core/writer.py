@@ -0,0 +1,190 @@
+# core/writer.py
+# Escrita em segundo plano (write-behind) para o SQLite.
+#
+# O request só enfileira a escrita e segue; uma thread dedicada junta o que chegou
+# e grava tudo numa transação só, a cada `max_lote` itens ou `max_atraso_ms`
+# (o que vier primeiro). Fila cheia = backpressure: quem enfileira espera.
+# No encerramento (atexit) a fila é esvaziada antes de sair.
+#
+# Cada job é uma função job(conn) que NÃO abre/fecha transação (quem faz isso é o
+# writer). submit() devolve um Future: quem precisa do resultado (ex.: o id gravado)
+# espera por ele (no máximo `espera` segundos); quem não precisa, não espera.
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+log = logging.getLogger(__name__)
+
+_FIM = object()
+
+
+class WriteBehind:
+    def __init__(self, pool, max_lote: int = 500, max_atraso_ms: float = 20, max_fila: int = 10000,
+                 sincrono: bool = False, espera: float = 30.0):
+        self.pool = pool
+        self.max_lote = max_lote
+        self.max_atraso = max_atraso_ms / 1000.0
+        self.max_fila = max_fila
+        # sincrono=True: grava na hora, na thread de quem chamou (testes, serverless)
+        self.sincrono = sincrono
+        # Quanto quem precisa do resultado espera pelo commit antes de desistir (TimeoutError)
+        self.espera = espera
+        self._lock = threading.Lock()
+        self._fila = queue.Queue(maxsize=max_fila)
+        self._thread = None
+        self._pid = os.getpid()
+        self._fechado = False
+        self._stats_lock = threading.Lock()
+        self._stats = {"enfileirados": 0, "gravados": 0, "lotes": 0, "erros": 0}
+
+    # ---------------- API ----------------
+
+    def submit(self, job, timeout: float = None) -> Future:
+        """Enfileira job(conn). Bloqueia se a fila estiver cheia (queue.Full após timeout)."""
+        fut = Future()
+        if not self.sincrono and self._enfileirar((job, fut), timeout):
+            return fut
+        # síncrono ou writer já fechado: grava na hora
+        self._gravar([(job, fut)])
+        return fut
+
+    def executar(self, sql: str, params=(), timeout: float = None) -> Future:
+        return self.submit(lambda conn: conn.execute(sql, params).lastrowid, timeout)
+
+    def flush(self, timeout: float = None) -> None:
+        """Espera tudo o que já foi enfileirado estar gravado."""
+        self.submit(lambda conn: None).result(timeout)
+
+    def close(self, timeout: float = 10.0) -> None:
+        with self._lock:
+            self._fechado = True
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._fila.put(_FIM)
+            thread.join(timeout)
+        else:
+            # Sem thread viva ninguém mais lê a fila: grava o que ficou aqui mesmo
+            self._drenar()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            st = dict(self._stats)
+        return dict(st, fila=self._fila.qsize(), max_fila=self.max_fila, sincrono=self.sincrono)
+
+    # ---------------- thread ----------------
+
+    def _enfileirar(self, item, timeout: float = None) -> bool:
+        # Checar "fechado" e enfileirar sob o mesmo lock: close() só põe o _FIM depois,
+        # então nada entra na fila depois que a thread já saiu. False = writer fechado.
+        prazo = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if self._fechado:
+                    return False
+                self._garantir_thread()
+                try:
+                    self._fila.put_nowait(item)
+                except queue.Full:
+                    pass
+                else:
+                    self._contar(enfileirados=1)
+                    return True
+            # Fila cheia (backpressure): espera fora do lock, para close() e os outros seguirem
+            if prazo is not None and time.monotonic() >= prazo:
+                raise queue.Full
+            time.sleep(0.001)
+
+    def _garantir_thread(self) -> None:
+        # Chamado com self._lock. Thread não sobrevive a fork (gunicorn --preload): cada
+        # processo sobe a sua; e se ela morreu, sobe outra (a fila continua a mesma).
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._thread = None
+            self._fila = queue.Queue(maxsize=self.max_fila)
+        if self._thread is None or not self._thread.is_alive():
+            if self._thread is not None:
+                log.error("writer: thread parada, subindo outra")
+            self._thread = threading.Thread(target=self._loop, name="artepreco-writer", daemon=True)
+            self._thread.start()
+
+    def _loop(self) -> None:
+        fim = False
+        while not fim:
+            item = self._fila.get()
+            if item is _FIM:
+                break
+            lote = [item]
+            limite = time.monotonic() + self.max_atraso
+            while len(lote) < self.max_lote:
+                resta = limite - time.monotonic()
+                if resta <= 0:
+                    break
+                try:
+                    item = self._fila.get(timeout=resta)
+                except queue.Empty:
+                    break
+                if item is _FIM:
+                    fim = True
+                    break
+                lote.append(item)
+            self._gravar(lote)
+        # Encerramento: o que sobrou na fila ainda é gravado
+        self._drenar()
+
+    def _drenar(self) -> None:
+        resto = []
+        while True:
+            try:
+                item = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _FIM:
+                resto.append(item)
+        if resto:
+            self._gravar(resto)
+
+    def _contar(self, **n) -> None:
+        with self._stats_lock:
+            for k, v in n.items():
+                self._stats[k] += v
+
+    def _gravar(self, lote) -> None:
+        # Nunca levanta: o erro vai para o Future de cada job (a thread não pode morrer)
+        try:
+            conn = self.pool.get()
+            with conn:
+                resultados = [job(conn) for job, _fut in lote]
+        except Exception:
+            # Um job ruim não pode derrubar o lote inteiro: refaz um por um
+            gravados = erros = 0
+            for job, fut in lote:
+                try:
+                    conn = self.pool.get()
+                    with conn:
+                        r = job(conn)
+                except Exception as e:
+                    erros += 1
+                    log.exception("writer: falha ao gravar")
+                    _resolver(fut, erro=e)
+                else:
+                    gravados += 1
+                    _resolver(fut, r)
+            self._contar(gravados=gravados, erros=erros, lotes=1)
+        else:
+            for (_job, fut), r in zip(lote, resultados):
+                _resolver(fut, r)
+            self._contar(gravados=len(lote), lotes=1)
+
+
+def _resolver(fut: Future, resultado=None, erro: BaseException = None) -> None:
+    # Future cancelado por quem esperava: o job já foi (ou não) gravado, só não há a quem avisar
+    if not fut.set_running_or_notify_cancel():
+        return
+    if erro is not None:
+        fut.set_exception(erro)
+    else:
+        fut.set_result(resultado)
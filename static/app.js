@@ -0,0 +1,164 @@
+// Registra o Service Worker (para instalação/offline)
+if ('serviceWorker' in navigator) {
+  window.addEventListener('load', () => {
+    navigator.serviceWorker.register('/sw.js').catch(()=>{});
+  });
+}
+
+// Cálculo no próprio navegador (static/pricing.js): prévia instantânea enquanto digita
+// e, sem internet, o orçamento é calculado aqui e fica numa fila até a conexão voltar.
+(function () {
+  const FILA = 'artepreco-fila';
+  const RECUSADOS = 'artepreco-fila-recusados';
+  const CAMPOS_NUM = ['custo_material', 'horas_trabalhadas', 'valor_hora', 'despesas_extras', 'margem_lucro_pct'];
+
+  function lerForm(form) {
+    const item = { produto: form.produto.value.trim() };
+    CAMPOS_NUM.forEach((c) => { item[c] = window.ArtePreco.parseNum(form[c].value); });
+    item.validade_dias = parseInt(form.validade_dias.value, 10) || 7;
+    return item;
+  }
+
+  function fila() {
+    try { return JSON.parse(localStorage.getItem(FILA) || '[]'); } catch (e) { return []; }
+  }
+
+  function salvarFila(itens) {
+    localStorage.setItem(FILA, JSON.stringify(itens));
+  }
+
+  // Itens que o servidor recusou (4xx): saem da fila para não travar o resto e ficam
+  // guardados aqui, em vez de sumirem
+  function separarRecusados(recusados) {
+    if (!recusados.length) return;
+    let antigos = [];
+    try { antigos = JSON.parse(localStorage.getItem(RECUSADOS) || '[]'); } catch (e) { /* recomeça */ }
+    localStorage.setItem(RECUSADOS, JSON.stringify(antigos.concat(recusados)));
+    console.warn('ArtePreço: ' + recusados.length + ' orçamento(s) recusado(s) pelo servidor, guardados em ' + RECUSADOS);
+  }
+
+  function sincronizar() {
+    const itens = fila().slice(0, 1000);  // HISTORICO_LOTE_MAX do servidor
+    if (!itens.length || !navigator.onLine) return;
+    // Os orçamentos feitos offline vão para o histórico (uma transação no servidor)
+    fetch('/api/v1/quotes', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ itens: itens }),
+    }).then((resp) => {
+      if (resp.ok) {
+        salvarFila(fila().slice(itens.length));
+        return;
+      }
+      // 5xx: o servidor tenta de novo depois. 401/403/408/429 também: são da sessão
+      // (licença, limite), não dos itens.
+      if (resp.status >= 500 || [401, 403, 408, 429].includes(resp.status)) return;
+      return resp.json().catch(() => ({})).then((data) => {
+        // 422 aponta os itens inválidos ("itens[3].produto"); o resto volta a ser enviado
+        const ruins = new Set();
+        (data.campos || []).forEach((c) => {
+          const m = /^itens\[(\d+)\]/.exec(c);
+          if (m) ruins.add(Number(m[1]));
+        });
+        const todosRuins = resp.status !== 422 || !ruins.size;
+        separarRecusados(itens.filter((_it, i) => todosRuins || ruins.has(i)));
+        const restantes = todosRuins ? [] : itens.filter((_it, i) => !ruins.has(i));
+        salvarFila(restantes.concat(fila().slice(itens.length)));
+        if (restantes.length) sincronizar();
+      });
+    }).catch(() => {});
+  }
+
+  function mostrar(form, item, r, offline) {
+    let box = document.getElementById('resultado-local');
+    if (!box) {
+      box = document.createElement('div');
+      box.id = 'resultado-local';
+      box.className = 'result';
+      form.insertAdjacentElement('afterend', box);
+    }
+    box.textContent = '';
+    const linhas = [
+      ['div', 'Produto: ' + item.produto],
+      ['div', 'Custo Base: ' + r.custo_base_fmt],
+      ['div', 'Preço Final: ' + r.preco_final_fmt, 'big'],
+      ['div', 'Validade: ' + item.validade_dias + ' dia(s)', 'muted'],
+    ];
+    if (offline) linhas.push(['div', 'Calculado offline — será sincronizado quando a conexão voltar.', 'warn']);
+    linhas.forEach(([tag, txt, cls]) => {
+      const el = document.createElement(tag);
+      el.textContent = txt;
+      if (cls) el.className = cls;
+      box.appendChild(el);
+    });
+  }
+
+  // Catálogo (/api/v1/catalog): escolher um material preenche o custo do material;
+  // escolher um valor de hora preenche o valor da hora.
+  function autocompletarCatalogo(form) {
+    const busca = document.getElementById('catalogo-busca');
+    const opcoes = document.getElementById('catalogo-opcoes');
+    if (!busca || !opcoes) return;
+    let porTexto = {};
+    let timer = null;
+
+    busca.addEventListener('input', () => {
+      const item = porTexto[busca.value];
+      if (item) {
+        const campo = item.tipo === 'trabalho' ? form.valor_hora : form.custo_material;
+        campo.value = String(item.custo).replace('.', ',');
+        campo.dispatchEvent(new Event('input', { bubbles: true }));
+        return;
+      }
+      clearTimeout(timer);
+      const q = busca.value.trim();
+      if (!q || !navigator.onLine) return;
+      timer = setTimeout(() => {
+        fetch('/api/v1/catalog?limite=8&q=' + encodeURIComponent(q))
+          .then((resp) => (resp.ok ? resp.json() : { itens: [] }))
+          .then((data) => {
+            porTexto = {};
+            opcoes.textContent = '';
+            data.itens.forEach((it) => {
+              const texto = it.nome + (it.fornecedor ? ' — ' + it.fornecedor : '') + ' (' + it.custo_fmt +
+                (it.unidade ? '/' + it.unidade : '') + ')';
+              porTexto[texto] = it;
+              const op = document.createElement('option');
+              op.value = texto;
+              opcoes.appendChild(op);
+            });
+          }).catch(() => {});
+      }, 120);
+    });
+  }
+
+  window.addEventListener('load', () => {
+    const form = document.querySelector('form[action="/calcular"]');
+    if (!form || !window.ArtePreco) return;
+
+    const previa = document.getElementById('previa-preco');
+    form.addEventListener('input', () => {
+      if (!previa) return;
+      try {
+        previa.textContent = 'Prévia: ' + window.ArtePreco.calcular(lerForm(form)).preco_final_fmt;
+      } catch (e) {
+        previa.textContent = '';
+      }
+    });
+
+    form.addEventListener('submit', (ev) => {
+      if (navigator.onLine) return;  // online: fluxo normal do servidor
+      ev.preventDefault();
+      try {
+        const item = lerForm(form);
+        mostrar(form, item, window.ArtePreco.calcular(item), true);
+        salvarFila(fila().concat([item]));
+      } catch (e) {}
+    });
+
+    autocompletarCatalogo(form);
+    sincronizar();
+  });
+
+  window.addEventListener('online', sincronizar);
+})();
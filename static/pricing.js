@@ -0,0 +1,63 @@
+// static/pricing.js
+// Porta do core/pricing.py para o navegador: mesma conta em centavos (BigInt),
+// mesmo arredondamento "meio para cima" — o preço offline é igual ao do servidor.
+(function (root) {
+  "use strict";
+
+  const CENT = 100;
+  const E4 = 10000;
+  const MARGEM_ESCALA = 100n * 10000n;
+
+  // float -> inteiro escalado, com clamp em 0 (NaN também vira 0)
+  function escala(x, s) {
+    if (!(x > 0)) return 0n;
+    if (!isFinite(x)) throw new RangeError("Valor fora do intervalo.");
+    return BigInt(Math.floor(x * s + 0.5));
+  }
+
+  // divisão inteira arredondando meio para cima (n >= 0)
+  function divArred(n, d) {
+    return (n + d / 2n) / d;
+  }
+
+  // Aceita "1.234,56", "10,5", "R$ 10" (como parse_num do servidor)
+  function parseNum(v) {
+    if (typeof v === "number") return v;
+    let s = String(v || "").replace("R$", "").trim();
+    if (!s) return 0;
+    if (s.includes(",")) s = s.replace(/\./g, "").replace(",", ".");
+    const n = Number(s);
+    if (Number.isNaN(n)) throw new TypeError("Valor numérico inválido: " + v);
+    return n;
+  }
+
+  function fmtCentavos(c) {
+    c = BigInt(c);
+    const neg = c < 0n;
+    if (neg) c = -c;
+    const reais = (c / 100n).toString().replace(/\B(?=(\d{3})+(?!\d))/g, ".");
+    const cents = (c % 100n).toString().padStart(2, "0");
+    return "R$ " + (neg ? "-" : "") + reais + "," + cents;
+  }
+
+  function precoCentavos(ci) {
+    const trabalho = divArred(escala(ci.horas_trabalhadas, E4) * escala(ci.valor_hora, CENT), BigInt(E4));
+    const base = escala(ci.custo_material, CENT) + escala(ci.despesas_extras, CENT) + trabalho;
+    const final = divArred(base * (MARGEM_ESCALA + escala(ci.margem_lucro_pct, E4)), MARGEM_ESCALA);
+    return [base, final];
+  }
+
+  function calcular(ci) {
+    const [base, final] = precoCentavos(ci);
+    return {
+      custo_base: Number(base) / CENT,
+      preco_final: Number(final) / CENT,
+      custo_base_centavos: Number(base),
+      preco_final_centavos: Number(final),
+      custo_base_fmt: fmtCentavos(base),
+      preco_final_fmt: fmtCentavos(final),
+    };
+  }
+
+  root.ArtePreco = { calcular: calcular, parseNum: parseNum, fmtCentavos: fmtCentavos };
+})(typeof globalThis !== "undefined" ? globalThis : self);
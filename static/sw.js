@@ -1,22 +1,83 @@
 // static/sw.js
-const CACHE_NAME = "artepreco-v1";
+// VERSION e PRECACHE são preenchidos pelo servidor na subida (app_web._sw_asset):
+// o nome do cache muda sempre que qualquer arquivo de /static muda.
+const VERSION = "__ASSET_VERSION__";
+const CACHE_PREFIX = "artepreco-";
+const CACHE_NAME = CACHE_PREFIX + VERSION;
 
-const URLS_TO_CACHE = [
-  "/",
-  "/static/manifest.json",
-  "/static/sw.js",
-  "/static/icon-192.png",
-  "/static/icon-512.png"
-];
+const PRECACHE = [/*__PRECACHE__*/];
 
 self.addEventListener("install", (event) => {
   event.waitUntil(
-    caches.open(CACHE_NAME).then((cache) => cache.addAll(URLS_TO_CACHE))
+    caches.open(CACHE_NAME)
+      // um item que falhar (ex.: offline na instalação) não impede o resto
+      .then((cache) => Promise.all(PRECACHE.map((url) => cache.add(url).catch(() => null))))
+      .then(() => self.skipWaiting())
   );
 });
 
-self.addEventListener("fetch", (event) => {
-  event.respondWith(
-    caches.match(event.request).then((cached) => cached || fetch(event.request))
+self.addEventListener("activate", (event) => {
+  // Apaga os caches de versões antigas
+  event.waitUntil(
+    caches.keys()
+      .then((keys) => Promise.all(
+        keys.filter((k) => k.startsWith(CACHE_PREFIX) && k !== CACHE_NAME).map((k) => caches.delete(k))
+      ))
+      .then(() => self.clients.claim())
+  );
+});
+
+function isHTML(request) {
+  return request.mode === "navigate" || (request.headers.get("accept") || "").includes("text/html");
+}
+
+// Só a casca do app ("/") ignora a query string (?utm=..., ?msg=...); nas outras
+// páginas a query muda o conteúdo (/historico?cursor=...&q=...)
+const APP_SHELL = "/";
+
+// HTML: responde do cache na hora e atualiza em segundo plano (stale-while-revalidate)
+function staleWhileRevalidate(event) {
+  const ignoreSearch = new URL(event.request.url).pathname === APP_SHELL;
+  return caches.open(CACHE_NAME).then((cache) =>
+    cache.match(event.request, { ignoreSearch }).then((cached) => {
+      const network = fetch(event.request)
+        .then((resp) => {
+          if (resp && resp.ok) cache.put(event.request, resp.clone());
+          return resp;
+        })
+        .catch(() => cached);
+      if (cached) {
+        event.waitUntil(network);
+        return cached;
+      }
+      return network;
+    })
   );
-});
\ No newline at end of file
+}
+
+// URL versionada (?v=hash): o conteúdo nunca muda, então cache primeiro
+function cacheFirst(request) {
+  return caches.open(CACHE_NAME).then((cache) =>
+    cache.match(request).then((cached) => cached || fetch(request).then((resp) => {
+      if (resp && resp.ok) cache.put(request, resp.clone());
+      return resp;
+    }))
+  );
+}
+
+self.addEventListener("fetch", (event) => {
+  const request = event.request;
+  if (request.method !== "GET") return;
+  const url = new URL(request.url);
+  if (url.origin !== self.location.origin) return;
+  if (url.pathname === "/sw.js") return;
+
+  if (isHTML(request)) {
+    event.respondWith(staleWhileRevalidate(event));
+  } else if (url.searchParams.has("v")) {
+    event.respondWith(cacheFirst(request));
+  } else {
+    // resto: rede primeiro, cache se offline
+    event.respondWith(fetch(request).catch(() => caches.match(request)));
+  }
+});
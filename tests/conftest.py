@@ -0,0 +1,31 @@
+# tests/conftest.py
+# Roda da raiz do repositório sem instalar nada: `python -m pytest -q`
+import importlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def app_web(tmp_path_factory):
+    # app_web lê o ambiente ao importar: banco temporário, gravação síncrona e segredo de teste
+    os.environ["ARTEPRECO_DB"] = str(tmp_path_factory.mktemp("db") / "artepreco.db")
+    os.environ["ARTEPRECO_WRITE_BEHIND"] = "0"
+    os.environ["APP_SECRET"] = "segredo-de-teste"
+    from core import db, license_core
+    importlib.reload(db)
+    importlib.reload(license_core)
+    import app_web
+    return app_web
+
+
+@pytest.fixture
+def cliente(app_web):
+    # Chave do estúdio E1 no header: cada request se identifica sozinho
+    chave = app_web.gerar_chave({"c": "E1", "exp": 0})
+    c = app_web.app.test_client()
+    c.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {chave}"
+    return c
@@ -0,0 +1,110 @@
+# tests/test_api.py
+# API v1 pelo test client do Flask (banco temporário, ver conftest.py).
+
+BASE = {"produto": "Caneca", "custo_material": 20.0, "horas_trabalhadas": 1.0, "valor_hora": 30.0,
+        "despesas_extras": 0.0, "margem_lucro_pct": 0.0, "validade_dias": 7}
+
+
+def test_sem_licenca_recusa(app_web):
+    r = app_web.app.test_client().post("/api/v1/price/solve", json=dict(BASE, resolver="valor_hora", preco_alvo=100))
+    assert r.status_code == 403
+
+
+def test_solve_resolver_na_query(cliente):
+    corpo = dict(BASE, preco_alvo=100.0)
+    del corpo["margem_lucro_pct"]
+    r = cliente.post("/api/v1/price/solve?resolver=margem_lucro_pct", json=corpo)
+    assert r.status_code == 200, r.get_json()
+    d = r.get_json()
+    assert d["resolver"] == "margem_lucro_pct" and d["viavel"]
+    assert d["preco_final_centavos"] == 10000
+
+
+def test_solve_resolver_no_corpo(cliente):
+    corpo = dict(BASE, resolver="valor_hora", preco_alvo=100.0)
+    del corpo["valor_hora"]
+    r = cliente.post("/api/v1/price/solve", json=corpo)
+    assert r.status_code == 200, r.get_json()
+    assert r.get_json()["valor"] == 80.0
+
+
+def test_solve_sem_resolver(cliente):
+    r = cliente.post("/api/v1/price/solve", json=dict(BASE, preco_alvo=100.0))
+    assert r.status_code == 422
+    assert r.get_json()["campos"][0].startswith("resolver:")
+
+
+def test_telas_ativar_calcular_pdf_sair(app_web):
+    c = app_web.app.test_client()
+    assert "Ativação" in c.get("/").get_data(as_text=True)
+    html = c.post("/ativar", data={"chave": "AP-xxx.yyy"}).get_data(as_text=True)
+    assert "Ativação" in html and 'class="warn"' in html
+
+    chave = app_web.gerar_chave({"c": "TELA", "exp": 0})
+    r = c.post("/ativar", data={"chave": chave})
+    assert r.status_code == 302 and "ap_chave=" in r.headers["Set-Cookie"]
+    assert "Calcular" in c.get("/").get_data(as_text=True)
+
+    r = c.post("/empresa", data={"nome": "Ateliê Tela", "telefone": "", "email": "", "endereco": ""})
+    assert r.status_code == 302
+    form = {"produto": "Logo", "custo_material": "10,50", "horas_trabalhadas": "2", "valor_hora": "30",
+            "despesas_extras": "0", "margem_lucro_pct": "50", "validade_dias": "7", "cliente": "Maria"}
+    html = c.post("/calcular", data=form).get_data(as_text=True)
+    assert "R$ 105,75" in html and "Ateliê Tela" in html
+    quote_id = int(html.split("/api/v1/quotes/")[1].split(".pdf")[0])
+    r = c.get(f"/api/v1/quotes/{quote_id}.pdf")
+    assert r.status_code == 200 and r.mimetype == "application/pdf"
+    assert c.get(f"/api/v1/quotes/{quote_id}").get_json()["cliente"]["nome"] == "Maria"
+
+    assert "número esperado" in c.post("/calcular", data=dict(form, valor_hora="trinta")).get_data(as_text=True)
+
+    c.post("/sair")
+    assert "Ativação" in c.get("/").get_data(as_text=True)
+    assert c.get(f"/api/v1/quotes/{quote_id}").status_code == 403
+
+
+def test_importar_nao_mexe_no_banco(tmp_path):
+    # Filhos do pool de PDF (forkserver/spawn) reimportam o __main__: o import não pode criar tabelas
+    import os
+    import sqlite3
+    import subprocess
+    import sys
+
+    db = tmp_path / "import.db"
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    codigo = ("import app_web, threading; "
+              "assert not app_web._INICIADO; "
+              "assert not [t for t in threading.enumerate() if t.name == 'artepreco-writer']")
+    env = dict(os.environ, ARTEPRECO_DB=str(db), APP_SECRET="x")
+    subprocess.run([sys.executable, "-c", codigo], cwd=raiz, env=env, check=True)
+    tabelas = sqlite3.connect(db).execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+    assert tabelas == []
+
+
+def test_orcamento_com_itens_guarda_o_preco_da_versao(cliente):
+    r = cliente.post("/api/v1/catalog", json={"tipo": "material", "nome": "Lona 1m", "custo": 40.0})
+    v1 = r.get_json()["versao"]
+    item_id = cliente.get("/api/v1/catalog?q=lona").get_json()["itens"][0]["id"]
+    corpo = {"produto": "Banner", "margem_lucro_pct": 50,
+             "itens": [{"catalogo_id": item_id, "quantidade": 2},
+                       {"tipo": "trabalho", "quantidade": 1, "unitario": 30}]}
+    r = cliente.post("/api/v1/quotes/itens", json=corpo)
+    assert r.status_code == 201, r.get_json()
+    criado = r.get_json()
+    assert criado["catalogo_versao"] == v1 and criado["preco_final_centavos"] == 16500
+
+    # preço do catálogo muda: o orçamento gravado continua com o da versão dele
+    r = cliente.post("/api/v1/catalog", json={"tipo": "material", "nome": "Lona 1m", "custo": 55.0})
+    v2 = r.get_json()["versao"]
+    assert v2 > v1
+    salvo = cliente.get(f"/api/v1/quotes/{criado['id']}").get_json()
+    assert salvo["catalogo_versao"] == v1 and salvo["preco_final_centavos"] == 16500
+    assert salvo["itens"][0]["unitario"] == 40.0 and salvo["itens"][0]["catalogo_id"] == item_id
+    assert salvo["totais_centavos"]["total"] == 16500
+    r = cliente.get(f"/api/v1/quotes/{criado['id']}.pdf")
+    assert r.status_code == 200 and r.data.startswith(b"%PDF")
+
+    # /price/itens na versão antiga dá o mesmo preço; na atual, o novo
+    antigo = cliente.post("/api/v1/price/itens", json=dict(corpo, catalogo_versao=v1)).get_json()
+    atual = cliente.post("/api/v1/price/itens", json=corpo).get_json()
+    assert (antigo["preco_final_centavos"], atual["preco_final_centavos"]) == (16500, 21000)
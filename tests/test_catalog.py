@@ -0,0 +1,113 @@
+# tests/test_catalog.py
+# Catálogo de materiais e mão de obra (core/catalog.py): importação, busca e versões.
+import pytest
+
+from core.catalog import Catalogo, CatalogoErro
+from core.db import ConnectionPool
+from core.writer import WriteBehind
+
+CAB = "tipo;nome;fornecedor;unidade;custo\n"
+
+
+@pytest.fixture
+def cat(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "cat.db"))
+    writer = WriteBehind(pool, sincrono=True)
+    c = Catalogo(pool, writer)
+    c.init()
+    yield c
+    writer.close()
+
+
+def _todos(cat, tenant="E1"):
+    return cat.listar_em(tenant, cat.versao_atual(tenant))
+
+
+def test_importar_csv(cat):
+    n = cat.importar_csv("E1", CAB + "material;Papel A4;Loja;resma;25,90\ntrabalho;Hora arte;;h;80\n;Cola;;;3\n", 100)
+    assert n == 3
+    itens = {i["nome"]: i for i in _todos(cat)}
+    assert itens["Papel A4"]["custo"] == 25.9
+    assert itens["Cola"]["tipo"] == "material"  # tipo em branco: o padrão
+
+
+@pytest.mark.parametrize("custo, erro", [
+    ("inf", "custo: número esperado"),
+    ("nan", "custo: número esperado"),
+    ("-5", "custo: mínimo 0"),
+    ("2000000000", "custo: máximo"),
+    ("abc", "Linha 3"),
+])
+def test_importar_csv_custo_invalido(cat, custo, erro):
+    with pytest.raises(CatalogoErro, match="Linha 3") as e:
+        cat.importar_csv("E1", CAB + f"material;Ok;;;1\nmaterial;Ruim;;;{custo}\n", 100)
+    assert erro in str(e.value)
+    assert _todos(cat) == []  # nada importado
+
+
+def test_importar_csv_tipo_invalido(cat):
+    with pytest.raises(CatalogoErro):
+        cat.importar_csv("E1", CAB + "ferramenta;Tesoura;;;10\n", 100)
+
+
+def test_salvar_custo_infinito(cat):
+    with pytest.raises(CatalogoErro, match="item 0: custo"):
+        cat.salvar("E1", [{"nome": "x", "custo": float("inf")}])
+
+
+
+def test_item_em_versao_antiga_depois_de_mudar_o_preco(cat):
+    cat.salvar("E1", [{"tipo": "material", "nome": "Papel A4", "custo": 25.9}])
+    v1 = cat.versao_atual("E1")
+    (item,) = _todos(cat)
+    cat.salvar("E1", [{"tipo": "material", "nome": "Papel A4", "custo": 31.5}])
+    v2 = cat.versao_atual("E1")
+    assert v2 > v1
+    assert cat.obter_varios("E1", [item["id"]])[item["id"]]["custo"] == 31.5
+    assert cat.obter_varios("E1", [item["id"]], v1)[item["id"]]["custo"] == 25.9
+    assert cat.obter_em("E1", item["id"], v1)["custo"] == 25.9
+
+
+# ------------------------------------------------------------
+# Índice em memória (_Indice.buscar): mesmo resultado de uma varredura completa
+# ------------------------------------------------------------
+
+def _indice(n: int = 3000):
+    import random
+
+    from core.catalog import _Indice
+
+    rnd = random.Random(4)
+    palavras = ("papel", "vinil", "lona", "tinta", "cola", "tipo", "kraft", "fosco", "branco", "a4", "30x40",
+                "adesivo", "metálico", "cartão", "linha", "tingido")
+    rows = [
+        (i, "material", " ".join(rnd.sample(palavras, 3)) + f" {rnd.randint(1, 999)}",
+         rnd.choice(("Loja Sul", "Casa do Artesão", "")), "un", 100)
+        for i in range(1, n + 1)
+    ]
+    return _Indice(1, rows), rows
+
+
+@pytest.mark.parametrize("q", [
+    "pa", "papel ti", "vinil lona 99", "cola branco a4", "tinta fosco 1", "artesao kraft", "cartao metal",
+    "v f", "papel a", "9 lona", "xyz abc", "ti ti",
+])
+def test_indice_igual_a_varredura(q):
+    from core.catalog import normalizar
+
+    idx, rows = _indice()
+    termos = [" " + t if len(t) == 1 else t for t in normalizar(q).split()]  # 1 letra: início de palavra
+    esperado = {r[0] for r in rows if all(t in " " + normalizar(r[2] + " " + r[3]) for t in termos)}
+    todos = [r[0] for r in idx.buscar(q, 10 ** 6)]
+    assert len(todos) == len(set(todos)) and set(todos) == esperado
+    alguns = [r[0] for r in idx.buscar(q, 5)]
+    assert len(alguns) == min(5, len(esperado)) and set(alguns) <= esperado
+
+
+def test_indice_prefixo_antes_do_meio():
+    from core.catalog import _Indice
+
+    nomes = ["artigo cola", "tipo cola", "tinta cola", "cola fina", "cola grossa"]
+    idx = _Indice(1, [(i, "material", n, "", "", 1) for i, n in enumerate(nomes, start=1)])
+    # "ti" é o termo mais raro: palavras que começam com ele (tinta, tipo), depois as do meio (artigo)
+    assert [r[0] for r in idx.buscar("cola ti", 10)] == [3, 2, 1]
@@ -0,0 +1,136 @@
+# tests/test_kvstore.py
+# Backends do kv (core/kvstore.py); o redis:// roda contra o servidor local core/kvserver.py.
+import time
+
+import pytest
+
+from core import kvstore
+from core.kvcache import KVCache, MISSING
+from core.kvserver import KVServer
+
+
+@pytest.fixture
+def servidor():
+    srv = KVServer(("127.0.0.1", 0))
+    srv.iniciar()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _abrir(srv, **qs):
+    q = "&".join(f"{k}={v}" for k, v in qs.items())
+    kv = kvstore.abrir(f"redis://127.0.0.1:{srv.porta}/1" + (f"?{q}" if q else ""))
+    kv.init()
+    return kv
+
+
+def _ler(kv, cache, k):
+    # Mesmo caminho do kv_get do app: sync com a versão, cache, backend
+    cache.sync(*kv.versao())
+    v, hit = cache.get(k)
+    if not hit:
+        epoch = cache.epoch()
+        v = kv.get(k)
+        cache.put(k, MISSING if v is None else v, epoch=epoch)
+    return None if v is MISSING else v
+
+
+def test_ida_e_volta(servidor):
+    kv = _abrir(servidor)
+    assert kv.get("nada") is None
+    kv.set("empresa", '{"nome": "Ateliê ç"}')
+    assert kv.get("empresa") == '{"nome": "Ateliê ç"}'
+    kv.set("empresa", "")
+    assert kv.get("empresa") == ""
+    assert kv.health()["ok"]
+    kv.close()
+
+
+def test_bancos_separados(servidor):
+    a = _abrir(servidor)
+    b = kvstore.abrir(f"redis://127.0.0.1:{servidor.porta}/2")
+    a.set("k", "1")
+    assert b.get("k") is None
+    a.close()
+    b.close()
+
+
+def test_escrita_de_outro_processo_invalida_o_cache(servidor):
+    a, b = _abrir(servidor, sync_ms=0), _abrir(servidor, sync_ms=0)
+    cache_b = KVCache()
+    a.set("k", "v1")
+    assert _ler(b, cache_b, "k") == "v1"
+    a.set("k", "v2")
+    assert _ler(b, cache_b, "k") == "v2"
+    assert cache_b.stats()["invalidations"] == 1
+
+
+def test_sync_ms_limita_a_leitura_da_versao(servidor):
+    a, b = _abrir(servidor), _abrir(servidor, sync_ms=50)
+    assert a.sync == 1.0 and b.sync == 0.05
+    cache_b = KVCache()
+    a.set("k", "v1")
+    assert _ler(b, cache_b, "k") == "v1"
+    a.set("k", "v2")
+    # dentro do intervalo o valor em cache ainda vale (é o atraso documentado)
+    assert _ler(b, cache_b, "k") == "v1"
+    time.sleep(0.06)
+    assert _ler(b, cache_b, "k") == "v2"
+
+
+def test_url_nao_suportada():
+    with pytest.raises(ValueError):
+        kvstore.abrir("ftp://x")
+
+
+@pytest.fixture
+def sqlite_kv(tmp_path):
+    from core.db import ConnectionPool
+    from core.writer import WriteBehind
+
+    pool = ConnectionPool(str(tmp_path / "kv.db"))
+    writer = WriteBehind(pool, sincrono=True)
+
+    def abrir(**qs):
+        q = "&".join(f"{k}={v}" for k, v in qs.items())
+        kv = kvstore.abrir("sqlite://" + (f"?{q}" if q else ""), pool=pool, writer=writer)
+        kv.init()
+        return kv
+
+    yield abrir
+    writer.close()
+
+
+def test_sqlite_propria_escrita_nao_limpa_o_cache(sqlite_kv):
+    kv, cache = sqlite_kv(sync_ms=0), KVCache()
+    for k in ("a", "b", "c"):
+        kv.set(k, k * 2, gravado=cache.avancar)
+        cache.set(k, k * 2)
+    assert [_ler(kv, cache, k) for k in ("a", "b", "c")] == ["aa", "bb", "cc"]
+    kv.set("a", "novo", gravado=cache.avancar)
+    cache.set("a", "novo")
+    assert _ler(kv, cache, "a") == "novo" and _ler(kv, cache, "b") == "bb"
+    assert cache.stats()["invalidations"] == 0 and cache.stats()["size"] == 3
+
+
+def test_sqlite_escrita_de_outro_processo_invalida(sqlite_kv):
+    a, b, cache_b = sqlite_kv(sync_ms=0), sqlite_kv(), KVCache()
+    assert b.sync == 0.1
+    a.set("k", "v1")
+    assert _ler(b, cache_b, "k") == "v1"
+    a.set("k", "v2")
+    b._versao = (0.0, b._versao[1])  # intervalo venceu
+    assert _ler(b, cache_b, "k") == "v2"
+    assert cache_b.stats()["invalidations"] == 1
+
+
+def test_redis_propria_escrita_nao_limpa_o_cache(servidor):
+    kv, cache = _abrir(servidor, sync_ms=0), KVCache()
+    kv.set("a", "1", gravado=cache.avancar)
+    cache.set("a", "1")
+    assert _ler(kv, cache, "a") == "1"
+    kv.set("b", "2", gravado=cache.avancar)
+    cache.set("b", "2")
+    assert _ler(kv, cache, "a") == "1" and _ler(kv, cache, "b") == "2"
+    assert cache.stats()["invalidations"] == 0
@@ -0,0 +1,119 @@
+# tests/test_license.py
+# Chaves de licença (core/license_core.py): formato v2, kid, expiração e legado.
+import importlib
+import json
+import time
+
+import pytest
+
+from core import license_core
+
+PUBLICO = b"ARTEPRECO_SUPER_SEGREDO_2026"
+VARIAVEIS = ("APP_SECRET", "ARTEPRECO_LICENSE_KEYS", "ARTEPRECO_LICENSE_KID", "ARTEPRECO_LICENSE_LEGADO",
+             "ARTEPRECO_LICENSE_SECRET_LEGADO")
+
+
+@pytest.fixture
+def lic(monkeypatch):
+    # license_core lê o ambiente ao importar: recarrega com o ambiente do teste
+    for v in VARIAVEIS:
+        monkeypatch.delenv(v, raising=False)
+
+    def carregar(**env):
+        for k, v in env.items():
+            monkeypatch.setenv(k, v)
+        return importlib.reload(license_core)
+
+    yield carregar
+    monkeypatch.undo()
+    importlib.reload(license_core)
+
+
+def _v2(segredo: bytes, cliente: str = "VICTIM STUDIO", kid: int = 1, exp: int = 0) -> str:
+    corpo = license_core._HEAD.pack(license_core.VERSAO, kid, exp) + cliente.encode("utf-8")
+    return (license_core.PREFIXO + license_core._b64url_encode(corpo) + "."
+            + license_core._b64url_encode(license_core._sign(segredo, corpo)))
+
+
+def _legado(segredo: bytes, payload: dict, b64: bool) -> str:
+    msg = json.dumps(payload).encode("utf-8")
+    msg_b64 = license_core._b64url_encode(msg)
+    sig = license_core._sign(segredo, msg_b64.encode("utf-8") if b64 else msg)
+    return license_core.PREFIXO + msg_b64 + "." + license_core._b64url_encode(sig)
+
+
+def test_sem_segredo_nao_emite_nem_aceita(lic):
+    L = lic()
+    assert L.KEYS == {}
+    with pytest.raises(L.LicencaErro):
+        L.gerar_chave("ESTUDIO", 30)
+    assert L.validar_chave(_v2(PUBLICO))[:2] == (False, "Chave de assinatura desconhecida.")
+
+
+@pytest.mark.parametrize("env", [
+    {"APP_SECRET": PUBLICO.decode()},
+    {"ARTEPRECO_LICENSE_KEYS": "1:" + PUBLICO.decode()},
+])
+def test_segredo_publico_nunca_vale(lic, env):
+    L = lic(**env)
+    assert L.KEYS == {}
+    assert L.validar_chave(_v2(PUBLICO))[0] is False
+
+
+def test_segredo_publico_fica_fora_das_chaves(lic):
+    L = lic(ARTEPRECO_LICENSE_KEYS="1:" + PUBLICO.decode() + ",2:segredo-de-verdade")
+    assert list(L.KEYS) == [2] and L.KID_ATUAL == 2
+    assert L.validar_chave(_v2(PUBLICO, kid=1))[0] is False
+    assert L.validar_chave(L.gerar_chave("ok", 1))[:2] == (True, "OK")
+
+
+def test_ida_e_volta(lic):
+    L = lic(APP_SECRET="s3gredo")
+    ok, msg, payload = L.validar_chave(L.gerar_chave(" estudio x ", 30))
+    assert (ok, msg, payload["c"], payload["kid"]) == (True, "OK", "ESTUDIO X", 1)
+    assert payload["exp"] > time.time() + 29 * 86400
+
+
+def test_expirada_adulterada_e_kid_desconhecido(lic):
+    L = lic(ARTEPRECO_LICENSE_KEYS="1:velho,2:novo")
+    assert L.validar_chave(L.assinar("A", int(time.time()) - 10))[:2] == (False, "Chave expirada.")
+    chave = L.assinar("A", 0, kid=1)
+    assert L.validar_chave(chave)[:2] == (True, "OK")  # kid antigo continua valendo
+    assert L.validar_chave(chave[:-2] + ("AA" if chave[-2:] != "AA" else "BB"))[0] is False
+    assert L.validar_chave(_v2(b"novo", kid=9))[:2] == (False, "Chave de assinatura desconhecida.")
+    with pytest.raises(ValueError):
+        L.assinar("A", L.EXP_MAX + 1)
+
+
+def test_lote_igual_ao_individual(lic):
+    L = lic(APP_SECRET="s3gredo")
+    chaves = [L.gerar_chave(f"c{i}", 1) for i in range(5)] + ["lixo", "", _v2(PUBLICO)]
+    assert L.validar_chaves(chaves) == [L.validar_chave(c) for c in chaves]
+
+
+def test_legado_desligado_por_padrao(lic):
+    L = lic(APP_SECRET="s3gredo")
+    assert L.validar_chave(_legado(b"s3gredo", {"c": "A"}, b64=True))[0] is False
+
+
+def test_legado_com_segredos_do_ambiente(lic):
+    L = lic(APP_SECRET="s3gredo", ARTEPRECO_LICENSE_LEGADO="1", ARTEPRECO_LICENSE_SECRET_LEGADO="antigo")
+    assert L.validar_chave(_legado(b"s3gredo", {"c": "A"}, b64=True))[:2] == (True, "OK")
+    assert L.validar_chave(_legado(b"antigo", {"c": "A"}, b64=False))[:2] == (True, "OK")
+    publico = b"ARTEPRECO_CHAVE_UNICA_2026_SEGREDO_FORTE_TROQUE_ISSO"
+    assert L.validar_chave(_legado(publico, {"c": "VICTIM STUDIO"}, b64=False))[0] is False
+    assert L.validar_chave(_legado(PUBLICO, {"c": "VICTIM STUDIO"}, b64=True))[0] is False
+
+
+@pytest.mark.parametrize("conteudo, erro", [
+    ("cliente;dias\nE1;30\nE2;30;extra\n", "Linha 3: mais colunas"),
+    ("cliente,dias\nE1\n", "Linha 2: 'cliente' e 'dias'"),
+    ("cliente;dias\nE1;inf\n", "Linha 2"),
+])
+def test_emissao_csv_recusa_linha_ruim(tmp_path, conteudo, erro):
+    from core.license_issue import _ler_blocos
+
+    p = tmp_path / "entrada.csv"
+    p.write_text(conteudo, encoding="utf-8")
+    with pytest.raises(ValueError, match=erro):
+        list(_ler_blocos(str(p)))
@@ -0,0 +1,240 @@
+# tests/test_pricing.py
+# Paridade do motor de preço (core/pricing.py): escalar (calcular), lote com
+# numpy e lote sem numpy (inteiros do Python) dão os mesmos centavos, linha a linha.
+import math
+import random
+
+import pytest
+
+from core import pricing
+from core.pricing import CalcInput, calcular, calcular_lote, calcular_preco, calcular_precos, preco_centavos
+from core.pricing_batch import LoteErro, calcular_colunas, colunas_de_csv, colunas_de_json
+
+CAMPOS = ("custo_material", "horas_trabalhadas", "valor_hora", "despesas_extras", "margem_lucro_pct")
+
+
+@pytest.fixture(params=["numpy", "sem_numpy"])
+def lote(request, monkeypatch):
+    # calcular_lote nos dois caminhos: int64 do numpy e listas de int
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(pricing, "np", None)
+    return calcular_lote
+
+
+def _linhas(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    linhas = []
+    for _ in range(n):
+        linhas.append((
+            round(rnd.uniform(0, 5000), rnd.choice((0, 2, 3))),
+            round(rnd.uniform(0, 200), rnd.choice((1, 2, 4))),
+            round(rnd.uniform(0, 300), 2),
+            round(rnd.uniform(0, 800), 2),
+            round(rnd.uniform(0, 400), rnd.choice((0, 1, 4))),
+        ))
+    return linhas
+
+
+def _colunas(linhas):
+    return [list(c) for c in zip(*linhas)]
+
+
+def _ci(linha) -> CalcInput:
+    return CalcInput("x", *linha, 7)
+
+
+# Arredondamento "meio para cima" em cada etapa (centavos exatos na mão)
+CASOS_MEIO_CENTAVO = [
+    # (material, horas, valor_hora, despesas, margem) -> (custo_base, preco_final)
+    ((0, 0.5, 0.01, 0, 50), (1, 2)),       # trabalho 0,5 c -> 1; 1 x 1,5 = 1,5 -> 2
+    ((0.03, 0, 0, 0, 50), (3, 5)),         # 4,5 -> 5 (não 4, como no arredondamento bancário)
+    ((0.125, 0, 0, 0, 0), (13, 13)),       # 12,5 c -> 13
+    ((0, 0, 0, 0.375, 0), (38, 38)),       # despesas 37,5 c -> 38
+    ((0.01, 0, 0, 0, 0.00005), (1, 1)),    # margem 0,00005% -> 0,0001% na escala E4
+    ((0.01, 0, 0, 0, 49.99), (1, 1)),      # 1,4999 c -> 1
+    ((0.01, 0, 0, 0, 150), (1, 3)),        # 2,5 -> 3
+    ((0, 1.5, 0.33, 0, 0), (50, 50)),      # 49,5 c -> 50
+    ((100, 2, 50, 10, 30), (21000, 27300)),
+]
+
+
+@pytest.mark.parametrize("linha, esperado", CASOS_MEIO_CENTAVO)
+def test_meio_centavo_escalar(linha, esperado):
+    assert preco_centavos(*linha) == esperado
+    r = calcular(_ci(linha))
+    assert (r.custo_base_centavos, r.preco_final_centavos) == esperado
+    assert r.preco_final == esperado[1] / 100
+
+
+def test_meio_centavo_lote(lote):
+    base, final = lote(*_colunas([l for l, _e in CASOS_MEIO_CENTAVO]))
+    assert list(zip(map(int, base), map(int, final))) == [e for _l, e in CASOS_MEIO_CENTAVO]
+
+
+def test_lote_igual_ao_escalar(lote):
+    linhas = _linhas(5000)
+    base, final = lote(*_colunas(linhas))
+    assert [(int(b), int(f)) for b, f in zip(base, final)] == [preco_centavos(*l) for l in linhas]
+
+
+def test_numpy_igual_sem_numpy(monkeypatch):
+    pytest.importorskip("numpy")
+    cols = _colunas(_linhas(5000, seed=11))
+    com = [list(map(int, v)) for v in calcular_lote(*cols)]
+    monkeypatch.setattr(pricing, "np", None)
+    sem = [list(map(int, v)) for v in calcular_lote(*cols)]
+    assert com == sem
+
+
+def test_calcular_precos_igual_ao_escalar(lote):
+    itens = [_ci(l) for l in _linhas(500, seed=3)]
+    assert calcular_precos(itens) == [calcular(ci) for ci in itens]
+
+
+def test_entrada_numpy():
+    np = pytest.importorskip("numpy")
+    linhas = _linhas(1000, seed=5)
+    base, final = calcular_lote(*(np.array(c) for c in _colunas(linhas)))
+    assert [(int(b), int(f)) for b, f in zip(base, final)] == [preco_centavos(*l) for l in linhas]
+
+
+def test_lote_vazio(lote):
+    base, final = lote([], [], [], [], [])
+    assert len(base) == len(final) == 0
+
+
+# ------------------------------------------------------------
+# Linhas inválidas
+# ------------------------------------------------------------
+
+def test_negativos_e_nan_valem_zero(lote):
+    linhas = [
+        (-10, 2, 50, 0, 30),
+        (100, -2, 50, 0, 30),
+        (100, 2, 50, -5, -30),
+        (math.nan, 2, 50, 0, 30),
+        (100, math.nan, math.nan, math.nan, math.nan),
+    ]
+    esperado = [preco_centavos(*l) for l in linhas]
+    assert esperado == [(10000, 13000), (10000, 13000), (20000, 20000), (10000, 13000), (10000, 10000)]
+    base, final = lote(*_colunas(linhas))
+    assert list(zip(map(int, base), map(int, final))) == esperado
+
+
+def test_infinito_e_erro(lote):
+    with pytest.raises(ValueError):
+        preco_centavos(math.inf, 0, 0, 0, 0)
+    with pytest.raises(ValueError):
+        lote([1.0, math.inf], [0, 0], [0, 0], [0, 0], [0, 0])
+
+
+def test_valores_enormes_saem_do_int64():
+    # O caminho numpy desiste (estouraria o int64) e o resultado continua exato
+    linhas = [(1e15, 1e6, 1e9, 0, 1e5), (1, 1, 1, 1, 1)]
+    base, final = calcular_lote(*_colunas(linhas))
+    assert list(zip(map(int, base), map(int, final))) == [preco_centavos(*l) for l in linhas]
+    assert int(final[0]) > 2 ** 63
+
+
+def test_json_invalido():
+    with pytest.raises(LoteErro):
+        colunas_de_json({"itens": [{"produto": "a", "custo_material": "abc"}]}, 10)
+    with pytest.raises(LoteErro):
+        colunas_de_json({"itens": ["não é objeto"]}, 10)
+    with pytest.raises(LoteErro):
+        colunas_de_json({"itens": [{"produto": "a"}] * 3}, 2)
+    with pytest.raises(LoteErro):
+        colunas_de_json({"itens": []}, 10)
+    with pytest.raises(LoteErro):
+        colunas_de_json({"colunas": {"produto": ["a", "b"], "custo_material": [1]}}, 10)
+
+
+def test_csv_invalido():
+    with pytest.raises(LoteErro):
+        colunas_de_csv("", 10)
+    with pytest.raises(LoteErro):
+        colunas_de_csv("custo_material\n1\n", 10)
+    with pytest.raises(LoteErro, match="Linha 3"):
+        colunas_de_csv("produto;custo_material\na;1,5\nb;xyz\n", 10)
+
+
+@pytest.mark.parametrize("validade", ["inf", "Infinity", "-1", "3651", "nan", "1e400"])
+def test_validade_invalida_csv(validade):
+    with pytest.raises(LoteErro, match="Linha 3: validade_dias"):
+        colunas_de_csv(f"produto;validade_dias\na;7\nb;{validade}\n", 10)
+
+
+@pytest.mark.parametrize("validade", [math.inf, -math.inf, math.nan, -1, 3651, "inf"])
+def test_validade_invalida_json(validade):
+    with pytest.raises(LoteErro, match="Item 1: .*validade_dias"):
+        colunas_de_json({"itens": [{"produto": "a"}, {"produto": "b", "validade_dias": validade}]}, 10)
+    with pytest.raises(LoteErro, match="Item 1: validade_dias"):
+        colunas_de_json({"colunas": {"produto": ["a", "b"], "validade_dias": [7, validade]}}, 10)
+
+
+def test_validade_nos_limites():
+    cols = colunas_de_json({"itens": [{"produto": "a", "validade_dias": 0}, {"produto": "b", "validade_dias": 3650}]}, 10)
+    assert cols["validade_dias"] == [0, 3650]
+
+
+def test_csv_pt_br_igual_ao_escalar(lote):
+    cols = colunas_de_csv(
+        "produto;custo_material;horas_trabalhadas;valor_hora;despesas_extras;margem_lucro_pct\n"
+        "Mesa;R$ 1.234,56;2,5;45,90;0;33,3333\n"
+        "Cadeira;0,125;0;0;0;50\n",
+        10,
+    )
+    base, final = calcular_colunas(cols)
+    assert list(zip(map(int, base), map(int, final))) == [
+        preco_centavos(1234.56, 2.5, 45.90, 0, 33.3333),
+        preco_centavos(0.125, 0, 0, 0, 50),
+    ]
+
+
+# ------------------------------------------------------------
+# Inverso (resolver / resolver_lote)
+# ------------------------------------------------------------
+
+def test_resolver_base_zero_alvo_zero():
+    # Sem custo nenhum, preço 0 sai com margem 0: viável e exato
+    s = pricing.resolver(CalcInput("x", 0, 0, 0, 0, 50, 7), "margem_lucro_pct", 0)
+    assert (s.valor, s.viavel, s.preco_final_centavos) == (0.0, True, 0)
+
+
+def test_resolver_base_zero_alvo_positivo():
+    # Nenhuma margem tira preço de custo 0
+    s = pricing.resolver(CalcInput("x", 0, 0, 0, 0, 50, 7), "margem_lucro_pct", 10)
+    assert (s.valor, s.viavel, s.preco_final_centavos) == (0.0, False, 0)
+
+
+def test_resolver_lote_margem_base_zero(lote):
+    valores, viaveis, final = pricing.resolver_lote(
+        "margem_lucro_pct", [0, 0, 10, 13], [0, 5, 0, 10], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0],
+    )
+    assert list(map(float, valores)) == [0.0, 0.0, 0.0, 29.95]  # menor margem: 12,995 -> 13
+    assert list(map(bool, viaveis)) == [True, False, False, True]
+    assert list(map(int, final)) == [0, 500, 0, 1300]
+
+
+def test_resolver_lote_igual_ao_escalar(lote):
+    linhas = _linhas(300, seed=13)
+    alvos = [preco_centavos(*l)[1] / 100 * 1.1 for l in linhas] + [0.0] * 3
+    linhas += [(0, 0, 0, 0, 0), (0, 2, 0, 0, 10), (1, 0, 0, 0, 0)]
+    for variavel in pricing.RESOLVIVEIS:
+        valores, viaveis, final = pricing.resolver_lote(variavel, alvos, *_colunas(linhas))
+        esperado = [pricing.resolver(_ci(l), variavel, a) for l, a in zip(linhas, alvos)]
+        assert [(float(v), bool(ok), int(f)) for v, ok, f in zip(valores, viaveis, final)] == [
+            (s.valor, s.viavel, s.preco_final_centavos) for s in esperado
+        ]
+
+
+def test_calcular_preco_api_antiga():
+    # Assinatura e conta (float, sem limitar negativos) do calcular_preco original
+    r = calcular_preco("Logo", 10, 2, 30, 5, 50, validade_dias=3)
+    assert (r["custo_mao_obra"], r["custo_total"], r["preco_final"]) == (60, 75, 112.5)
+    assert r["produto"] == "Logo" and r["validade_dias"] == 3
+    assert set(r) >= {"data_emissao", "data_validade", "material", "horas", "valor_hora", "despesas"}
+    assert calcular_preco("X", -10, 0, 0, 0, 10)["preco_final"] == -11.0
+    assert calcular_preco("X", 0.1, 0, 0, 0.2, 0)["custo_total"] == 0.1 + 0.2
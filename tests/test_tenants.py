@@ -0,0 +1,71 @@
+# tests/test_tenants.py
+# Perfis por estúdio (core/tenants.py): cache por tenant e invalidação entre processos.
+import pytest
+
+from core.db import ConnectionPool
+from core.tenants import TenantProfiles
+from core.writer import WriteBehind
+
+
+@pytest.fixture
+def banco(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "t.db"))
+    writer = WriteBehind(pool, sincrono=True)
+    yield pool, writer
+    writer.close()
+
+
+def _perfis(banco, **kw):
+    pool, writer = banco
+    t = TenantProfiles(pool, writer, **kw)
+    t.init()
+    return t
+
+
+def _contar_versoes(pool):
+    lidas = []
+    pool.get().set_trace_callback(lambda sql: lidas.append(sql) if "cache_versions" in sql else None)
+    return lidas
+
+
+def test_leitura_em_cache_nao_consulta_a_versao_toda_vez(banco):
+    t = _perfis(banco, sync_ms=60000)
+    t.set("E1", {"nome": "Ateliê"})
+    lidas = _contar_versoes(banco[0])
+    for _ in range(1000):
+        assert t.get("E1")["nome"] == "Ateliê"
+    assert len(lidas) <= 1
+
+
+def test_propria_escrita_so_troca_o_tenant_gravado(banco):
+    t = _perfis(banco, sync_ms=0)
+    for i in range(10):
+        t.set(f"E{i}", {"nome": f"Estúdio {i}"})
+        t.get(f"E{i}")
+    t.set("E3", {"nome": "Novo"})
+    assert t.get("E3")["nome"] == "Novo"
+    st = t.stats()
+    assert st["invalidations"] == 0 and st["size"] == 10
+    hits = st["hits"]
+    for i in range(10):
+        t.get(f"E{i}")
+    assert t.stats()["hits"] == hits + 10
+
+
+def test_escrita_de_outro_processo_invalida(banco):
+    a, b = _perfis(banco, sync_ms=0), _perfis(banco, sync_ms=0)
+    a.set("E1", {"nome": "v1"})
+    assert b.get("E1")["nome"] == "v1"
+    a.set("E1", {"nome": "v2"})
+    assert b.get("E1")["nome"] == "v2"
+    assert b.stats()["invalidations"] == 1
+
+
+def test_sync_ms_segura_a_releitura(banco):
+    a, b = _perfis(banco, sync_ms=0), _perfis(banco, sync_ms=60000)
+    a.set("E1", {"nome": "v1"})
+    assert b.get("E1")["nome"] == "v1"
+    a.set("E1", {"nome": "v2"})
+    assert b.get("E1")["nome"] == "v1"  # dentro do intervalo: valor em cache
+    b._versao = (0.0, b._versao[1])     # intervalo venceu
+    assert b.get("E1")["nome"] == "v2"
@@ -0,0 +1,92 @@
+# tests/test_writer.py
+# Write-behind (core/writer.py): lote, erro por job, thread que não morre e encerramento.
+import sqlite3
+import threading
+
+import pytest
+
+from core.db import ConnectionPool
+from core.writer import WriteBehind
+
+
+@pytest.fixture
+def pool(tmp_path):
+    p = ConnectionPool(str(tmp_path / "w.db"))
+    p.get().execute("CREATE TABLE t (v INTEGER NOT NULL)")
+    return p
+
+
+def _inserir(v):
+    return lambda conn: conn.execute("INSERT INTO t (v) VALUES (?)", (v,)).lastrowid
+
+
+def _total(pool):
+    return pool.get().execute("SELECT COUNT(*) FROM t").fetchone()[0]
+
+
+def test_job_ruim_nao_derruba_o_lote(pool):
+    w = WriteBehind(pool, max_atraso_ms=50)
+    futs = [w.submit(_inserir(None if i == 3 else i)) for i in range(10)]
+    w.flush(5)
+    assert isinstance(futs[3].exception(5), sqlite3.IntegrityError)
+    assert all(f.result(5) for i, f in enumerate(futs) if i != 3)
+    assert _total(pool) == 9
+    st = w.stats()
+    assert st["erros"] == 1 and st["gravados"] == 10 and st["enfileirados"] == 11  # + o job do flush
+    w.close()
+
+
+def test_erro_do_pool_vai_para_o_future(pool):
+    class PoolRuim:
+        def get(self):
+            raise sqlite3.OperationalError("disco cheio")
+
+    w = WriteBehind(PoolRuim())
+    fut = w.submit(_inserir(1))
+    with pytest.raises(sqlite3.OperationalError):
+        fut.result(5)
+    # a thread continua viva e atende o próximo
+    w.pool = pool
+    assert w.submit(_inserir(2)).result(5)
+    assert w._thread.is_alive()
+    w.close()
+
+
+def test_thread_morta_e_substituida(pool):
+    w = WriteBehind(pool)
+    w.flush(5)
+    w.close()
+    # writer de pé de novo, mas com a thread morta (ex.: erro fora de _gravar)
+    velha = w._thread = threading.Thread(target=lambda: None)
+    velha.start()
+    velha.join()
+    w._fechado = False
+    assert w.submit(_inserir(1)).result(5)
+    assert w._thread is not velha and w._thread.is_alive()
+    w.close()
+
+
+def test_close_concorrente_nao_perde_escrita(pool):
+    w = WriteBehind(pool, max_atraso_ms=1)
+    futs, lock = [], threading.Lock()
+
+    def enviar():
+        for i in range(200):
+            f = w.submit(_inserir(i))
+            with lock:
+                futs.append(f)
+
+    threads = [threading.Thread(target=enviar) for _ in range(4)]
+    for t in threads:
+        t.start()
+    w.close()
+    for t in threads:
+        t.join()
+    assert all(f.result(5) for f in futs)
+    assert _total(pool) == 800
+
+
+def test_sincrono_grava_na_hora(pool):
+    w = WriteBehind(pool, sincrono=True)
+    assert w.submit(_inserir(7)).done()
+    assert w._thread is None and _total(pool) == 1